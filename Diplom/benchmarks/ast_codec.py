@@ -0,0 +1,65 @@
+"""
+Двоичный формат AST против pickle.
+
+Скрипт генерирует модуль на N строк, разбирает его встроенным парсером
+и сравнивает размер и время записи/чтения дерева в формате ast_codec
+(с исходным текстом и без него) и через pickle. Сборщик циклов на время
+замеров отключен, как при загрузке результатов ParallelParser.
+
+Запуск из корня репозитория:
+    python -m Diplom.benchmarks.ast_codec [--lines 20000] [--repeat 3]
+"""
+import argparse
+import gc
+import pickle
+import time
+
+from Diplom.benchmarks.incremental_reparse import build_module
+from Diplom.src.parser import ast_codec
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+
+def best_time(action, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = action()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--lines", type=int, default=20000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    code = build_module(args.lines)
+    module = NativeBSLParser().parse_string(code, "module.bsl")
+
+    formats = [
+        ("ast_codec", lambda: ast_codec.dump(module), ast_codec.load),
+        ("ast_codec без текста",
+         lambda: ast_codec.dump(module, include_source=False),
+         ast_codec.load),
+        ("pickle", lambda: pickle.dumps(module, pickle.HIGHEST_PROTOCOL),
+         pickle.loads),
+    ]
+
+    print(f"Модуль: {code.count(chr(10))} строк")
+    gc.disable()
+    try:
+        for title, dump, load in formats:
+            dump_seconds, data = best_time(dump, args.repeat)
+            load_seconds, _ = best_time(lambda: load(data), args.repeat)
+            print(f"  {title:<21} {len(data) / 1024 / 1024:6.2f} МБ, "
+                  f"запись {dump_seconds * 1000:7.1f} мс, "
+                  f"чтение {load_seconds * 1000:7.1f} мс")
+    finally:
+        gc.enable()
+
+
+if __name__ == "__main__":
+    main()
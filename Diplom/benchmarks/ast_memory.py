@@ -0,0 +1,166 @@
+"""
+Память, занимаемая AST.
+
+Скрипт генерирует модуль на N строк, разбирает его встроенным парсером
+под tracemalloc и выводит объем памяти, которую удерживает дерево
+(без исходного текста и таблицы trivia), и ее долю на один узел.
+Для сравнения то же дерево копируется в прежнее представление (узлы
+с __dict__, позиции - обычные dataclass), переносится в плоское
+хранилище (FlatAST) и сериализуется в один буфер.
+
+Запуск из корня репозитория:
+    python -m Diplom.benchmarks.ast_memory [--lines 20000]
+"""
+import argparse
+import gc
+import pickle
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from Diplom.benchmarks.incremental_reparse import build_module
+from Diplom.src.parser.ast_nodes import ASTNode, node_fields
+from Diplom.src.parser.flat_ast import FlatAST
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+
+def count_nodes(root: ASTNode) -> int:
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        for name in node_fields(type(node)):
+            value = getattr(node, name, None)
+            if isinstance(value, ASTNode):
+                stack.append(value)
+            elif isinstance(value, (list, tuple)):
+                for item in value:
+                    if isinstance(item, ASTNode):
+                        stack.append(item)
+                    elif isinstance(item, tuple):
+                        stack.append(item[0])
+                        stack.extend(item[1])
+    return count
+
+
+@dataclass
+class _OldPosition:
+    line: int
+    column: int
+
+
+@dataclass
+class _OldRange:
+    start: _OldPosition
+    end: _OldPosition
+
+
+class _OldNode:
+    """Узел до __slots__: атрибуты в __dict__ экземпляра"""
+
+
+def baseline_copy(root: ASTNode):
+    """
+    Копия дерева в представлении до __slots__: у каждого узла свой
+    __dict__ и свои списки, позиции - dataclass без слотов. Общие
+    объекты Position остаются общими и в копии.
+    """
+    memo = {}
+
+    def copy_value(value):
+        if isinstance(value, ASTNode):
+            return copy_node(value)
+        if isinstance(value, list):
+            return [copy_value(item) for item in value]
+        if isinstance(value, tuple):
+            return tuple(copy_value(item) for item in value)
+        return value
+
+    def copy_position(position):
+        key = id(position)
+        if key not in memo:
+            memo[key] = _OldPosition(position.line, position.column)
+        return memo[key]
+
+    def copy_node(node):
+        new = _OldNode()
+        for name in node_fields(type(node)):
+            if name == "_body":
+                new.body = copy_value(node.body)
+            elif name.startswith("_") or not hasattr(node, name):
+                continue
+            elif name == "range":
+                new.range = _OldRange(copy_position(node.range.start),
+                                      copy_position(node.range.end))
+            else:
+                setattr(new, name, copy_value(getattr(node, name)))
+        return new
+
+    return copy_node(root)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--lines", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    code = build_module(args.lines)
+    parser = NativeBSLParser()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    module = parser.parse_string(code, "module.bsl")
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    trivia = module.trivia
+    extra = sum(
+        sys.getsizeof(a)
+        for a in (trivia.kinds, trivia.lines, trivia.end_lines,
+                  trivia.starts, trivia.ends)
+    )
+    ast_bytes = total - extra
+    nodes = count_nodes(module)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    baseline = baseline_copy(module)
+    gc.collect()
+    baseline_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del baseline
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    flat = FlatAST.from_module(module)
+    gc.collect()
+    flat_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    graph_size = len(pickle.dumps(module))
+    graph_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    flat_size = len(pickle.dumps(flat))
+    flat_seconds = time.perf_counter() - started
+
+    print(f"Модуль: {code.count(chr(10))} строк, узлов AST: {nodes}")
+    print(f"  до __slots__: {baseline_bytes / 1024 / 1024:.1f} МБ, "
+          f"{baseline_bytes / nodes:.0f} байт на узел")
+    print(f"  память AST: {ast_bytes / 1024 / 1024:.1f} МБ, "
+          f"{ast_bytes / nodes:.0f} байт на узел")
+    print(f"  FlatAST:    {flat_bytes / 1024 / 1024:.1f} МБ, "
+          f"{flat_bytes / len(flat):.0f} байт на узел")
+    print(f"  pickle AST:     {graph_size / 1024 / 1024:6.1f} МБ, "
+          f"{graph_seconds * 1000:7.1f} мс")
+    print(f"  pickle FlatAST: {flat_size / 1024 / 1024:6.1f} МБ, "
+          f"{flat_seconds * 1000:7.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
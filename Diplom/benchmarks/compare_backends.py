@@ -0,0 +1,66 @@
+"""
+Сравнение бэкендов разбора на корпусе модулей.
+
+Запуск из корня репозитория:
+    python -m Diplom.benchmarks.compare_backends <каталог> [--jar bsl.jar]
+
+--lazy-bodies - тела методов не разбираются (профиль правил,
+которым нужны только сигнатуры).
+--workers N - дополнительно встроенный парсер в пуле из N процессов.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from Diplom.src.parser.bsl_parser import BSLParser
+from Diplom.src.parser.native_parser import NativeBSLParser
+from Diplom.src.parser.parallel_parser import ParallelParser
+
+
+def run_backend(backend, files) -> dict:
+    """Разбирает все файлы и возвращает статистику по бэкенду"""
+    started = time.perf_counter()
+    result = backend.parse_many(files)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "files": len(files),
+        "parsed": len(result.modules),
+        "errors": len(result.errors),
+        "seconds": elapsed,
+        "procedures": sum(
+            len(m.procedures) + len(m.functions)
+            for m in result.modules.values()
+        ),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("corpus", help="каталог с файлами .bsl")
+    arg_parser.add_argument("--jar", help="путь к BSL Language Server")
+    arg_parser.add_argument("--lazy-bodies", action="store_true",
+                            help="строить тела методов только по запросу")
+    arg_parser.add_argument("--workers", type=int,
+                            help="число процессов для ParallelParser")
+    args = arg_parser.parse_args()
+
+    files = sorted(str(p) for p in Path(args.corpus).rglob("*.bsl"))
+    backends = [NativeBSLParser(lazy_bodies=args.lazy_bodies)]
+    if args.jar:
+        backends.append(BSLParser(args.jar, lazy_bodies=args.lazy_bodies))
+    if args.workers:
+        backends.append(ParallelParser(workers=args.workers))
+
+    for backend in backends:
+        with backend:
+            stats = run_backend(backend, files)
+        print(
+            f"{backend.name:>8}: {stats['parsed']}/{stats['files']} файлов, "
+            f"ошибок {stats['errors']}, методов {stats['procedures']}, "
+            f"{stats['seconds']:.3f} с"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Нагрузочный тест глубоко вложенных выражений.
+
+Сгенерированный код 1С часто содержит длинные конкатенации строк
+(Текст = "а" + "б" + ... ). Скрипт строит такие цепочки на N операндов
+и замеряет время преобразования JSON -> AST и встроенного парсера.
+
+Запуск из корня репозитория:
+    python -m Diplom.benchmarks.deep_expressions [--operands 50000]
+
+JSON-дерево строится прямо в Python: стандартный json.loads сам
+не разбирает вложенность такой глубины.
+"""
+import argparse
+import time
+
+from Diplom.src.parser.json_converter import JsonAstConverter
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+
+def build_json_chain(operands: int) -> dict:
+    """Левоассоциативная цепочка binaryOperation на operands операндов"""
+    expr = {"type": "literal", "value": "0", "literalType": "string"}
+    for i in range(1, operands):
+        expr = {
+            "type": "binaryOperation",
+            "operator": "+",
+            "left": expr,
+            "right": {"type": "literal", "value": str(i),
+                      "literalType": "string"},
+        }
+    return {
+        "module": {
+            "functions": [{
+                "name": "Текст",
+                "body": [{"type": "returnStatement", "expression": expr}],
+            }]
+        }
+    }
+
+
+def build_source_chain(operands: int) -> str:
+    chain = " + ".join(f'"{i}"' for i in range(operands))
+    return f"Функция Текст()\n    Возврат {chain};\nКонецФункции\n"
+
+
+def measure(operands: int):
+    bsl_json = build_json_chain(operands)
+    started = time.perf_counter()
+    JsonAstConverter("stress").convert(bsl_json)
+    json_seconds = time.perf_counter() - started
+
+    source = build_source_chain(operands)
+    started = time.perf_counter()
+    NativeBSLParser(tolerant=False).parse_string(source, "stress")
+    native_seconds = time.perf_counter() - started
+
+    print(f"{operands:>8} операндов: JSON -> AST {json_seconds:.3f} с, "
+          f"встроенный парсер {native_seconds:.3f} с")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--operands", type=int, default=50000)
+    args = arg_parser.parse_args()
+
+    # Время должно расти линейно с числом операндов
+    for operands in (args.operands // 4, args.operands // 2, args.operands):
+        measure(operands)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Инкрементальный разбор модуля после правки.
+
+Скрипт генерирует модуль на N строк, разбирает его встроенным парсером
+полностью, а затем вносит правку в одну строку метода в начале модуля
+и замеряет NativeBSLParser.reparse: правка без перевода строки
+и правка, добавляющая строку (сдвигает позиции всех методов ниже).
+
+Запуск из корня репозитория:
+    python -m Diplom.benchmarks.incremental_reparse [--lines 10000]
+"""
+import argparse
+import time
+
+from Diplom.src.parser.ast_nodes import Position, Range
+from Diplom.src.parser.incremental import TextEdit
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+METHOD_TEMPLATE = """// Обработка {i}
+Процедура Обработать{i}(Параметры, Знач Режим = Неопределено) Экспорт
+    Итог = 0;
+    Для Каждого Строка Из Параметры.Строки Цикл
+        Если Строка.Сумма > 0 И Режим <> Неопределено Тогда
+            Итог = Итог + Строка.Сумма * {i};
+        Иначе
+            Сообщить("Пропуск строки " + Строка.НомерСтроки);
+        КонецЕсли;
+    КонецЦикла;
+    Параметры.Вставить("Итог", Итог);
+КонецПроцедуры
+
+"""
+
+
+def build_module(lines: int) -> str:
+    method_lines = METHOD_TEMPLATE.count("\n")
+    return "".join(
+        METHOD_TEMPLATE.format(i=i)
+        for i in range(max(1, lines // method_lines))
+    )
+
+
+def measure(parser: NativeBSLParser, code: str, new_text: str,
+            repeat: int = 5) -> float:
+    """Лучшее время reparse для вставки new_text в тело второго метода"""
+    best = None
+    for _ in range(repeat):
+        module = parser.parse_string(code, "module.bsl")
+        line = module.procedures[1].range.start.line + 2
+        edit = TextEdit(Range(Position(line, 5), Position(line, 5)),
+                        new_text)
+        started = time.perf_counter()
+        parser.reparse(module, [edit])
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--lines", type=int, default=10000)
+    args = arg_parser.parse_args()
+
+    code = build_module(args.lines)
+    parser = NativeBSLParser()
+
+    started = time.perf_counter()
+    parser.parse_string(code, "module.bsl")
+    full_seconds = time.perf_counter() - started
+
+    same_line = measure(parser, code, "Итог = 1; ")
+    new_line = measure(parser, code, "Итог = 1;\n    ")
+
+    print(f"Модуль: {code.count(chr(10))} строк")
+    print(f"  полный разбор:              {full_seconds * 1000:8.1f} мс")
+    print(f"  reparse, правка в строке:   {same_line * 1000:8.1f} мс")
+    print(f"  reparse, новая строка:      {new_line * 1000:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
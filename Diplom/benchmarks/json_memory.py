@@ -0,0 +1,114 @@
+"""
+Пиковая память при разборе большого JSON от BSL LS.
+
+Сравниваются два способа: json.loads всего вывода + convert и
+потоковый convert_stream. Каждый режим запускается в отдельном
+процессе, чтобы пики памяти не влияли друг на друга.
+
+Запуск из корня репозитория:
+    python -m Diplom.benchmarks.json_memory [--procedures 20000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def build_module_json(procedures: int) -> dict:
+    """Модуль из procedures процедур с несколькими операторами"""
+    body = [
+        {"type": "assignment",
+         "left": {"type": "variable", "name": "Сумма"},
+         "right": {"type": "binaryOperation", "operator": "+",
+                   "left": {"type": "variable", "name": "Сумма"},
+                   "right": {"type": "literal", "value": "1",
+                             "literalType": "number"}}},
+        {"type": "ifStatement",
+         "condition": {"type": "variable", "name": "Флаг"},
+         "thenStatements": [{"type": "callStatement",
+                         "expression": {"type": "call", "name": "Сообщить",
+                                        "arguments": []}}]},
+    ] * 5
+    return {
+        "module": {
+            "procedures": [
+                {"name": f"Процедура{i}", "export": i % 2 == 0,
+                 "parameters": [{"name": "Параметр"}], "body": body}
+                for i in range(procedures)
+            ]
+        }
+    }
+
+
+def run_mode(mode: str, path: str):
+    """Выполняется в дочернем процессе: разбор файла одним способом"""
+    from Diplom.src.parser.json_converter import JsonAstConverter
+
+    use_tracemalloc = resource is None
+    if use_tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        if mode == "loads":
+            JsonAstConverter("bench").convert(json.loads(f.read()))
+        else:
+            JsonAstConverter("bench").convert_stream(f)
+    seconds = time.perf_counter() - started
+
+    if use_tracemalloc:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    else:
+        # ru_maxrss: килобайты в Linux, байты в macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_mb = peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb}))
+
+
+def measure(procedures: int):
+    with tempfile.NamedTemporaryFile(
+        mode="w", suffix=".json", encoding="utf-8", delete=False
+    ) as tmp:
+        json.dump(build_module_json(procedures), tmp, ensure_ascii=False)
+        path = tmp.name
+
+    try:
+        size_mb = os.path.getsize(path) / 2 ** 20
+        print(f"JSON: {procedures} процедур, {size_mb:.1f} МБ")
+        for mode in ("loads", "stream"):
+            output = subprocess.run(
+                [sys.executable, "-m", "Diplom.benchmarks.json_memory",
+                 "--run", mode, path],
+                capture_output=True, text=True, encoding="utf-8", check=True,
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>7}: {stats['seconds']:.2f} с, "
+                  f"пик памяти {stats['peak_mb']:.1f} МБ")
+    finally:
+        os.unlink(path)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--procedures", type=int, default=20000)
+    arg_parser.add_argument("--run", nargs=2, metavar=("MODE", "PATH"),
+                            help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run:
+        run_mode(*args.run)
+    else:
+        measure(args.procedures)
+
+
+if __name__ == "__main__":
+    main()
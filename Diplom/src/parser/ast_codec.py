@@ -0,0 +1,445 @@
+from pathlib import Path
+from typing import Dict, List, Union
+
+from .ast_nodes import (
+    AssignmentNode, BinaryOperationNode, BreakStatementNode,
+    ContinueStatementNode, ErrorNode, ForEachLoopNode, ForLoopNode,
+    FunctionCallNode, FunctionNode, IfStatementNode, IndexAccessNode,
+    LiteralNode, MemberAccessNode, ModuleNode, NewObjectNode,
+    ParameterNode, Position, ProcedureNode, RaiseStatementNode, Range,
+    ReturnStatementNode, TryStatementNode, UnaryOperationNode,
+    VariableNode, WhileLoopNode,
+)
+from .ast_schema import (
+    ELIF_BODY, ELIF_CONDITION, FLAGS, KIND_IDS, LIST_FIELDS, NODE_CHILDREN,
+    NODE_TYPES, ROLE_IDS, ROLES, TEXT_FIELDS, decode_constant,
+    encode_constant,
+)
+from .names import NAMES
+from .source import SourceText
+from .trivia import TriviaTable
+
+# Компактный двоичный формат AST: кэш разобранных модулей на диске
+# и передача модулей между процессами.
+#
+# Версия 1:
+#   "BSLA", версия (1 байт), признаки (1 байт)
+#   число узлов, строк, констант, ошибок модуля (varint)
+#   таблица строк (имена, операторы, сообщения) и таблица констант
+#   (значения литералов): длина в байтах (varint) + UTF-8
+#   таблица узлов - колонки в прямом порядке обхода, у каждой впереди
+#   длина в байтах: вид, роль, флаги (по байту на узел); расстояние
+#   до родителя, строка начала (разность с предыдущим узлом), колонка,
+#   строка конца (разность со строкой начала), колонка конца, номер
+#   строки текста узла, номер константы литерала (varint)
+#   ошибки модуля: номер узла + 1 или 0 - узел ошибки вне дерева
+#   (такие узлы лежат в конце таблицы узлов)
+#   необязательно: исходный текст (путь, кодировка, текст) и trivia
+#
+# Разности строк хранятся в zigzag-кодировке, поэтому почти все числа
+# занимают один байт. Чтение идет по memoryview исходного буфера без
+# копирования колонок.
+FORMAT_VERSION = 1
+_MAGIC = b"BSLA"
+_HAS_SOURCE = 1
+_HAS_TRIVIA = 2
+_HAS_PATH = 4
+
+_ERRORS_ROLE = ROLE_IDS["errors"]
+
+# Пустой узел каждого вида; атрибуты заполняются при чтении
+_FACTORIES = {
+    ModuleNode: lambda: ModuleNode(""),
+    FunctionNode: lambda: FunctionNode(""),
+    ProcedureNode: lambda: ProcedureNode(""),
+    ParameterNode: lambda: ParameterNode(""),
+    VariableNode: lambda: VariableNode(""),
+    BinaryOperationNode: lambda: BinaryOperationNode("", None, None),
+    LiteralNode: lambda: LiteralNode(None, ""),
+    IfStatementNode: IfStatementNode,
+    WhileLoopNode: WhileLoopNode,
+    ReturnStatementNode: ReturnStatementNode,
+    AssignmentNode: lambda: AssignmentNode(None, None),
+    UnaryOperationNode: lambda: UnaryOperationNode("", None),
+    FunctionCallNode: lambda: FunctionCallNode(""),
+    MemberAccessNode: lambda: MemberAccessNode(None, ""),
+    IndexAccessNode: lambda: IndexAccessNode(None, None),
+    NewObjectNode: lambda: NewObjectNode(""),
+    ForLoopNode: ForLoopNode,
+    ForEachLoopNode: ForEachLoopNode,
+    TryStatementNode: TryStatementNode,
+    RaiseStatementNode: RaiseStatementNode,
+    BreakStatementNode: BreakStatementNode,
+    ContinueStatementNode: ContinueStatementNode,
+    ErrorNode: lambda: ErrorNode(""),
+}
+# Номер вида -> (создание узла, строковый атрибут, литерал ли это)
+_KIND_LOADERS: Dict[int, tuple] = {
+    KIND_IDS[node_type]: (_FACTORIES[node_class],
+                           TEXT_FIELDS.get(node_class),
+                           node_class is LiteralNode)
+    for node_class, node_type in NODE_TYPES.items()
+}
+
+
+def dump(module: ModuleNode, include_source: bool = True) -> bytes:
+    """
+    Модуль в двоичном формате. include_source - сохранить исходный текст
+    и таблицу trivia (нужны правилам, работающим с текстом). Ленивые
+    тела методов при этом разбираются.
+    """
+    writer = _Writer()
+    writer.write_tree(module)
+
+    flags = 0
+    source = module.source if include_source else None
+    if source is not None:
+        flags |= _HAS_SOURCE
+        if source.path is not None:
+            flags |= _HAS_PATH
+        if module._trivia is not None:
+            flags |= _HAS_TRIVIA
+
+    out = bytearray(_MAGIC)
+    out.append(FORMAT_VERSION)
+    out.append(flags)
+    for number in (writer.count, len(writer.strings),
+                   len(writer.constants), len(module.errors)):
+        _write_varint(out, number)
+    for text in writer.strings:
+        _write_text(out, text)
+    for value in writer.constants:
+        _write_text(out, encode_constant(value))
+    for column in writer.node_columns():
+        _write_varint(out, len(column))
+        out += column
+    out += writer.error_refs
+
+    if source is not None:
+        if source.path is not None:
+            _write_text(out, source.path)
+        _write_text(out, source.encoding)
+        _write_text(out, source.text)
+        if flags & _HAS_TRIVIA:
+            for column in _trivia_columns(module._trivia):
+                _write_varint(out, len(column))
+                out += column
+    return bytes(out)
+
+
+def load(data: Union[bytes, bytearray, memoryview]) -> ModuleNode:
+    """Модуль из буфера, записанного dump. ValueError - чужой формат"""
+    reader = _Reader(memoryview(data))
+    if bytes(reader.take(4)) != _MAGIC:
+        raise ValueError("Буфер не содержит AST в двоичном формате")
+    version = reader.byte()
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Версия формата AST {version}, поддерживается {FORMAT_VERSION}"
+        )
+    flags = reader.byte()
+    count, string_count, constant_count, error_count = (
+        reader.varint() for _ in range(4))
+    # Имена - через пул запуска: модули из разных буферов делят строки
+    strings = [NAMES.intern(reader.text()) for _ in range(string_count)]
+    constants = [decode_constant(reader.text())
+                 for _ in range(constant_count)]
+
+    kinds = reader.column()
+    roles = reader.column()
+    node_flags = reader.column()
+    parents, lines, columns, end_lines, end_columns, names, values = (
+        _read_varints(reader.column()) for _ in range(7))
+    error_refs = [reader.varint() for _ in range(error_count)]
+
+    nodes: List = [None] * count
+    outside = []  # узлы ошибок вне дерева, по порядку
+    line = 0
+    literal = 0
+    for index in range(count):
+        factory, text_field, is_literal = _KIND_LOADERS[kinds[index]]
+        node = factory()
+        nodes[index] = node
+
+        line += _unzigzag(lines[index])
+        if line:
+            node.range = Range(
+                Position(line, columns[index]),
+                Position(line + _unzigzag(end_lines[index]),
+                         end_columns[index]),
+            )
+        if names[index]:
+            setattr(node, text_field, strings[names[index] - 1])
+        if node_flags[index]:
+            for field, bit in FLAGS:
+                if node_flags[index] & bit:
+                    setattr(node, field, True)
+        if is_literal:
+            node.value = constants[values[literal]]
+            literal += 1
+
+        if index:
+            role = roles[index]
+            if role == _ERRORS_ROLE:
+                outside.append(node)
+            else:
+                _attach(nodes[index - parents[index]], role, node)
+
+    module = nodes[0]
+    outside.reverse()
+    module.errors = [
+        nodes[ref - 1] if ref else outside.pop() for ref in error_refs
+    ]
+
+    if flags & _HAS_SOURCE:
+        path = reader.text() if flags & _HAS_PATH else None
+        encoding = reader.text()
+        module.source = SourceText(reader.text(), path, encoding)
+        if flags & _HAS_TRIVIA:
+            module.trivia = _read_trivia(reader, module.source.text)
+    return module
+
+
+def dump_file(module: ModuleNode, path: str, include_source: bool = True):
+    """Сохраняет модуль в файл (например, в кэш разбора)"""
+    Path(path).write_bytes(dump(module, include_source))
+
+
+def load_file(path: str) -> ModuleNode:
+    return load(Path(path).read_bytes())
+
+
+# ----------------------------------------------------------------------
+# Запись
+# ----------------------------------------------------------------------
+
+class _Writer:
+    """Колонки таблицы узлов, заполняемые при обходе дерева"""
+
+    def __init__(self):
+        self.count = 0
+        self.strings: List[str] = []
+        self.constants: list = []
+        self._string_ids: Dict[str, int] = {}
+        self._constant_ids: Dict[tuple, int] = {}
+        self.kinds = bytearray()
+        self.roles = bytearray()
+        self.flags = bytearray()
+        self.parents = bytearray()
+        self.lines = bytearray()
+        self.start_columns = bytearray()
+        self.end_lines = bytearray()
+        self.end_columns = bytearray()
+        self.names = bytearray()
+        self.values = bytearray()
+        self.error_refs = bytearray()
+        self._line = 0  # строка начала предыдущего узла
+
+    def node_columns(self) -> List[bytearray]:
+        return [self.kinds, self.roles, self.flags, self.parents,
+                self.lines, self.start_columns, self.end_lines,
+                self.end_columns, self.names, self.values]
+
+    def write_tree(self, module: ModuleNode):
+        # Ошибки из тел методов уже есть в дереве: в списке ошибок
+        # модуля на них остаются ссылки, узлы не дублируются
+        error_ids: Dict[int, int] = {}
+        stack = [(module, 0, 0)]
+        while stack:
+            node, parent, role = stack.pop()
+            index = self._write_node(node, parent, role)
+            if type(node) is ErrorNode:
+                error_ids[id(node)] = index
+
+            children = []
+            for field in NODE_CHILDREN[type(node)]:
+                if node is module and field == "errors":
+                    continue
+                value = getattr(node, field)
+                if field == "elif_branches":
+                    for condition, statements in value:
+                        children.append((condition, ELIF_CONDITION))
+                        children.extend((s, ELIF_BODY) for s in statements)
+                elif field in LIST_FIELDS:
+                    field_role = ROLE_IDS[field]
+                    children.extend((child, field_role) for child in value)
+                elif value is not None:
+                    children.append((value, ROLE_IDS[field]))
+            for child, child_role in reversed(children):
+                stack.append((child, index, child_role))
+
+        for error in module.errors:
+            index = error_ids.get(id(error))
+            if index is None:
+                self._write_node(error, 0, _ERRORS_ROLE)
+                _write_varint(self.error_refs, 0)
+            else:
+                _write_varint(self.error_refs, index + 1)
+
+    def _write_node(self, node, parent: int, role: int) -> int:
+        index = self.count
+        self.count += 1
+        node_class = type(node)
+        self.kinds.append(KIND_IDS[node.node_type])
+        self.roles.append(role)
+        flags = 0
+        for field, bit in FLAGS:
+            if getattr(node, field, False):
+                flags |= bit
+        self.flags.append(flags)
+        _write_varint(self.parents, index - parent)
+
+        node_range = node.range
+        if node_range is None:
+            line = column = end_line = end_column = 0
+        else:
+            line, column = node_range.start.line, node_range.start.column
+            end_line, end_column = node_range.end.line, node_range.end.column
+        _write_varint(self.lines, _zigzag(line - self._line))
+        _write_varint(self.start_columns, column)
+        _write_varint(self.end_lines, _zigzag(end_line - line))
+        _write_varint(self.end_columns, end_column)
+        self._line = line
+
+        text_field = TEXT_FIELDS.get(node_class)
+        text = getattr(node, text_field) if text_field else None
+        _write_varint(self.names,
+                      0 if text is None else self._string_id(text) + 1)
+        if node_class is LiteralNode:
+            _write_varint(self.values, self._constant_id(node.value))
+        return index
+
+    def _string_id(self, text: str) -> int:
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def _constant_id(self, value) -> int:
+        key = (type(value), value)
+        constant_id = self._constant_ids.get(key)
+        if constant_id is None:
+            constant_id = self._constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+        return constant_id
+
+
+def _trivia_columns(trivia: TriviaTable) -> List[bytearray]:
+    kinds = bytearray(trivia.kinds)
+    lines, end_lines, starts, ends = (bytearray() for _ in range(4))
+    previous_line = previous_start = 0
+    for index in range(len(trivia)):
+        line, start = trivia.lines[index], trivia.starts[index]
+        _write_varint(lines, line - previous_line)
+        _write_varint(end_lines, trivia.end_lines[index] - line)
+        _write_varint(starts, start - previous_start)
+        _write_varint(ends, trivia.ends[index] - start)
+        previous_line, previous_start = line, start
+    return [kinds, lines, end_lines, starts, ends]
+
+
+def _zigzag(number: int) -> int:
+    return number * 2 if number >= 0 else -number * 2 - 1
+
+
+def _unzigzag(number: int) -> int:
+    return number >> 1 if not number & 1 else -(number >> 1) - 1
+
+
+def _write_varint(out: bytearray, number: int):
+    while number > 0x7F:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _write_text(out: bytearray, text: str):
+    data = text.encode("utf-8")
+    _write_varint(out, len(data))
+    out += data
+
+
+# ----------------------------------------------------------------------
+# Чтение
+# ----------------------------------------------------------------------
+
+class _Reader:
+    """Последовательное чтение из memoryview"""
+
+    def __init__(self, data: memoryview):
+        self.data = data
+        self.pos = 0
+
+    def take(self, size: int) -> memoryview:
+        if self.pos + size > len(self.data):
+            raise ValueError("Двоичный AST обрезан")
+        part = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return part
+
+    def byte(self) -> int:
+        return self.take(1)[0]
+
+    def varint(self) -> int:
+        data = self.data
+        number = shift = 0
+        while True:
+            if self.pos >= len(data):
+                raise ValueError("Двоичный AST обрезан")
+            byte = data[self.pos]
+            self.pos += 1
+            number |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return number
+            shift += 7
+
+    def text(self) -> str:
+        return str(self.take(self.varint()), "utf-8")
+
+    def column(self) -> memoryview:
+        return self.take(self.varint())
+
+
+def _read_varints(data: memoryview) -> List[int]:
+    if max(data, default=0) < 0x80:
+        return data.tolist()  # все числа однобайтовые
+    numbers = []
+    append = numbers.append
+    number = shift = 0
+    for byte in data:
+        if byte < 0x80:
+            append(number | byte << shift)
+            number = shift = 0
+        else:
+            number |= (byte & 0x7F) << shift
+            shift += 7
+    return numbers
+
+
+def _read_trivia(reader: _Reader, text: str) -> TriviaTable:
+    trivia = TriviaTable(text)
+    kinds = reader.column()
+    lines, end_lines, starts, ends = (
+        _read_varints(reader.column()) for _ in range(4))
+    line = start = 0
+    for index in range(len(kinds)):
+        line += lines[index]
+        start += starts[index]
+        trivia.add(kinds[index], line, line + end_lines[index],
+                   start, start + ends[index])
+    return trivia
+
+
+def _attach(parent, role: int, node):
+    """Кладет node в поле родителя, соответствующее роли"""
+    if role == ELIF_CONDITION:
+        parent.elif_branches.append((node, []))
+    elif role == ELIF_BODY:
+        parent.elif_branches[-1][1].append(node)
+    else:
+        field = ROLES[role]
+        if field in LIST_FIELDS:
+            getattr(parent, field).append(node)
+        else:
+            setattr(parent, field, node)
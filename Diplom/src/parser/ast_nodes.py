@@ -1,8 +1,15 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
-from typing import List
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 from enum import Enum
 
-from Diplom.src.visitor.base_visitor import ASTVisitor
+if TYPE_CHECKING:
+    from Diplom.src.visitor.base_visitor import ASTVisitor
+    from .source import SourceText
+    from .module_index import ModuleIndex
+    from .regions import RegionNode
+    from .trivia import TriviaTable
 
 
 class NodeType(Enum):
@@ -14,27 +21,46 @@ class NodeType(Enum):
     IF_STATEMENT = "if_statement"
     WHILE_LOOP = "while_loop"
     FOR_LOOP = "for_loop"
+    FOR_EACH_LOOP = "for_each_loop"
+    TRY_STATEMENT = "try_statement"
     RETURN_STATEMENT = "return_statement"
+    RAISE_STATEMENT = "raise_statement"
+    BREAK_STATEMENT = "break_statement"
+    CONTINUE_STATEMENT = "continue_statement"
     EXPRESSION = "expression"
     BINARY_OPERATION = "binary_operation"
+    UNARY_OPERATION = "unary_operation"
     FUNCTION_CALL = "function_call"
+    MEMBER_ACCESS = "member_access"
+    INDEX_ACCESS = "index_access"
+    NEW_OBJECT = "new_object"
     LITERAL = "literal"
     PARAMETER = "parameter"
+    ERROR = "error"
 
 
-@dataclass
+# Позиции и диапазоны разделяются узлами (бинарная операция и ее
+# операнды), поэтому на месте не изменяются - только заменяются
+@dataclass(slots=True)
 class Position:
     line: int
     column: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Range:
     start: Position
     end: Position
 
 
 class ASTNode:
+    """
+    Базовый класс узлов. Узлы хранят атрибуты в __slots__ (без __dict__
+    на экземпляр): в конфигурации их миллионы.
+    """
+
+    __slots__ = ("node_type", "range")
+
     def __init__(self, node_type: NodeType, range: Range = None):
         self.node_type = node_type
         self.range = range
@@ -44,41 +70,180 @@ class ASTNode:
         pass
 
 
+_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+def node_fields(node_class: type) -> Tuple[str, ...]:
+    """Имена атрибутов узлов класса node_class (слоты всей иерархии)"""
+    fields = _FIELDS.get(node_class)
+    if fields is None:
+        fields = _FIELDS[node_class] = tuple(
+            name
+            for cls in reversed(node_class.__mro__)
+            for name in cls.__dict__.get("__slots__", ())
+        )
+    return fields
+
+
 class ModuleNode(ASTNode):
+    __slots__ = ("name", "variables", "functions", "procedures", "body",
+                 "errors", "source", "_trivia", "_regions",
+                 "_module_index")
+
     def __init__(self, name: str):
         super().__init__(NodeType.MODULE)
         self.name = name
         self.variables: List["VariableNode"] = []
         self.functions: List["FunctionNode"] = []
         self.procedures: List["ProcedureNode"] = []
+        self.body: List[ASTNode] = []  # операторы основной программы модуля
+        self.errors: List["ErrorNode"] = []  # синтаксические ошибки
+        # Исходный текст: один на модуль, общий для правил и отчета
+        self.source: Optional[SourceText] = None
+        self._trivia: Optional[TriviaTable] = None
+        self._regions: Optional[RegionNode] = None
+        self._module_index: Optional[ModuleIndex] = None
+
+    @property
+    def source_file(self) -> Optional[str]:
+        return self.source.path if self.source is not None else None
+
+    @property
+    def trivia(self) -> Optional[TriviaTable]:
+        """
+        Комментарии, пустые строки, области и директивы модуля.
+        Встроенный парсер заполняет таблицу при разборе; для других
+        бэкендов она строится по source при первом обращении.
+        """
+        if self._trivia is None and self.source is not None:
+            from .trivia import build_trivia
+            self._trivia = build_trivia(self.source.text)
+        return self._trivia
+
+    @trivia.setter
+    def trivia(self, table: Optional[TriviaTable]):
+        self._trivia = table
+        self._regions = None
+
+    @property
+    def regions(self) -> Optional[RegionNode]:
+        """
+        Дерево областей (#Область) и ветвей препроцессора (#Если)
+        с диапазонами строк; строится по trivia при первом обращении.
+        """
+        if self._regions is None and self.trivia is not None:
+            from .regions import build_region_tree
+            self._regions = build_region_tree(self.trivia)
+        return self._regions
+
+    @property
+    def index(self) -> ModuleIndex:
+        """
+        Индекс узлов модуля (по видам, именам и строкам); строится при
+        первом обращении. После изменения дерева сбрасывается
+        присваиванием module.index = None.
+        """
+        index = self._module_index
+        if index is None:
+            from .module_index import build_module_index
+            index = self._module_index = build_module_index(self)
+        return index
+
+    @index.setter
+    def index(self, index: Optional[ModuleIndex]):
+        self._module_index = index
+
+    def methods_in_region(self, name: str) -> List["MethodNode"]:
+        """Процедуры и функции внутри области name, в порядке текста"""
+        region = self.regions.find(name) if self.regions else None
+        if region is None:
+            return []
+        methods = [m for m in self.procedures + self.functions
+                   if region.contains(m)]
+        methods.sort(key=lambda m: m.range.start.line)
+        return methods
 
     def accept(self, visitor: ASTVisitor):
         visitor.visit_module(self)
 
 
-class FunctionNode(ASTNode):
-    def __init__(self, name: str):
-        super().__init__(NodeType.FUNCTION)
+class MethodNode(ASTNode):
+    """
+    Общая часть процедур и функций.
+
+    Тело может быть ленивым: парсер задает загрузчик через
+    set_body_loader, и операторы строятся при первом обращении к body.
+    Правила, которым нужны только сигнатуры, тело не затрагивают.
+    """
+
+    __slots__ = ("name", "is_export", "parameters", "_body", "_body_loader")
+
+    def __init__(self, node_type: NodeType, name: str):
+        super().__init__(node_type)
         self.name = name
+        self.is_export = False
         self.parameters: List["ParameterNode"] = []
-        self.body: List[ASTNode] = []
+        self._body: List[ASTNode] = []
+        self._body_loader: Optional[Callable[[], List[ASTNode]]] = None
+
+    @property
+    def body(self) -> List[ASTNode]:
+        if self._body_loader is not None:
+            # Загрузчик снимается только после успешного разбора: тело,
+            # прерванное по сроку, строится заново при следующем
+            # обращении
+            self._body = self._body_loader()
+            self._body_loader = None
+        return self._body
+
+    @body.setter
+    def body(self, statements: List[ASTNode]):
+        self._body_loader = None
+        self._body = statements
+
+    @property
+    def body_loaded(self) -> bool:
+        """False - тело еще не разбиралось"""
+        return self._body_loader is None
+
+    def set_body_loader(self, loader: Callable[[], List[ASTNode]]):
+        """Откладывает построение тела до первого обращения к body"""
+        self._body_loader = loader
+
+    def __getstate__(self):
+        # Загрузчик ссылается на парсер и не сериализуется: перед
+        # передачей в другой процесс тело строится. Состояние - как
+        # у объектов со __slots__ по умолчанию: (None, слоты)
+        self.body
+        return None, {
+            name: getattr(self, name)
+            for name in node_fields(type(self)) if hasattr(self, name)
+        }
+
+
+class FunctionNode(MethodNode):
+    __slots__ = ()
+
+    def __init__(self, name: str):
+        super().__init__(NodeType.FUNCTION, name)
 
     def accept(self, visitor: ASTVisitor):
         visitor.visit_function(self)
 
 
-class ProcedureNode(ASTNode):
+class ProcedureNode(MethodNode):
+    __slots__ = ()
+
     def __init__(self, name: str):
-        super().__init__(NodeType.PROCEDURE)
-        self.name = name
-        self.parameters: List["ParameterNode"] = []
-        self.body: List[ASTNode] = []
+        super().__init__(NodeType.PROCEDURE, name)
 
     def accept(self, visitor: ASTVisitor):
         visitor.visit_procedure(self)
 
 
 class ParameterNode(ASTNode):
+    __slots__ = ("name", "by_value", "has_default_value", "default_value")
+
     def __init__(
         self, name: str, by_value: bool = False,
         has_default_value: bool = False
@@ -87,12 +252,15 @@ class ParameterNode(ASTNode):
         self.name = name
         self.by_value = by_value
         self.has_default_value = has_default_value
+        self.default_value = None  # выражение значения по умолчанию
         
     def accept(self, visitor: ASTVisitor):
         visitor.visit_parameter(self)
 
 
 class VariableNode(ASTNode):
+    __slots__ = ("name", "is_export")
+
     def __init__(self, name: str, is_export: bool = False):
         super().__init__(NodeType.VARIABLE)
         self.name = name
@@ -105,6 +273,8 @@ class VariableNode(ASTNode):
 class ExpressionNode(ASTNode):
     """Базовый класс для выражений"""
 
+    __slots__ = ()
+
     def __init__(self, node_type: NodeType):
         super().__init__(node_type)
 
@@ -112,6 +282,8 @@ class ExpressionNode(ASTNode):
 class BinaryOperationNode(ExpressionNode):
     """Бинарная операция (a + b, a > b, и т.д.)"""
 
+    __slots__ = ("operator", "left", "right")
+
     def __init__(self, operator: str, left: ASTNode, right: ASTNode):
         super().__init__(NodeType.BINARY_OPERATION)
         self.operator = operator
@@ -125,6 +297,8 @@ class BinaryOperationNode(ExpressionNode):
 class LiteralNode(ExpressionNode):
     """Литерал (число, строка, булево значение)"""
 
+    __slots__ = ("value", "literal_type")
+
     def __init__(self, value: any, literal_type: str):
         super().__init__(NodeType.LITERAL)
         self.value = value
@@ -137,6 +311,8 @@ class LiteralNode(ExpressionNode):
 class IfStatementNode(ASTNode):
     """Оператор Если"""
 
+    __slots__ = ("condition", "then_branch", "else_branch", "elif_branches")
+
     def __init__(self):
         super().__init__(NodeType.IF_STATEMENT)
         self.condition = None  # условие
@@ -151,6 +327,8 @@ class IfStatementNode(ASTNode):
 class WhileLoopNode(ASTNode):
     """Цикл Пока"""
 
+    __slots__ = ("condition", "body")
+
     def __init__(self):
         super().__init__(NodeType.WHILE_LOOP)
         self.condition = None  # условие
@@ -163,6 +341,8 @@ class WhileLoopNode(ASTNode):
 class ReturnStatementNode(ASTNode):
     """Оператор Возврат"""
 
+    __slots__ = ("expression",)
+
     def __init__(self):
         super().__init__(NodeType.RETURN_STATEMENT)
         self.expression = None  # выражение (может быть None)
@@ -173,7 +353,181 @@ class ReturnStatementNode(ASTNode):
 
 class AssignmentNode(ASTNode):
     """Узел присваивания"""
+
+    __slots__ = ("left", "right")
+
     def __init__(self, left: ASTNode, right: ASTNode, range: Range = None):
         super().__init__(NodeType.ASSIGNMENT, range)
         self.left = left  
         self.right = right
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_assignment(self)
+
+
+class UnaryOperationNode(ExpressionNode):
+    """Унарная операция (-a, Не a, Ждать a)"""
+
+    __slots__ = ("operator", "operand")
+
+    def __init__(self, operator: str, operand: ASTNode):
+        super().__init__(NodeType.UNARY_OPERATION)
+        self.operator = operator
+        self.operand = operand
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_unary_operation(self)
+
+
+class FunctionCallNode(ExpressionNode):
+    """Вызов процедуры, функции или метода объекта (target)"""
+
+    __slots__ = ("name", "arguments", "target")
+
+    def __init__(self, name: str, arguments: List[ASTNode] = None,
+                 target: ASTNode = None):
+        super().__init__(NodeType.FUNCTION_CALL)
+        self.name = name
+        self.arguments = arguments if arguments is not None else []
+        self.target = target  # объект, у которого вызывается метод
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_function_call(self)
+
+
+class MemberAccessNode(ExpressionNode):
+    """Обращение к свойству объекта (Объект.Свойство)"""
+
+    __slots__ = ("target", "member")
+
+    def __init__(self, target: ASTNode, member: str):
+        super().__init__(NodeType.MEMBER_ACCESS)
+        self.target = target
+        self.member = member
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_member_access(self)
+
+
+class IndexAccessNode(ExpressionNode):
+    """Обращение по индексу (Массив[0], Структура["Ключ"])"""
+
+    __slots__ = ("target", "index")
+
+    def __init__(self, target: ASTNode, index: ASTNode):
+        super().__init__(NodeType.INDEX_ACCESS)
+        self.target = target
+        self.index = index
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_index_access(self)
+
+
+class NewObjectNode(ExpressionNode):
+    """Конструктор Новый ТипОбъекта(Параметры)"""
+
+    __slots__ = ("type_name", "arguments")
+
+    def __init__(self, type_name: str, arguments: List[ASTNode] = None):
+        super().__init__(NodeType.NEW_OBJECT)
+        self.type_name = type_name
+        self.arguments = arguments if arguments is not None else []
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_new_object(self)
+
+
+class ForLoopNode(ASTNode):
+    """Цикл Для Счетчик = Начало По Конец"""
+
+    __slots__ = ("variable", "start", "end", "body")
+
+    def __init__(self):
+        super().__init__(NodeType.FOR_LOOP)
+        self.variable = None  # счетчик цикла
+        self.start = None  # начальное значение
+        self.end = None  # конечное значение
+        self.body = []  # тело цикла
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_for_loop(self)
+
+
+class ForEachLoopNode(ASTNode):
+    """Цикл Для Каждого Элемент Из Коллекция"""
+
+    __slots__ = ("variable", "collection", "body")
+
+    def __init__(self):
+        super().__init__(NodeType.FOR_EACH_LOOP)
+        self.variable = None  # элемент коллекции
+        self.collection = None  # обходимая коллекция
+        self.body = []  # тело цикла
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_for_each_loop(self)
+
+
+class TryStatementNode(ASTNode):
+    """Оператор Попытка ... Исключение ... КонецПопытки"""
+
+    __slots__ = ("try_body", "except_body")
+
+    def __init__(self):
+        super().__init__(NodeType.TRY_STATEMENT)
+        self.try_body = []  # операторы в Попытка
+        self.except_body = []  # операторы в Исключение
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_try_statement(self)
+
+
+class RaiseStatementNode(ASTNode):
+    """Оператор ВызватьИсключение"""
+
+    __slots__ = ("expression", "arguments")
+
+    def __init__(self):
+        super().__init__(NodeType.RAISE_STATEMENT)
+        self.expression = None  # текст (None в расширенной форме)
+        self.arguments = []  # параметры расширенной формы
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_raise_statement(self)
+
+
+class BreakStatementNode(ASTNode):
+    """Оператор Прервать"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(NodeType.BREAK_STATEMENT)
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_break_statement(self)
+
+
+class ContinueStatementNode(ASTNode):
+    """Оператор Продолжить"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(NodeType.CONTINUE_STATEMENT)
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_continue_statement(self)
+
+
+class ErrorNode(ASTNode):
+    """Фрагмент, который не удалось разобрать (синтаксическая ошибка)"""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message: str, range: Range = None):
+        super().__init__(NodeType.ERROR, range)
+        self.message = message
+
+    def accept(self, visitor: ASTVisitor):
+        visitor.visit_error(self)
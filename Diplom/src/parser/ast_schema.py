@@ -0,0 +1,121 @@
+from typing import Any
+
+from .ast_nodes import (
+    AssignmentNode, BinaryOperationNode, BreakStatementNode,
+    ContinueStatementNode, ErrorNode, ForEachLoopNode, ForLoopNode,
+    FunctionCallNode, FunctionNode, IfStatementNode, IndexAccessNode,
+    LiteralNode, MemberAccessNode, ModuleNode, NewObjectNode, NodeType,
+    ParameterNode, ProcedureNode, RaiseStatementNode, ReturnStatementNode,
+    TryStatementNode, UnaryOperationNode, VariableNode, WhileLoopNode,
+)
+
+# Схема узлов: дочерние, строковые и булевы поля классов, номера видов
+# и ролей. Общая для плоского хранилища (flat_ast), двоичного формата
+# (ast_codec), индекса модуля и структурных хешей - все они обходят
+# узлы в одном порядке.
+
+# Поля с дочерними узлами по классам, в порядке обхода
+NODE_CHILDREN = {
+    ModuleNode: ("variables", "functions", "procedures", "body", "errors"),
+    FunctionNode: ("parameters", "body"),
+    ProcedureNode: ("parameters", "body"),
+    ParameterNode: ("default_value",),
+    VariableNode: (),
+    BinaryOperationNode: ("left", "right"),
+    LiteralNode: (),
+    IfStatementNode: ("condition", "then_branch", "elif_branches",
+                      "else_branch"),
+    WhileLoopNode: ("condition", "body"),
+    ReturnStatementNode: ("expression",),
+    AssignmentNode: ("left", "right"),
+    UnaryOperationNode: ("operand",),
+    FunctionCallNode: ("target", "arguments"),
+    MemberAccessNode: ("target",),
+    IndexAccessNode: ("target", "index"),
+    NewObjectNode: ("arguments",),
+    ForLoopNode: ("variable", "start", "end", "body"),
+    ForEachLoopNode: ("variable", "collection", "body"),
+    TryStatementNode: ("try_body", "except_body"),
+    RaiseStatementNode: ("expression", "arguments"),
+    BreakStatementNode: (),
+    ContinueStatementNode: (),
+    ErrorNode: (),
+}
+# Поля-списки; остальные дочерние поля - один узел или None
+LIST_FIELDS = {
+    "variables", "functions", "procedures", "body", "errors", "parameters",
+    "then_branch", "else_branch", "arguments", "try_body", "except_body",
+}
+# Строковый атрибут узла, который хранится в колонке names
+TEXT_FIELDS = {
+    ModuleNode: "name", FunctionNode: "name", ProcedureNode: "name",
+    ParameterNode: "name", VariableNode: "name", FunctionCallNode: "name",
+    BinaryOperationNode: "operator", UnaryOperationNode: "operator",
+    MemberAccessNode: "member", NewObjectNode: "type_name",
+    ErrorNode: "message", LiteralNode: "literal_type",
+}
+# Булевы атрибуты - биты колонки flags
+FLAGS = (("is_export", 1), ("by_value", 2), ("has_default_value", 4))
+
+KINDS = tuple(NodeType)
+KIND_IDS = {kind: index for index, kind in enumerate(KINDS)}
+NODE_TYPES = {
+    ModuleNode: NodeType.MODULE, FunctionNode: NodeType.FUNCTION,
+    ProcedureNode: NodeType.PROCEDURE, ParameterNode: NodeType.PARAMETER,
+    VariableNode: NodeType.VARIABLE,
+    BinaryOperationNode: NodeType.BINARY_OPERATION,
+    LiteralNode: NodeType.LITERAL, IfStatementNode: NodeType.IF_STATEMENT,
+    WhileLoopNode: NodeType.WHILE_LOOP,
+    ReturnStatementNode: NodeType.RETURN_STATEMENT,
+    AssignmentNode: NodeType.ASSIGNMENT,
+    UnaryOperationNode: NodeType.UNARY_OPERATION,
+    FunctionCallNode: NodeType.FUNCTION_CALL,
+    MemberAccessNode: NodeType.MEMBER_ACCESS,
+    IndexAccessNode: NodeType.INDEX_ACCESS,
+    NewObjectNode: NodeType.NEW_OBJECT, ForLoopNode: NodeType.FOR_LOOP,
+    ForEachLoopNode: NodeType.FOR_EACH_LOOP,
+    TryStatementNode: NodeType.TRY_STATEMENT,
+    RaiseStatementNode: NodeType.RAISE_STATEMENT,
+    BreakStatementNode: NodeType.BREAK_STATEMENT,
+    ContinueStatementNode: NodeType.CONTINUE_STATEMENT,
+    ErrorNode: NodeType.ERROR,
+}
+
+# Роль узла - поле родителя, в котором он лежит. Ветка ИначеЕсли
+# хранится как узел-условие (elif_condition) и идущие за ним
+# операторы (elif_body).
+ROLES = ("", "variables", "functions", "procedures", "body", "errors",
+         "parameters", "default_value", "left", "right", "condition",
+         "then_branch", "elif_condition", "elif_body", "else_branch",
+         "expression", "operand", "target", "arguments", "index",
+         "variable", "start", "end", "collection", "try_body",
+         "except_body")
+ROLE_IDS = {role: index for index, role in enumerate(ROLES)}
+ELIF_CONDITION = ROLE_IDS["elif_condition"]
+ELIF_BODY = ROLE_IDS["elif_body"]
+
+
+# Значение литерала в текстовом виде: тег типа и текст
+def encode_constant(value: Any) -> str:
+    if value is None:
+        return "n"
+    if isinstance(value, bool):
+        return "b1" if value else "b0"
+    if isinstance(value, int):
+        return "i" + str(value)
+    if isinstance(value, float):
+        return "f" + repr(value)
+    return "s" + str(value)
+
+
+def decode_constant(text: str) -> Any:
+    tag, rest = text[0], text[1:]
+    if tag == "n":
+        return None
+    if tag == "b":
+        return rest == "1"
+    if tag == "i":
+        return int(rest)
+    if tag == "f":
+        return float(rest)
+    return rest
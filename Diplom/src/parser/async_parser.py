@@ -0,0 +1,183 @@
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List
+from .backend import BatchParseResult
+from .ast_nodes import ModuleNode
+from .bsl_daemon import BSLServerError
+from .bsl_parser import analyze_command
+from .budget import ParseTimeoutError
+from .json_converter import JsonAstConverter
+from .json_stream import decode_json
+from .source import SourceText, load_source
+
+# Таймаут не передан - берется таймаут парсера (None - без ограничения)
+_DEFAULT_TIMEOUT = object()
+
+
+class AsyncBSLParser:
+    """
+    Асинхронный парсер языка 1С через BSL Language Server.
+
+    Каждый вызов запускает отдельный процесс analyze через
+    asyncio.create_subprocess_exec, поэтому один цикл событий может
+    держать занятыми несколько процессов BSL LS одновременно (REST API,
+    пакетная обработка). Число одновременно запущенных процессов
+    ограничено семафором max_concurrency.
+
+    parse_string передает текст через временный файл; stdin_input=True -
+    через stdin, с переходом на временный файл, если эта сборка BSL LS
+    stdin не читает (как в BSLParser).
+
+    При истечении таймаута или отмене задачи процесс BSL LS
+    принудительно завершается; таймаут поднимает ParseTimeoutError,
+    ошибка BSL LS - BSLServerError.
+    """
+
+    name = "bsl-ls-async"
+
+    def __init__(self, jar_path: str, max_concurrency: int = 4,
+                 timeout: float = 30, lazy_bodies: bool = False,
+                 stdin_input: bool = False):
+        """
+        timeout - таймаут одного запуска BSL LS по умолчанию, секунды
+        (None - без ограничения); можно переопределить в каждом вызове,
+        в том числе отключить ограничение через timeout=None.
+        """
+        self.jar_path = Path(jar_path)
+        self.timeout = timeout
+        self.lazy_bodies = lazy_bodies
+        self.stdin_input = stdin_input
+        if not self.jar_path.exists():
+            raise FileNotFoundError(f"JAR не найден: {jar_path}")
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def parse_string(self, code: str, module_name: str = "module.bsl",
+                           timeout: float = _DEFAULT_TIMEOUT) -> ModuleNode:
+        """Парсит текст модуля (через временный файл или stdin)"""
+        if self.stdin_input:
+            try:
+                module = await self._run_analyze(
+                    "-", module_name, code.encode("utf-8"), timeout
+                )
+            except BSLServerError:
+                module = await self._parse_temp_file(code, module_name,
+                                                     timeout)
+                # Через файл получилось - эта сборка не читает stdin
+                self.stdin_input = False
+        else:
+            module = await self._parse_temp_file(code, module_name, timeout)
+        module.source = SourceText(code)
+        return module
+
+    async def _parse_temp_file(self, code: str, module_name: str,
+                               timeout: float) -> ModuleNode:
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".bsl", encoding="utf-8", delete=False
+        ) as tmp:
+            tmp.write(code)
+            tmp_path = tmp.name
+        try:
+            return await self._run_analyze(tmp_path, module_name, None,
+                                           timeout)
+        finally:
+            os.unlink(tmp_path)
+
+    async def parse_file(self, file_path: str,
+                         timeout: float = _DEFAULT_TIMEOUT) -> ModuleNode:
+        """Парсит файл .bsl, передавая путь в BSL LS без копирования"""
+        module = await self._run_analyze(file_path, file_path, None, timeout)
+        module.source = load_source(file_path)
+        return module
+
+    async def parse_directory(
+        self, directory: str, timeout: float = _DEFAULT_TIMEOUT
+    ) -> BatchParseResult:
+        """Парсит все файлы .bsl в каталоге (рекурсивно)"""
+        files = sorted(str(p) for p in Path(directory).rglob("*.bsl"))
+        return await self.parse_many(files, timeout)
+
+    async def parse_many(
+        self, file_paths: Iterable[str], timeout: float = _DEFAULT_TIMEOUT
+    ) -> BatchParseResult:
+        """
+        Парсит набор файлов параллельно (не более max_concurrency
+        процессов). Ошибка в отдельном файле попадает в result.errors
+        и не прерывает обработку остальных; отмена parse_many
+        отменяет и завершает все запущенные процессы.
+        """
+        file_paths: List[str] = list(file_paths)
+        outcomes = await asyncio.gather(
+            *(self.parse_file(path, timeout) for path in file_paths),
+            return_exceptions=True,
+        )
+
+        result = BatchParseResult()
+        for file_path, outcome in zip(file_paths, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            if isinstance(outcome, BaseException):
+                result.errors[file_path] = str(outcome) or repr(outcome)
+            else:
+                result.modules[file_path] = outcome
+        return result
+
+    async def _run_analyze(self, target: str, module_name: str,
+                           input_data: bytes, timeout: float) -> ModuleNode:
+        """Запускает BSL LS для файла target ("-" - чтение из stdin)"""
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        cmd = analyze_command(self.jar_path, [target])
+
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if input_data is not None
+                else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(input_data), timeout
+                )
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                raise ParseTimeoutError(
+                    f"BSL LS не уложился в {timeout} с: {module_name}"
+                ) from None
+            except BaseException:
+                # Отмена задачи (CancelledError) - процесс не должен
+                # пережить вызвавший его код
+                await self._kill(process)
+                raise
+
+        if process.returncode != 0:
+            raise BSLServerError(
+                f"Ошибка BSL LS: {stderr.decode('utf-8', 'replace')}"
+            )
+
+        # Разбор JSON и построение AST - в пуле потоков, чтобы большой
+        # модуль не останавливал цикл событий
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._convert, stdout, module_name
+        )
+
+    def _convert(self, stdout: bytes, module_name: str) -> ModuleNode:
+        ast_json = decode_json(stdout.decode("utf-8"))
+        return JsonAstConverter(module_name, self.lazy_bodies).convert(
+            ast_json
+        )
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process):
+        """Принудительно завершает процесс и дожидается его выхода"""
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass  # уже завершился
+        # Ожидание не прерывается повторной отменой, иначе останется зомби
+        await asyncio.shield(process.wait())
@@ -0,0 +1,159 @@
+import os
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Sequence
+
+from .ast_nodes import ModuleNode
+from .budget import (
+    ParseBudget, ParseOutcome, ParseStatus, deadline_scope,
+)
+from .incremental import TextEdit, apply_edits
+from .source import SourceText, load_source
+
+
+@dataclass
+class BatchParseResult:
+    """Результат пакетного разбора: модули и ошибки по путям файлов"""
+    modules: Dict[str, ModuleNode] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+class ParserBackend(ABC):
+    """
+    Общий интерфейс бэкендов разбора.
+
+    Бэкенд превращает исходный текст модуля в ModuleNode. Внешний
+    (BSLParser, через BSL Language Server) и встроенный
+    (NativeBSLParser) бэкенды взаимозаменяемы.
+
+    signatures_only=True - дешевый режим: процедуры и функции
+    с параметрами, но без тел. Бэкенд, который его не поддерживает,
+    разбирает модуль полностью.
+    """
+
+    name = ""
+    budget = ParseBudget()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Освобождает ресурсы бэкенда (процессы, файлы)"""
+        pass
+
+    @abstractmethod
+    def parse_string(self, code: str, module_name: str = "module.bsl",
+                     signatures_only: bool = False) -> ModuleNode:
+        """Разбирает текст модуля"""
+
+    def parse_file(self, file_path: str,
+                   signatures_only: bool = False) -> ModuleNode:
+        """Парсит файл .bsl (UTF-8, UTF-16 или cp1251, см. load_source)"""
+        source = load_source(file_path)
+        module = self.parse_string(source.text, file_path, signatures_only)
+        module.source = source
+        return module
+
+    def reparse(self, module: ModuleNode,
+                edits: Sequence[TextEdit]) -> ModuleNode:
+        """
+        Разбор модуля после правок edits (диапазоны - в тексте
+        module.source). Здесь - полный разбор нового текста; бэкенды,
+        умеющие разбирать только измененные методы, переопределяют метод.
+        """
+        if module.source is None:
+            raise ValueError(f"У модуля {module.name} нет исходного текста")
+        text, _ = apply_edits(module.source.text, edits, module.source)
+        return self._parse_edited(module, text)
+
+    def _parse_edited(self, module: ModuleNode, text: str) -> ModuleNode:
+        new_module = self.parse_string(text, module.name)
+        new_module.source = SourceText(
+            text, module.source.path, module.source.encoding
+        )
+        return new_module
+
+    def parse_directory(self, directory: str,
+                        chunk_size: int = 200) -> BatchParseResult:
+        """Парсит все файлы .bsl в каталоге (рекурсивно)"""
+        files = sorted(str(p) for p in Path(directory).rglob("*.bsl"))
+        return self.parse_many(files, chunk_size)
+
+    def parse_many(self, file_paths: Iterable[str],
+                   chunk_size: int = 200) -> BatchParseResult:
+        """
+        Парсит набор файлов. Ошибка в отдельном файле попадает
+        в result.errors и не прерывает обработку остальных.
+        """
+        result = BatchParseResult()
+        for file_path in file_paths:
+            try:
+                result.modules[file_path] = self.parse_file(file_path)
+            except Exception as e:
+                result.errors[file_path] = str(e)
+        return result
+
+    def parse_outcome(self, file_path: str) -> ParseOutcome:
+        """
+        Разбирает файл в пределах self.budget и никогда не поднимает
+        исключение: результат и причина неудачи - в ParseOutcome.
+
+        Ленивые тела методов строятся здесь же и в пределах того же
+        срока. Если он истек на одном из тел, module - модуль
+        с неразобранными телами (TIMED_OUT, частичный результат).
+        """
+        outcome = ParseOutcome(file_path, ParseStatus.FAILED)
+        started = time.perf_counter()
+
+        try:
+            with deadline_scope(self.budget.timeout):
+                outcome.size = os.path.getsize(file_path)
+                outcome.signatures_only = self.budget.over_size(
+                    outcome.size
+                )
+                outcome.module = self.parse_file(
+                    file_path, outcome.signatures_only
+                )
+                # Ошибки ленивых тел попадают в module.errors при первом
+                # обращении к body - статус считается после их разбора
+                for method in outcome.module.functions:
+                    method.body
+                for method in outcome.module.procedures:
+                    method.body
+        except (TimeoutError, subprocess.TimeoutExpired) as e:
+            outcome.status = ParseStatus.TIMED_OUT
+            outcome.error = str(e)
+            # Бэкенд мог вернуть то, что успел разобрать; истечение
+            # срока на ленивом теле оставляет уже построенный модуль
+            outcome.module = getattr(e, "module", None) or outcome.module
+        except Exception as e:
+            outcome.error = str(e) or type(e).__name__
+        else:
+            if outcome.signatures_only:
+                outcome.status = ParseStatus.DEGRADED
+                outcome.error = (
+                    f"Модуль больше {self.budget.max_bytes} байт: "
+                    f"разобраны только сигнатуры"
+                )
+            elif outcome.module.errors:
+                outcome.status = ParseStatus.DEGRADED
+                outcome.error = (
+                    f"Синтаксических ошибок: {len(outcome.module.errors)}"
+                )
+            else:
+                outcome.status = ParseStatus.OK
+
+        outcome.seconds = time.perf_counter() - started
+        return outcome
+
+    def iter_outcomes(self,
+                      file_paths: Iterable[str]) -> Iterator[ParseOutcome]:
+        """parse_outcome для каждого файла по очереди"""
+        for file_path in file_paths:
+            yield self.parse_outcome(file_path)
@@ -0,0 +1,260 @@
+import json
+import subprocess
+import threading
+import queue
+from collections import deque
+from typing import List, Optional
+from .budget import ParseTimeoutError
+from .json_stream import JsonDepthError, decode_json
+
+
+class BSLServerError(Exception):
+    """Ошибка взаимодействия с процессом BSL Language Server"""
+
+
+class BSLServerBusyError(BSLServerError):
+    """Очередь запросов к серверу переполнена"""
+
+
+class BSLServerTimeoutError(BSLServerError, ParseTimeoutError):
+    """Сервер не ответил за отведенное время"""
+
+
+class BSLServerDaemon:
+    """
+    Долгоживущий процесс BSL Language Server.
+
+    JVM запускается один раз и обслуживает запросы через stdin/stdout.
+    Протокол построчный: каждый запрос и ответ - один JSON-объект
+    на отдельной строке.
+
+    Запрос:  {"id": 1, "method": "parse",
+              "params": {"name": "module.bsl", "source": "..."}}
+             (вместо "source" может передаваться "path" к файлу)
+    Ответ:   {"id": 1, "result": {"module": {...}}}
+             {"id": 1, "error": "текст ошибки"}
+
+    Метод "ping" используется для проверки работоспособности.
+
+    Протокол - допущение проекта, а не интерфейс BSL LS: сам BSL LS
+    предоставляет режим lsp (Language Server Protocol) и пакетный
+    analyze, режима "server --format json" у него нет. Команда должна
+    запускать обертку над BSL LS, которая отвечает по этому протоколу
+    (см. command и daemon_command у BSLParser). Поведение демона
+    проверяется с заменителем сервера tests/fake_bsl_ls.py.
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        request_timeout: float = 30.0,
+        startup_timeout: float = 60.0,
+        max_queue: int = 16,
+        max_restarts: int = 3,
+    ):
+        self.command = list(command)
+        self.request_timeout = request_timeout
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue" = queue.Queue()
+        self._stderr_tail = deque(maxlen=50)
+        self._lock = threading.Lock()  # один запрос в канале за раз
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._next_id = 0
+        self._restarts = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Управление процессом
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Запускает процесс и ждет, пока он начнет отвечать на ping"""
+        with self._lock:
+            if not self.is_alive():
+                try:
+                    self._spawn()
+                except _ServerCrashed as e:
+                    self._kill()
+                    raise BSLServerError(
+                        f"BSL LS завершился при запуске: {e}"
+                    ) from None
+
+    def stop(self):
+        """Останавливает процесс"""
+        with self._lock:
+            self._kill()
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def ping(self, timeout: float = None) -> bool:
+        """Проверка работоспособности: сервер должен ответить на ping"""
+        try:
+            self.request("ping", {}, timeout=timeout)
+            return True
+        except BSLServerError:
+            return False
+
+    def _spawn(self):
+        try:
+            self._process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+            )
+        except OSError as e:
+            raise BSLServerError(f"Не удалось запустить BSL LS: {e}")
+
+        # Каждому процессу - своя очередь ответов, чтобы поток чтения
+        # упавшего процесса не смешивал ответы с новым
+        self._responses = queue.Queue()
+        self._stderr_tail.clear()
+        threading.Thread(
+            target=self._read_stdout,
+            args=(self._process, self._responses),
+            daemon=True,
+        ).start()
+        threading.Thread(
+            target=self._read_stderr, args=(self._process,), daemon=True
+        ).start()
+
+        self._call("ping", {}, self.startup_timeout)
+
+    def _kill(self):
+        process = self._process
+        self._process = None
+        if process is None:
+            return
+        try:
+            if process.poll() is None:
+                process.stdin.close()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        except OSError:
+            process.kill()
+
+    def _read_stdout(self, process: subprocess.Popen, responses: queue.Queue):
+        for line in process.stdout:
+            line = line.strip()
+            if line:
+                responses.put(line)
+        responses.put(None)  # процесс завершился
+
+    def _read_stderr(self, process: subprocess.Popen):
+        for line in process.stderr:
+            self._stderr_tail.append(line.rstrip())
+
+    # ------------------------------------------------------------------
+    # Запросы
+    # ------------------------------------------------------------------
+
+    def parse(self, code: str, module_name: str) -> dict:
+        """Отправляет модуль на разбор и возвращает JSON-ответ BSL LS"""
+        return self.request(
+            "parse", {"name": module_name, "source": code}
+        )
+
+    def parse_file(self, file_path: str, module_name: str) -> dict:
+        """Передает серверу путь к файлу - он читает его сам"""
+        return self.request(
+            "parse", {"name": module_name, "path": str(file_path)}
+        )
+
+    def request(self, method: str, params: dict,
+                timeout: float = None) -> dict:
+        """
+        Выполняет запрос к серверу.
+
+        Число ожидающих запросов ограничено max_queue: при переполнении
+        очереди поднимается BSLServerBusyError. Если процесс упал,
+        он перезапускается (не более max_restarts раз подряд).
+        """
+        timeout = self.request_timeout if timeout is None else timeout
+
+        if not self._slots.acquire(timeout=timeout):
+            raise BSLServerBusyError("Очередь запросов к BSL LS переполнена")
+
+        try:
+            with self._lock:
+                return self._request_with_restart(method, params, timeout)
+        finally:
+            self._slots.release()
+
+    def _request_with_restart(self, method: str, params: dict,
+                              timeout: float) -> dict:
+        while True:
+            try:
+                if not self.is_alive():
+                    self._spawn()
+                result = self._call(method, params, timeout)
+                self._restarts = 0
+                return result
+            except _ServerCrashed as e:
+                self._kill()
+                if self._restarts >= self.max_restarts:
+                    raise BSLServerError(
+                        f"BSL LS завершился аварийно: {e}"
+                    ) from None
+                self._restarts += 1
+
+    def _call(self, method: str, params: dict, timeout: float):
+        self._next_id += 1
+        request_id = self._next_id
+        message = json.dumps(
+            {"id": request_id, "method": method, "params": params},
+            ensure_ascii=False,
+        )
+
+        try:
+            self._process.stdin.write(message + "\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise _ServerCrashed(str(e))
+
+        while True:
+            try:
+                line = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                # Зависший процесс убиваем, следующий запрос запустит новый
+                self._kill()
+                raise BSLServerTimeoutError(
+                    f"BSL LS не ответил за {timeout} с"
+                ) from None
+
+            if line is None:
+                raise _ServerCrashed("\n".join(self._stderr_tail))
+
+            try:
+                response = decode_json(line)
+            except JsonDepthError as e:
+                raise BSLServerError(f"Ошибка разбора ответа BSL LS: {e}")
+            except json.JSONDecodeError:
+                continue  # посторонний вывод в stdout
+
+            # Ответы на запросы, по которым истек таймаут, пропускаем
+            if response.get("id") != request_id:
+                continue
+
+            if "error" in response:
+                raise BSLServerError(f"Ошибка BSL LS: {response['error']}")
+            return response.get("result")
+
+
+class _ServerCrashed(Exception):
+    """Процесс завершился или закрыл канал во время запроса"""
@@ -0,0 +1,167 @@
+import re
+from typing import Iterator, Tuple
+
+# Виды токенов (целые числа - токены остаются компактными кортежами)
+NAME = 1
+KEYWORD = 2
+NUMBER = 3
+STRING = 4
+DATE = 5
+OPERATOR = 6
+PUNCT = 7
+COMMENT = 8
+PREPROCESSOR = 9
+ANNOTATION = 10
+LABEL = 11
+ERROR = 12
+
+KIND_NAMES = {
+    NAME: "name",
+    KEYWORD: "keyword",
+    NUMBER: "number",
+    STRING: "string",
+    DATE: "date",
+    OPERATOR: "operator",
+    PUNCT: "punct",
+    COMMENT: "comment",
+    PREPROCESSOR: "preprocessor",
+    ANNOTATION: "annotation",
+    LABEL: "label",
+    ERROR: "error",
+}
+
+# Токен: (вид, значение, начало, конец, строка, колонка)
+# Смещения - в символах исходного текста, строки и колонки с 1.
+# Для ключевых слов значение - каноническое английское имя
+# в нижнем регистре ("procedure", "endif"), для остальных - текст.
+Token = Tuple[int, str, int, int, int, int]
+
+# Ключевые слова: русское и английское написание -> каноническое имя
+_KEYWORD_PAIRS = [
+    ("Процедура", "Procedure"),
+    ("КонецПроцедуры", "EndProcedure"),
+    ("Функция", "Function"),
+    ("КонецФункции", "EndFunction"),
+    ("Перем", "Var"),
+    ("Экспорт", "Export"),
+    ("Знач", "Val"),
+    ("Если", "If"),
+    ("Тогда", "Then"),
+    ("ИначеЕсли", "ElsIf"),
+    ("Иначе", "Else"),
+    ("КонецЕсли", "EndIf"),
+    ("Для", "For"),
+    ("Каждого", "Each"),
+    ("Из", "In"),
+    ("По", "To"),
+    ("Цикл", "Do"),
+    ("КонецЦикла", "EndDo"),
+    ("Пока", "While"),
+    ("Попытка", "Try"),
+    ("Исключение", "Except"),
+    ("КонецПопытки", "EndTry"),
+    ("ВызватьИсключение", "Raise"),
+    ("Возврат", "Return"),
+    ("Продолжить", "Continue"),
+    ("Прервать", "Break"),
+    ("Перейти", "Goto"),
+    ("Новый", "New"),
+    ("И", "And"),
+    ("Или", "Or"),
+    ("Не", "Not"),
+    ("Истина", "True"),
+    ("Ложь", "False"),
+    ("Неопределено", "Undefined"),
+    ("Null", "Null"),
+    ("Выполнить", "Execute"),
+    ("ДобавитьОбработчик", "AddHandler"),
+    ("УдалитьОбработчик", "RemoveHandler"),
+    ("Асинх", "Async"),
+    ("Ждать", "Await"),
+]
+
+KEYWORDS = {}
+for _ru, _en in _KEYWORD_PAIRS:
+    KEYWORDS[_ru.lower()] = _en.lower()
+    KEYWORDS[_en.lower()] = _en.lower()
+
+# Одно регулярное выражение-альтернатива на весь язык.
+# Номер сработавшей группы (m.lastindex) определяет вид токена.
+_MASTER_PATTERN = re.compile(
+    r"""
+    (\r\n|\n|\r)                                  # 1 перевод строки
+  | ([ \t\f\v\ufeff\xa0]+)                        # 2 пробелы
+  | (//[^\r\n]*)                                  # 3 комментарий
+  | ("(?:[^"\r\n]|""                              # 4 строка, включая
+      |(?:\r?\n|\r)[ \t]*                         #   многострочную с |
+       (?://[^\r\n]*(?:\r?\n|\r)[ \t]*)*\|)*")
+  | ('[^'\r\n]*')                                 # 5 дата
+  | (\d+(?:\.\d+)?)                               # 6 число
+  | ([^\W\d]\w*)                                  # 7 идентификатор
+  | (\#[^\r\n]*)                                  # 8 препроцессор
+  | (&\w+)                                        # 9 директива компиляции
+  | (~\w+)                                        # 10 метка
+  | (<>|<=|>=|[-+*/%=<>])                         # 11 оператор
+  | ([()\[\],;.?:])                               # 12 разделитель
+  | (.)                                           # 13 неизвестный символ
+    """,
+    re.VERBOSE,
+)
+
+_GROUP_KINDS = (
+    None, None, None, COMMENT, STRING, DATE, NUMBER, NAME,
+    PREPROCESSOR, ANNOTATION, LABEL, OPERATOR, PUNCT, ERROR,
+)
+
+
+def tokenize(text: str, comments: bool = True, start: int = 0,
+             end: int = None) -> Iterator[Token]:
+    """
+    Лениво разбивает исходный текст модуля на токены.
+
+    comments=False - пропускать комментарии (препроцессор остается,
+    он нужен для построения областей).
+
+    start, end - разбить только часть текста (например, один метод при
+    инкрементальном разборе); смещения, строки и колонки токенов
+    остаются такими же, как при разбиении всего текста.
+    """
+    line = 1
+    line_start = 0
+    if start:
+        line += text.count("\n", 0, start)
+        line_start = text.rfind("\n", 0, start) + 1
+    keywords = KEYWORDS
+    group_kinds = _GROUP_KINDS
+
+    for m in _MASTER_PATTERN.finditer(text, start,
+                                      len(text) if end is None else end):
+        group = m.lastindex
+
+        if group == 1:
+            line += 1
+            line_start = m.end()
+            continue
+        if group == 2:
+            continue
+
+        kind = group_kinds[group]
+        value = m.group(group)
+        start = m.start()
+
+        if kind == NAME:
+            keyword = keywords.get(value.lower())
+            if keyword is not None:
+                yield (KEYWORD, keyword, start, m.end(),
+                       line, start - line_start + 1)
+                continue
+        elif kind == COMMENT and not comments:
+            continue
+
+        yield (kind, value, start, m.end(), line, start - line_start + 1)
+
+        if kind == STRING and ("\n" in value or "\r" in value):
+            # Многострочная строка: сдвигаем счетчик строк
+            line += value.count("\n") or value.count("\r")
+            last_break = max(value.rfind("\n"), value.rfind("\r"))
+            line_start = start + last_break + 1
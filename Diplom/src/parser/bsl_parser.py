@@ -1,35 +1,110 @@
 import subprocess
-import json
 import tempfile
+import threading
 import os
 from pathlib import Path
-from .ast_nodes import (
-    ModuleNode,
-    FunctionNode,
-    ProcedureNode,
-    VariableNode,
-    ParameterNode,
-    ReturnStatementNode,
-    IfStatementNode,
-    WhileLoopNode,
-    BinaryOperationNode,
-    LiteralNode,
-    ASTNode,
-    NodeType,
-)
-
-
-class BSLParser:
-    """Парсер для языка 1С"""
-
-    def __init__(self, jar_path: str):
+from typing import IO, Callable, Iterable, Iterator, List
+from .backend import BatchParseResult, ParserBackend
+from .bsl_daemon import BSLServerDaemon, BSLServerError
+from .budget import ParseBudget, ParseTimeoutError
+from .ast_nodes import ModuleNode
+from .json_converter import JsonAstConverter
+from .json_stream import decode_json, iter_json_items
+from .source import SourceText, load_source
+
+# Предел длины командной строки Windows - 32767 символов; порция файлов
+# для одного запуска analyze собирается с запасом
+_MAX_COMMAND_LENGTH = 30000
+# Сколько ждать выхода BSL LS, чей вывод не удалось разобрать, секунды
+_EXIT_GRACE = 0.5
+
+
+class BSLParser(ParserBackend):
+    """Парсер для языка 1С (через BSL Language Server)"""
+
+    name = "bsl-ls"
+
+    def __init__(self, jar_path: str, use_daemon: bool = False,
+                 daemon_command: List[str] = None, max_queue: int = 16,
+                 stdin_input: bool = False, stream_json: bool = True,
+                 lazy_bodies: bool = False, budget: ParseBudget = None):
+        """
+        use_daemon - держать один запущенный процесс BSL LS и отправлять
+        ему модули через stdin/stdout вместо запуска JVM на каждый модуль.
+        daemon_command - команда запуска сервера, обязательна при
+        use_daemon. Сервер должен отвечать по построчному протоколу
+        BSLServerDaemon; у BSL LS такого режима нет, нужна обертка
+        (см. bsl_daemon.py).
+        stdin_input - передавать модуль в BSL LS через stdin ("-"
+        вместо пути) без временного файла. Не все сборки BSL LS это
+        умеют, поэтому по умолчанию выключено; если запуск через stdin
+        завершился ошибкой, а через временный файл - успешно, stdin
+        больше не используется.
+        stream_json - разбирать вывод BSL LS по мере поступления,
+        не держа в памяти весь stdout и все дерево JSON сразу.
+        lazy_bodies - преобразовывать тела методов из JSON только при
+        обращении к body (см. JsonAstConverter).
+        budget - ограничения на модуль; по умолчанию 30 секунд на запуск
+        BSL LS. При превышении поднимается ParseTimeoutError, при
+        ошибке BSL LS - BSLServerError.
+        """
+        if use_daemon and not daemon_command:
+            raise ValueError(
+                "use_daemon требует daemon_command: у BSL LS нет режима "
+                "сервера, нужна обертка (см. bsl_daemon.py)"
+            )
         self.jar_path = Path(jar_path)
+        self.stdin_input = stdin_input
+        self.stream_json = stream_json
+        self.lazy_bodies = lazy_bodies
+        self.budget = budget or ParseBudget(timeout=30)
         if not self.jar_path.exists():
             raise FileNotFoundError(f"JAR не найден: {jar_path}")
 
-    def parse_string(self, code: str, 
-                     module_name: str = "module.bsl") -> ModuleNode:
-   
+        self._daemon = None
+        if use_daemon:
+            self._daemon = BSLServerDaemon(
+                daemon_command,
+                request_timeout=self.budget.timeout,
+                max_queue=max_queue,
+            )
+
+    def close(self):
+        """Останавливает процесс BSL LS, если он был запущен"""
+        if self._daemon is not None:
+            self._daemon.stop()
+
+    def parse_string(self, code: str, module_name: str = "module.bsl",
+                     signatures_only: bool = False) -> ModuleNode:
+        module = self._parse_code(code, module_name, signatures_only)
+        module.source = SourceText(code)
+        return module
+
+    def _parse_code(self, code: str, module_name: str,
+                    signatures_only: bool) -> ModuleNode:
+        if self._daemon is not None:
+            # Процесс запускается при первом запросе и далее переиспользуется
+            ast_json = self._daemon.parse(code, module_name)
+            return self._convert_to_ast(ast_json, module_name,
+                                        signatures_only)
+
+        if self.stdin_input:
+            # Исходный текст передается через канал, без временного файла
+            try:
+                return self._run_analyze("-", module_name, input_text=code,
+                                         signatures_only=signatures_only)
+            except BSLServerError:
+                module = self._parse_temp_file(code, module_name,
+                                               signatures_only)
+                # Через файл получилось - эта сборка не читает stdin
+                self.stdin_input = False
+                return module
+
+        return self._parse_temp_file(code, module_name, signatures_only)
+
+    def _parse_temp_file(self, code: str, module_name: str,
+                         signatures_only: bool) -> ModuleNode:
+        """Запасной вариант для сборок BSL LS, которые читают только файлы"""
         with tempfile.NamedTemporaryFile(
             mode="w", suffix=".bsl", encoding="utf-8", delete=False
         ) as tmp:
@@ -37,218 +112,296 @@ class BSLParser:
             tmp_path = tmp.name
 
         try:
-            # Запуск BSL Language Server
-            cmd = [
-                "java",
-                "-jar",
-                str(self.jar_path),
-                "analyze",
-                "--format",
-                "json",
-                tmp_path,
-            ]
-
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=30
-                )
-
-            # Парсинг JSON ответ
-            if result.returncode == 0:
-                ast_json = json.loads(result.stdout)
-                return self._convert_to_ast(ast_json, module_name)
-            else:
-                raise Exception(f"Ошибка BSL LS: {result.stderr}")
-
+            return self._run_analyze(tmp_path, module_name,
+                                     signatures_only=signatures_only)
         finally:
             # Удаление временного файла
             os.unlink(tmp_path)
 
-    def parse_file(self, file_path: str) -> ModuleNode:
-        """Парсит файл .bsl"""
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
-        return self.parse_string(code, file_path)
-
-    def _convert_to_ast(self, bsl_json: dict, name: str) -> ModuleNode:
-        """Преобразует JSON от BSL LS в наше AST"""
-        module = ModuleNode(name)
-
-        try:
-            if not bsl_json or "module" not in bsl_json:
-                print(f"Предупреждение: пустой JSON для модуля {name}")
-                return module
-
-            module_data = bsl_json["module"]
-
-            # 1. ПАРСИМ ПЕРЕМЕННЫЕ
-            if "variables" in module_data:
-                for var_data in module_data["variables"]:
-                    var = VariableNode(
-                        name=var_data.get("name", ""),
-                        is_export=var_data.get("export", False),
-                    )
-                    module.variables.append(var)
-
-            # 2. ПАРСИМ ФУНКЦИИ
-            if "functions" in module_data:
-                for func_data in module_data["functions"]:
-                    func = self._parse_function(func_data)
-                    module.functions.append(func)
-
-            # 3. ПАРСИМ ПРОЦЕДУРЫ
-            if "procedures" in module_data:
-                for proc_data in module_data["procedures"]:
-                    proc = self._parse_procedure(proc_data)
-                    module.procedures.append(proc)
-
-            print(f"Распарсен модуль {name}:")
-            print(f"   - Переменных: {len(module.variables)}")
-            print(f"   - Функций: {len(module.functions)}")
-            print(f"   - Процедур: {len(module.procedures)}")
-
-        except Exception as e:
-            print(f"Ошибка при парсинге AST: {e}")
-            # Возвращаем хотя бы пустой модуль
-            return ModuleNode(name)
+    def parse_file(self, file_path: str,
+                   signatures_only: bool = False) -> ModuleNode:
+        """Парсит файл .bsl, передавая путь в BSL LS без копирования"""
+        if self._daemon is not None:
+            ast_json = self._daemon.parse_file(file_path, file_path)
+            module = self._convert_to_ast(ast_json, file_path,
+                                          signatures_only)
+        else:
+            module = self._run_analyze(file_path, file_path,
+                                       signatures_only=signatures_only)
 
+        # Текст для построчных правил читается один раз, здесь
+        module.source = load_source(file_path)
         return module
 
-    def _parse_function(self, func_data: dict) -> FunctionNode:
-        """Парсит функцию из JSON"""
-        func = FunctionNode(func_data.get("name", "unnamed"))
-
-        # Парсим параметры
-        if "parameters" in func_data:
-            for param_data in func_data["parameters"]:
-                param = ParameterNode(
-                    name=param_data.get("name", ""),
-                    by_value=param_data.get("byValue", False),
-                )
-                func.parameters.append(param)
+    def _run_analyze(self, target: str, module_name: str,
+                     input_text: str = None,
+                     signatures_only: bool = False) -> ModuleNode:
+        """Запускает BSL LS для файла target ("-" - чтение из stdin)"""
+        cmd = self._analyze_command([target])
 
-        # Парсим тело функции
-        if "body" in func_data:
-            func.body = self._parse_statements(func_data["body"])
-
-        return func
+        timeout = self.budget.timeout
+        if self.stream_json:
+            converter = JsonAstConverter(
+                module_name, self.lazy_bodies, signatures_only
+            )
+            return self._run_streaming(
+                cmd, input_text, timeout, converter.convert_stream
+            )
 
-    def _parse_procedure(self, proc_data: dict) -> ProcedureNode:
-        """Парсит процедуру из JSON"""
-        proc = ProcedureNode(proc_data.get("name", "unnamed"))
+        try:
+            result = subprocess.run(
+                cmd, input=input_text, capture_output=True, text=True,
+                encoding="utf-8", timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise ParseTimeoutError(
+                f"BSL LS не уложился в {timeout} с: {module_name}"
+            ) from None
+
+        # Парсинг JSON ответ
+        if result.returncode == 0:
+            ast_json = decode_json(result.stdout)
+            return self._convert_to_ast(ast_json, module_name,
+                                        signatures_only)
+        else:
+            raise BSLServerError(f"Ошибка BSL LS: {result.stderr}")
+
+    def parse_many(self, file_paths: Iterable[str],
+                   chunk_size: int = 200) -> BatchParseResult:
+        """
+        Парсит набор файлов, передавая по chunk_size файлов в один
+        запуск BSL LS. Порция меньше, если пути не помещаются
+        в командную строку (см. _MAX_COMMAND_LENGTH). Ошибка в отдельном
+        файле (или во всей порции) попадает в result.errors и не
+        прерывает обработку остальных.
+        """
+        if chunk_size < 1:
+            raise ValueError(
+                f"chunk_size должен быть не меньше 1, получено {chunk_size}"
+            )
+        if self._daemon is not None:
+            # Процесс уже запущен - порции не дают выигрыша
+            return super().parse_many(file_paths, chunk_size)
+
+        result = BatchParseResult()
+        for chunk in self._chunks(file_paths, chunk_size):
+            self._parse_chunk(chunk, result)
+
+        return result
+
+    def _chunks(self, file_paths: Iterable[str],
+                chunk_size: int) -> Iterator[List[str]]:
+        """
+        Порции не больше chunk_size файлов, командная строка которых
+        не длиннее _MAX_COMMAND_LENGTH (файл с длинным путем, который
+        не помещается и один, передается отдельной порцией)
+        """
+        base_length = _command_length(self._analyze_command([]))
+        chunk, length = [], base_length
+        for file_path in file_paths:
+            path_length = _command_length([file_path])
+            if chunk and (len(chunk) == chunk_size or
+                          length + path_length > _MAX_COMMAND_LENGTH):
+                yield chunk
+                chunk, length = [], base_length
+            chunk.append(file_path)
+            length += path_length
+        if chunk:
+            yield chunk
+
+    def _analyze_command(self, targets: List[str]) -> List[str]:
+        return analyze_command(self.jar_path, targets)
+
+    def _parse_chunk(self, chunk: List[str], result: BatchParseResult):
+        """Один запуск analyze на порцию файлов"""
+        cmd = self._analyze_command(chunk)
+
+        # Результаты сопоставляются с исходными путями по нормализованному
+        # абсолютному пути: BSL LS может вернуть путь в другой форме
+        by_key = {self._path_key(path): path for path in chunk}
+
+        # На порцию - бюджет модуля плюс секунда на каждый файл
+        timeout = self.budget.timeout
+        if timeout is not None:
+            timeout += len(chunk)
 
-        # Парсим параметры
-        if "parameters" in proc_data:
-            for param_data in proc_data["parameters"]:
-                param = ParameterNode(
-                    name=param_data.get("name", ""),
-                    by_value=param_data.get("byValue", False),
+        try:
+            if self.stream_json:
+                # Записи модулей преобразуются по одной по мере чтения
+                self._run_streaming(
+                    cmd, None, timeout,
+                    lambda stdout: self._collect_batch(
+                        (entry for _, entry in iter_json_items(
+                            stdout, {(), ("modules",)})
+                         if isinstance(entry, dict)),
+                        by_key, result,
+                    ),
                 )
-                proc.parameters.append(param)
-
-        # Парсим тело процедуры
-        if "body" in proc_data:
-            proc.body = self._parse_statements(proc_data["body"])
-
-        return proc
-
-    def _parse_statements(self, statements_data: list) -> list:
-        """Парсит список операторов"""
-        statements = []
-
-        for stmt_data in statements_data:
-            stmt_type = stmt_data.get("type", "")
-
-            if stmt_type == "returnStatement":
-                stmt = self._parse_return_statement(stmt_data)
-                statements.append(stmt)
-            elif stmt_type == "ifStatement":
-                stmt = self._parse_if_statement(stmt_data)
-                statements.append(stmt)
-            elif stmt_type == "whileStatement":
-                stmt = self._parse_while_statement(stmt_data)
-                statements.append(stmt)
-
-        return statements
-
-    def _parse_return_statement(self, stmt_data: dict) -> ReturnStatementNode:
-        """Парсит оператор Возврат"""
-        stmt = ReturnStatementNode()
-
-        # Парсим выражение, если оно есть
-        if "expression" in stmt_data:
-            stmt.expression = self._parse_expression(stmt_data["expression"])
-
-        return stmt
-
-    def _parse_if_statement(self, stmt_data: dict) -> IfStatementNode:
-        """Парсит оператор Если"""
-        stmt = IfStatementNode()
-
-        # Парсим условие
-        if "condition" in stmt_data:
-            stmt.condition = self._parse_expression(stmt_data["condition"])
-
-        # Парсим ветку Тогда
-        if "thenStatements" in stmt_data:
-            stmt.then_branch = self._parse_statements(
-                stmt_data["thenStatements"]
+            else:
+                process = subprocess.run(
+                    cmd, capture_output=True, text=True, timeout=timeout
                 )
+                if process.returncode != 0:
+                    raise BSLServerError(f"Ошибка BSL LS: {process.stderr}")
+                batch_json = decode_json(process.stdout)
+                self._collect_batch(
+                    self._split_batch_output(batch_json), by_key, result
+                )
+        except Exception as e:
+            for file_path in by_key.values():
+                result.errors[file_path] = str(e)
+            return
+
+        for file_path in by_key.values():
+            result.errors[file_path] = "BSL LS не вернул результат для файла"
+
+    def _collect_batch(self, entries: Iterable[dict], by_key: dict,
+                       result: BatchParseResult):
+        """
+        Раскладывает записи модулей по файлам порции. Ошибка чтения
+        или преобразования файла относится только к этому файлу.
+        """
+        for entry in entries:
+            file_name = entry.get("file")
+            if not isinstance(file_name, str):
+                continue
+            file_path = by_key.pop(self._path_key(file_name), None)
+            if file_path is None:
+                continue
+            if "error" in entry:
+                result.errors[file_path] = str(entry["error"])
+                continue
+            try:
+                module = self._convert_to_ast(entry, file_path)
+                module.source = load_source(file_path)
+            except Exception as e:
+                result.errors[file_path] = str(e) or type(e).__name__
+            else:
+                result.modules[file_path] = module
+
+    def _run_streaming(self, cmd: List[str], input_text: str,
+                       timeout: float, consume: Callable[[IO[str]], object]):
+        """
+        Запускает BSL LS и передает его stdout в consume по мере
+        поступления данных. stdin и stderr обслуживаются в отдельных
+        потоках, чтобы процесс не блокировался на заполненном канале.
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input_text is not None
+            else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+        )
+
+        stderr_parts = []
+        threads = [threading.Thread(
+            target=lambda: stderr_parts.append(process.stderr.read()),
+            daemon=True,
+        )]
+        if input_text is not None:
+            threads.append(threading.Thread(
+                target=self._write_input, args=(process, input_text),
+                daemon=True,
+            ))
+
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            process.kill()
+
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, kill_on_timeout)
+        for thread in threads:
+            thread.start()
+        if timer is not None:
+            timer.start()
 
-        # Парсим ветки ИначеЕсли
-        if "elseIfClauses" in stmt_data:
-            for clause in stmt_data["elseIfClauses"]:
-                condition = self._parse_expression(clause["condition"])
-                statements = self._parse_statements(clause["statements"])
-                stmt.elif_branches.append((condition, statements))
-
-        # Парсим ветку Иначе
-        if "elseStatements" in stmt_data:
-            stmt.else_branch = self._parse_statements(
-                stmt_data["elseStatements"])
-
-        return stmt
-
-    def _parse_while_statement(self, stmt_data: dict) -> WhileLoopNode:
-        """Парсит цикл Пока"""
-        stmt = WhileLoopNode()
-
-        # Парсим условие
-        if "condition" in stmt_data:
-            stmt.condition = self._parse_expression(stmt_data["condition"])
-
-        # Парсим тело цикла
-        if "statements" in stmt_data:
-            stmt.body = self._parse_statements(stmt_data["statements"])
-
-        return stmt
-
-    def _parse_expression(self, expr_data: dict) -> ASTNode:
-    
-        """Парсит выражение (рекурсивно!)"""
-    
-        expr_type = expr_data.get("type", "")
-
-        if expr_type == "literal":
-            # Литерал (число, строка, булево)
-            return LiteralNode(
-                value=expr_data.get("value"),
-                literal_type=expr_data.get("literalType", "unknown"),
-            )
-
-        elif expr_type == "variable":
-            # Переменная
-            return VariableNode(
-                name=expr_data.get("name", ""), is_export=expr_data.get(
-                    "export", False)
-            )
-
-        elif expr_type == "binaryOperation":
-            # Бинарная операция (a + b, a > b, ...)
-            left = self._parse_expression(expr_data["left"])
-            right = self._parse_expression(expr_data["right"])
-            operator = expr_data.get("operator", "")
-            return BinaryOperationNode(operator, left, right)
-   
+        try:
+            result = consume(process.stdout)
+            # Дочитываем остаток, чтобы процесс не завис на записи
+            process.stdout.read()
+        except BaseException as e:
+            # Вывод не дочитан: процесс может висеть на записи
+            # в заполненный канал, поэтому ждем его недолго и завершаем.
+            # Код возврата упавшего процесса объясняет ошибку разбора
+            try:
+                crashed = process.wait(timeout=_EXIT_GRACE) != 0
+            except subprocess.TimeoutExpired:
+                crashed = False
+                process.kill()
+            self._finish(process, timer, threads)
+            if not isinstance(e, Exception) or not (
+                    crashed or timed_out.is_set()):
+                raise
         else:
-            print(f"Неизвестный тип выражения: {expr_type}")
-            return ASTNode(NodeType.EXPRESSION)
+            self._finish(process, timer, threads)
+
+        if timed_out.is_set():
+            raise ParseTimeoutError(f"BSL LS не уложился в {timeout} с")
+        if process.returncode != 0:
+            raise BSLServerError(f"Ошибка BSL LS: {''.join(stderr_parts)}")
+        return result
+
+    @staticmethod
+    def _finish(process: subprocess.Popen, timer: threading.Timer,
+                threads: List[threading.Thread]):
+        """Дожидается процесса и потоков, обслуживающих его каналы"""
+        process.wait()
+        if timer is not None:
+            timer.cancel()
+        for thread in threads:
+            thread.join()
+        process.stdout.close()
+        process.stderr.close()
+
+    @staticmethod
+    def _write_input(process: subprocess.Popen, input_text: str):
+        try:
+            process.stdin.write(input_text)
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass  # процесс завершился раньше - ошибку покажет код возврата
+
+    def _split_batch_output(self, batch_json) -> list:
+        """
+        Разбивает общий JSON на записи по модулям. Поддерживаются
+        {"modules": [...]} и просто список записей вида
+        {"file": "...", "module": {...}} или {"file": "...", "error": "..."}
+        """
+        if isinstance(batch_json, dict):
+            batch_json = batch_json.get("modules", [])
+        return [entry for entry in batch_json if isinstance(entry, dict)]
+
+    @staticmethod
+    def _path_key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _convert_to_ast(self, bsl_json: dict, name: str,
+                        signatures_only: bool = False) -> ModuleNode:
+        """Преобразует JSON от BSL LS в наше AST"""
+        return JsonAstConverter(
+            name, self.lazy_bodies, signatures_only
+        ).convert(bsl_json)
+
+
+def analyze_command(jar_path: Path, targets: List[str]) -> List[str]:
+    """Команда analyze BSL LS для файлов targets ("-" - stdin)"""
+    return [
+        "java",
+        "-jar",
+        str(jar_path),
+        "analyze",
+        "--format",
+        "json",
+        *targets,
+    ]
+
+
+def _command_length(args: List[str]) -> int:
+    """Длина аргументов в командной строке: кавычки и пробел на каждый"""
+    return sum(len(arg) + 3 for arg in args)
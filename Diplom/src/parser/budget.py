@@ -0,0 +1,96 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+from .ast_nodes import ModuleNode
+
+
+class ParseTimeoutError(TimeoutError):
+    """
+    Разбор модуля не уложился в отведенное время.
+
+    module - то, что бэкенд успел разобрать до истечения времени
+    (None, если частичного результата нет).
+    """
+
+    module: Optional[ModuleNode] = None
+
+
+# Срок (time.monotonic()) охватывающего deadline_scope или None
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("parse_deadline",
+                                                    default=None)
+
+
+@contextmanager
+def deadline_scope(timeout: Optional[float]):
+    """
+    Срок разбора на время блока: его проверяют и разбор модуля, и
+    ленивые тела методов, которые строятся при обращении к body внутри
+    блока. Вложенный блок не продлевает срок внешнего.
+    """
+    if timeout is None:
+        yield
+        return
+    deadline = time.monotonic() + timeout
+    outer = _DEADLINE.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """Срок охватывающего deadline_scope (None - без ограничения)"""
+    return _DEADLINE.get()
+
+
+@dataclass
+class ParseBudget:
+    """
+    Ограничения на разбор одного модуля.
+
+    timeout - секунды на модуль (None - без ограничения).
+    max_bytes - модули большего размера разбираются в режиме
+    "только сигнатуры": без тел процедур и функций (None - без
+    ограничения).
+    """
+    timeout: Optional[float] = None
+    max_bytes: Optional[int] = None
+
+    def over_size(self, size: int) -> bool:
+        return self.max_bytes is not None and size > self.max_bytes
+
+
+class ParseStatus(Enum):
+    OK = "ok"  # модуль разобран полностью
+    DEGRADED = "degraded"  # есть результат, но неполный
+    TIMED_OUT = "timed_out"  # превышен timeout
+    FAILED = "failed"  # результата нет
+
+
+@dataclass
+class ParseOutcome:
+    """
+    Итог разбора одного модуля для планировщика.
+
+    DEGRADED - модуль разобран только по сигнатурам (превышен
+    max_bytes) или содержит синтаксические ошибки (module.errors).
+    TIMED_OUT - в module частичный результат, если бэкенд его вернул.
+    """
+    path: str
+    status: ParseStatus
+    module: Optional[ModuleNode] = None
+    error: Optional[str] = None
+    size: int = 0  # байт исходного текста
+    seconds: float = 0.0  # время разбора
+    signatures_only: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status is ParseStatus.OK
@@ -0,0 +1,421 @@
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .ast_nodes import (
+    ASTNode, LiteralNode, MethodNode, ModuleNode, NodeType, Position, Range,
+    node_fields,
+)
+from .ast_schema import (
+    ELIF_BODY, ELIF_CONDITION, FLAGS, KIND_IDS, KINDS, LIST_FIELDS,
+    NODE_CHILDREN, NODE_TYPES, ROLE_IDS, ROLES, TEXT_FIELDS,
+    decode_constant, encode_constant,
+)
+
+NO_NODE = -1
+
+_MAGIC = b"BSLF"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBIIII")
+_BYTE_COLUMNS = ("kinds", "roles", "flags")
+_INT_COLUMNS = ("parents", "first_children", "next_siblings",
+                "start_lines", "start_columns", "end_lines", "end_columns",
+                "names", "values")
+
+
+class FlatAST:
+    """
+    AST одного или нескольких модулей в плоском виде: узел - номер,
+    атрибуты узлов - параллельные массивы (вид, роль, родитель, первый
+    дочерний, следующий соседний, начало и конец, номер строки имени).
+    Узлы нумеруются в прямом порядке обхода, поэтому поддерево узла -
+    непрерывный отрезок номеров.
+
+    Для объемных анализов по всей конфигурации: миллионы узлов без
+    объекта на каждый, и все дерево сериализуется в один буфер
+    (to_bytes) - дешево передать в другой процесс. Правила и visitor'ы
+    работают через node()/modules(): представления узлов ведут себя
+    как обычные узлы AST (только чтение).
+    """
+
+    def __init__(self):
+        self.kinds = array("B")  # номер NodeType
+        self.roles = array("B")  # номер в ROLES
+        self.flags = array("B")
+        self.parents = array("i")
+        self.first_children = array("i")
+        self.next_siblings = array("i")
+        self.start_lines = array("i")  # 0 - у узла нет range
+        self.start_columns = array("i")
+        self.end_lines = array("i")
+        self.end_columns = array("i")
+        self.names = array("i")  # номер в strings или NO_NODE
+        self.values = array("i")  # номер в constants (литералы)
+        self.roots = array("i")  # узлы модулей
+        self.strings: List[str] = []
+        self.constants: List[Any] = []
+        self._string_ids: Dict[str, int] = {}
+        self._constant_ids: Dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    # ------------------------------------------------------------------
+    # Построение
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_modules(cls, modules: Iterable[ModuleNode]) -> "FlatAST":
+        """Переносит модули в одно хранилище (строки общие)"""
+        flat = cls()
+        for module in modules:
+            flat.add_module(module)
+        return flat
+
+    @classmethod
+    def from_module(cls, module: ModuleNode) -> "FlatAST":
+        return cls.from_modules([module])
+
+    def add_module(self, module: ModuleNode) -> int:
+        """
+        Добавляет модуль, возвращает номер его узла. Ленивые тела
+        методов при этом разбираются.
+        """
+        root = len(self.kinds)
+        if self.roots:
+            # Модули - соседи друг друга: поддерево модуля кончается
+            # там, где начинается следующий
+            self.next_siblings[self.roots[-1]] = root
+        self.roots.append(root)
+        last_children: Dict[int, int] = {}
+        # (узел, номер родителя, роль); дети кладутся в обратном
+        # порядке, чтобы номера шли в прямом порядке обхода
+        stack = [(module, NO_NODE, 0)]
+        while stack:
+            node, parent, role = stack.pop()
+            index = self._append(node, parent, role)
+            if parent != NO_NODE:
+                previous = last_children.get(parent)
+                if previous is None:
+                    self.first_children[parent] = index
+                else:
+                    self.next_siblings[previous] = index
+                last_children[parent] = index
+
+            children = []
+            for field in NODE_CHILDREN[type(node)]:
+                value = getattr(node, field)
+                if field == "elif_branches":
+                    for condition, statements in value:
+                        children.append((condition, ELIF_CONDITION))
+                        children.extend((s, ELIF_BODY) for s in statements)
+                elif field in LIST_FIELDS:
+                    field_role = ROLE_IDS[field]
+                    children.extend((child, field_role) for child in value)
+                elif value is not None:
+                    children.append((value, ROLE_IDS[field]))
+            for child, child_role in reversed(children):
+                stack.append((child, index, child_role))
+        return root
+
+    def _append(self, node: ASTNode, parent: int, role: int) -> int:
+        index = len(self.kinds)
+        node_class = type(node)
+        self.kinds.append(KIND_IDS[node.node_type])
+        self.roles.append(role)
+        flags = 0
+        for field, bit in FLAGS:
+            if getattr(node, field, False):
+                flags |= bit
+        self.flags.append(flags)
+        self.parents.append(parent)
+        self.first_children.append(NO_NODE)
+        self.next_siblings.append(NO_NODE)
+
+        node_range = node.range
+        if node_range is None:
+            self.start_lines.append(0)
+            self.start_columns.append(0)
+            self.end_lines.append(0)
+            self.end_columns.append(0)
+        else:
+            self.start_lines.append(node_range.start.line)
+            self.start_columns.append(node_range.start.column)
+            self.end_lines.append(node_range.end.line)
+            self.end_columns.append(node_range.end.column)
+
+        text_field = TEXT_FIELDS.get(node_class)
+        text = getattr(node, text_field) if text_field else None
+        self.names.append(NO_NODE if text is None else self.string_id(text))
+        self.values.append(
+            self._constant_id(node.value) if node_class is LiteralNode
+            else NO_NODE
+        )
+        return index
+
+    def string_id(self, text: str) -> int:
+        """Номер строки в таблице strings (одинаковые строки - один номер)"""
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def _constant_id(self, value: Any) -> int:
+        # Тип в ключе: иначе True и 1 совпали бы
+        key = (type(value), value)
+        constant_id = self._constant_ids.get(key)
+        if constant_id is None:
+            constant_id = self._constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+        return constant_id
+
+    # ------------------------------------------------------------------
+    # Запросы по номерам узлов
+    # ------------------------------------------------------------------
+
+    def kind(self, index: int) -> NodeType:
+        return KINDS[self.kinds[index]]
+
+    def role(self, index: int) -> str:
+        return ROLES[self.roles[index]]
+
+    def text(self, index: int) -> Optional[str]:
+        """Имя, оператор, член, тип или сообщение узла"""
+        name = self.names[index]
+        return None if name == NO_NODE else self.strings[name]
+
+    def range(self, index: int) -> Optional[Range]:
+        if not self.start_lines[index]:
+            return None
+        return Range(
+            Position(self.start_lines[index], self.start_columns[index]),
+            Position(self.end_lines[index], self.end_columns[index]),
+        )
+
+    def children(self, index: int) -> Iterator[int]:
+        child = self.first_children[index]
+        next_siblings = self.next_siblings
+        while child != NO_NODE:
+            yield child
+            child = next_siblings[child]
+
+    def subtree_end(self, index: int) -> int:
+        """Номер, следующий за последним узлом поддерева index"""
+        parents, next_siblings = self.parents, self.next_siblings
+        while index != NO_NODE:
+            if next_siblings[index] != NO_NODE:
+                return next_siblings[index]
+            index = parents[index]
+        return len(self.kinds)
+
+    def walk(self, index: int) -> range:
+        """Узел и все вложенные, в порядке обхода"""
+        return range(index, self.subtree_end(index))
+
+    def of_kind(self, node_type: NodeType,
+                start: int = 0, end: int = None) -> List[int]:
+        """Узлы вида node_type (по всему хранилищу или на отрезке)"""
+        kind = KIND_IDS[node_type]
+        kinds = self.kinds
+        if end is None:
+            end = len(kinds)
+        return [i for i in range(start, end) if kinds[i] == kind]
+
+    def is_ancestor(self, ancestor: int, index: int) -> bool:
+        return ancestor < index < self.subtree_end(ancestor)
+
+    # ------------------------------------------------------------------
+    # Представления узлов
+    # ------------------------------------------------------------------
+
+    def node(self, index: int) -> ASTNode:
+        """Узел index в виде объекта AST (только для чтения)"""
+        view = object.__new__(_VIEW_CLASSES[self.kinds[index]])
+        view._flat = self
+        view._index = index
+        return view
+
+    def modules(self) -> List[ModuleNode]:
+        return [self.node(root) for root in self.roots]
+
+    # ------------------------------------------------------------------
+    # Сериализация
+    # ------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """Все хранилище одним буфером (порядок байтов little-endian)"""
+        texts = [s.encode("utf-8") for s in self.strings]
+        texts.extend(encode_constant(c).encode("utf-8")
+                     for c in self.constants)
+        lengths = array("i", (len(t) for t in texts))
+
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(self.kinds),
+                              len(self.roots), len(self.strings),
+                              len(self.constants))]
+        for name in _BYTE_COLUMNS:
+            parts.append(getattr(self, name).tobytes())
+        for column in [getattr(self, n) for n in _INT_COLUMNS] + [
+                self.roots, lengths]:
+            if sys.byteorder != "little":
+                column = array("i", column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        parts.extend(texts)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, buffer: bytes) -> "FlatAST":
+        data = memoryview(buffer)
+        magic, version, count, root_count, string_count, constant_count = (
+            _HEADER.unpack_from(data))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Неизвестный формат плоского AST")
+        offset = _HEADER.size
+
+        flat = cls()
+        for name in _BYTE_COLUMNS:
+            getattr(flat, name).frombytes(data[offset:offset + count])
+            offset += count
+        sizes = [count] * len(_INT_COLUMNS) + [
+            root_count, string_count + constant_count]
+        lengths = array("i")
+        for column, size in zip(
+                [getattr(flat, n) for n in _INT_COLUMNS]
+                + [flat.roots, lengths], sizes):
+            end = offset + size * column.itemsize
+            column.frombytes(data[offset:end])
+            if sys.byteorder != "little":
+                column.byteswap()
+            offset = end
+
+        texts = []
+        for length in lengths:
+            texts.append(str(data[offset:offset + length], "utf-8"))
+            offset += length
+        flat.strings = texts[:string_count]
+        flat.constants = [decode_constant(t) for t in texts[string_count:]]
+        flat._string_ids = {s: i for i, s in enumerate(flat.strings)}
+        flat._constant_ids = {
+            (type(c), c): i for i, c in enumerate(flat.constants)}
+        return flat
+
+    def __reduce__(self):
+        return FlatAST.from_bytes, (self.to_bytes(),)
+
+
+
+
+# ----------------------------------------------------------------------
+# Представления узлов
+# ----------------------------------------------------------------------
+
+class NodeView:
+    """
+    Примесь классов-представлений: узел плоского AST с тем же классом,
+    что у обычного узла (isinstance и accept работают как прежде).
+    Атрибуты вычисляются из массивов при обращении; два представления
+    одного узла равны.
+    """
+
+    __slots__ = ()
+
+    @property
+    def node_type(self) -> NodeType:
+        return KINDS[self._flat.kinds[self._index]]
+
+    @property
+    def range(self) -> Optional[Range]:
+        return self._flat.range(self._index)
+
+    def __eq__(self, other):
+        return (isinstance(other, NodeView) and other._flat is self._flat
+                and other._index == self._index)
+
+    def __hash__(self):
+        return hash((id(self._flat), self._index))
+
+    def __repr__(self):
+        return f"<{type(self).__name__} #{self._index}>"
+
+
+def _child_property(role: str):
+    role_id = ROLE_IDS[role]
+
+    def getter(self):
+        flat = self._flat
+        for child in flat.children(self._index):
+            if flat.roles[child] == role_id:
+                return flat.node(child)
+        return None
+    return property(getter)
+
+
+def _list_property(role: str):
+    role_id = ROLE_IDS[role]
+
+    def getter(self):
+        flat = self._flat
+        return [flat.node(child) for child in flat.children(self._index)
+                if flat.roles[child] == role_id]
+    return property(getter)
+
+
+def _elif_branches(self):
+    flat = self._flat
+    branches = []
+    for child in flat.children(self._index):
+        if flat.roles[child] == ELIF_CONDITION:
+            branches.append((flat.node(child), []))
+        elif flat.roles[child] == ELIF_BODY:
+            branches[-1][1].append(flat.node(child))
+    return branches
+
+
+def _text_property(self):
+    return self._flat.text(self._index)
+
+
+def _flag_property(bit: int):
+    return property(lambda self: bool(self._flat.flags[self._index] & bit))
+
+
+def _value(self):
+    return self._flat.constants[self._flat.values[self._index]]
+
+
+def _view_class(node_class: type) -> type:
+    namespace = {"__slots__": ("_flat", "_index")}
+    for field in NODE_CHILDREN[node_class]:
+        if field == "elif_branches":
+            namespace[field] = property(_elif_branches)
+        elif field in LIST_FIELDS:
+            namespace[field] = _list_property(field)
+        else:
+            namespace[field] = _child_property(field)
+    if node_class in TEXT_FIELDS:
+        namespace[TEXT_FIELDS[node_class]] = property(_text_property)
+    for field, bit in FLAGS:
+        if field in node_fields(node_class):
+            namespace[field] = _flag_property(bit)
+    if node_class is LiteralNode:
+        namespace["value"] = property(_value)
+    if node_class is ModuleNode:
+        # Исходный текст и trivia в плоское хранилище не переносятся
+        for field in ("source", "_trivia", "_regions"):
+            namespace[field] = property(lambda self: None)
+        # Индекс строится заново при каждом обращении: представления
+        # создаются на время запроса и ничего не хранят
+        namespace["_module_index"] = property(lambda self: None,
+                                              lambda self, value: None)
+    if issubclass(node_class, MethodNode):
+        namespace["_body_loader"] = property(lambda self: None)
+    return type(node_class.__name__ + "View", (NodeView, node_class),
+                namespace)
+
+
+# Класс представления по номеру вида узла
+_VIEW_CLASSES = [None] * len(KINDS)
+for _node_class, _node_type in NODE_TYPES.items():
+    _VIEW_CLASSES[KIND_IDS[_node_type]] = _view_class(_node_class)
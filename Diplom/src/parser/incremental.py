@@ -0,0 +1,416 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .ast_nodes import (
+    ASTNode, ErrorNode, MethodNode, ModuleNode, Position, Range, node_fields,
+)
+from .source import SourceText
+from .trivia import TriviaTable
+
+# Место ошибки в конце сообщения BSLSyntaxError
+_ERROR_LOCATION = re.compile(r"\(строка (\d+), колонка (\d+)\)$")
+
+# Атрибуты узлов, в которых не бывает вложенных узлов
+_SCALAR_FIELDS = {
+    "node_type", "range", "name", "is_export", "by_value",
+    "has_default_value", "operator", "value", "literal_type", "member",
+    "type_name", "message", "_body_loader",
+}
+# Атрибуты, где могут быть вложенные узлы, по классам узлов
+_CHILD_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+@dataclass
+class TextEdit:
+    """
+    Замена текста модуля, как в LSP: диапазон в тексте до правки
+    (строки и колонки с 1, конец не включается) и новый текст.
+    Вставка - пустой диапазон, удаление - пустой new_text.
+    """
+    range: Range
+    new_text: str
+
+
+class _Edit:
+    """Правка, пересчитанная в смещения старого и нового текста"""
+
+    def __init__(self, old_start: int, old_end: int, new_text: str,
+                 old_end_pos: Position):
+        self.old_start = old_start
+        self.old_end = old_end
+        self.new_text = new_text
+        self.old_end_pos = old_end_pos
+        self.new_end_pos: Optional[Position] = None
+        self.delta = len(new_text) - (old_end - old_start)
+
+
+class _Shift:
+    """
+    Пересчет позиций из старого текста в новый для участка текста
+    между двумя правками (после правки edit, до следующей)
+    """
+
+    def __init__(self, edit: _Edit = None, offset_delta: int = 0):
+        if edit is None:
+            self.old_line = self.new_line = 0
+            self.old_column = self.new_column = 0
+        else:
+            self.old_line = edit.old_end_pos.line
+            self.old_column = edit.old_end_pos.column
+            self.new_line = edit.new_end_pos.line
+            self.new_column = edit.new_end_pos.column
+        self.line_delta = self.new_line - self.old_line
+        self.offset_delta = offset_delta
+
+    @property
+    def identity(self) -> bool:
+        return self.line_delta == 0 and self.old_column == self.new_column
+
+    def position(self, pos: Position) -> Position:
+        if pos.line == self.old_line:
+            return Position(
+                self.new_line, pos.column - self.old_column + self.new_column
+            )
+        return Position(pos.line + self.line_delta, pos.column)
+
+    def affects(self, node_range: Optional[Range]) -> bool:
+        """Меняет ли пересчет позиции узла с диапазоном node_range"""
+        if node_range is None or self.identity:
+            return False
+        return self.line_delta != 0 or node_range.start.line <= self.old_line
+
+
+def apply_edits(text: str, edits: Sequence[TextEdit],
+                source: SourceText = None) -> Tuple[str, List[_Edit]]:
+    """
+    Применяет правки к тексту. Диапазоны всех правок относятся
+    к исходному тексту и не должны пересекаться.
+    Возвращает новый текст и правки в порядке следования.
+    """
+    source = source or SourceText(text)
+    resolved = []
+    line_count = source.line_count
+    for edit in edits:
+        if not (1 <= edit.range.start.line <= line_count
+                and 1 <= edit.range.end.line <= line_count):
+            raise ValueError(f"Диапазон правки вне текста: {edit.range}")
+        start = source.offset(edit.range.start.line, edit.range.start.column)
+        end = source.offset(edit.range.end.line, edit.range.end.column)
+        if not 0 <= start <= end <= len(text):
+            raise ValueError(f"Диапазон правки вне текста: {edit.range}")
+        resolved.append(_Edit(start, end, edit.new_text, edit.range.end))
+    resolved.sort(key=lambda e: (e.old_start, e.old_end))
+
+    parts = []
+    last = 0
+    shift = _Shift()
+    for edit in resolved:
+        if edit.old_start < last:
+            raise ValueError("Правки пересекаются")
+        parts.append(text[last:edit.old_start])
+        parts.append(edit.new_text)
+        last = edit.old_end
+
+        # Конец вставленного текста в координатах нового текста
+        start = shift.position(source_position(source, edit.old_start))
+        breaks = edit.new_text.count("\n")
+        if breaks:
+            column = len(edit.new_text) - edit.new_text.rfind("\n")
+            edit.new_end_pos = Position(start.line + breaks, column)
+        else:
+            edit.new_end_pos = Position(
+                start.line, start.column + len(edit.new_text)
+            )
+        shift = _Shift(edit, shift.offset_delta + edit.delta)
+    parts.append(text[last:])
+    return "".join(parts), resolved
+
+
+def source_position(source: SourceText, offset: int) -> Position:
+    line, column = source.position(offset)
+    return Position(line, column)
+
+
+def reparse_methods(module: ModuleNode, edits: Sequence[TextEdit],
+                    parse_snippet: Callable[[str, int, int], ModuleNode]
+                    ) -> Optional[ModuleNode]:
+    """
+    Инкрементальный разбор: заново разбираются только методы, внутри
+    которых лежат правки (parse_snippet(text, start, end) разбирает
+    часть нового текста или возвращает None), позиции остальных узлов
+    сдвигаются; в телах остальных методов - при первом обращении к body.
+    None - правка затрагивает код вне методов или меняет границы
+    метода: нужен полный разбор.
+
+    Узлы предыдущего модуля переходят в новый, поэтому после вызова
+    предыдущий ModuleNode использовать нельзя.
+    """
+    old_source = module.source
+    text, resolved = apply_edits(old_source.text, edits, old_source)
+    new_source = SourceText(text, old_source.path, old_source.encoding)
+    if not resolved:
+        return None
+
+    # Правки по методам: каждая правка - строго внутри одного метода
+    methods = sorted(
+        (m for m in module.procedures + module.functions
+         if m.range is not None),
+        key=lambda m: (m.range.start.line, m.range.start.column),
+    )
+    starts = [_offset(old_source, m.range.start) for m in methods]
+    ends = [_offset(old_source, m.range.end) for m in methods]
+    touched: List[int] = []  # номера методов, по порядку
+    for edit in resolved:
+        index = bisect_right(starts, edit.old_start) - 1
+        if (index < 0 or edit.old_start <= starts[index]
+                or edit.old_end >= ends[index]):
+            return None
+        if not touched or touched[-1] != index:
+            touched.append(index)
+
+    # Сдвиг позиций на участках между правками
+    shifts = [_Shift()]
+    offset_delta = 0
+    for edit in resolved:
+        offset_delta += edit.delta
+        shifts.append(_Shift(edit, offset_delta))
+    edit_ends = [edit.old_end for edit in resolved]
+
+    def shift_for(offset: int) -> _Shift:
+        return shifts[bisect_right(edit_ends, offset)]
+
+    # Разбор измененных методов
+    replaced = {}
+    spans = []  # (старое начало, старый конец, trivia метода)
+    new_errors = []
+    for index in touched:
+        old_method = methods[index]
+        new_range = Range(
+            shift_for(starts[index]).position(old_method.range.start),
+            shift_for(ends[index]).position(old_method.range.end),
+        )
+        parsed = parse_snippet(
+            text,
+            starts[index] + shift_for(starts[index]).offset_delta,
+            ends[index] + shift_for(ends[index]).offset_delta,
+        )
+        method = _single_method(parsed, new_range) if parsed else None
+        if method is None or type(method) is not type(old_method):
+            return None
+
+        replaced[id(old_method)] = method
+        new_errors.append(parsed.errors)
+        spans.append((starts[index], ends[index], parsed.trivia))
+
+    # Ошибки измененных методов заменяются новыми на том же месте
+    # списка (до сдвига позиций: принадлежность методу определяется
+    # по старым). Список общий с ленивыми телами, поэтому меняется
+    # на месте
+    errors = module.errors
+    kept = []
+    span_index = 0
+    for error in errors:
+        offset = -1
+        if error.range is not None:
+            offset = _offset(old_source, error.range.start)
+            if any(start <= offset < end for start, end, _ in spans):
+                continue
+            # Ошибка может не входить в дерево (метод без имени),
+            # поэтому сдвигается здесь, а не при обходе
+            shift = shift_for(offset)
+            if shift.affects(error.range):
+                _shift_tree(error, shift)
+        while span_index < len(spans) and offset >= spans[span_index][1]:
+            kept.extend(new_errors[span_index])
+            span_index += 1
+        kept.append(error)
+    for method_errors in new_errors[span_index:]:
+        kept.extend(method_errors)
+    errors[:] = kept
+
+    # Сдвиг всего, что лежит вне измененных методов
+    def shift_node(node: ASTNode):
+        if node.range is None or id(node) in new_ids:
+            return
+        shift = shift_for(_offset(old_source, node.range.start))
+        if shift.affects(node.range):
+            _shift_tree(node, shift, errors)
+
+    new_ids = {id(node) for node in replaced.values()}
+    new_module = ModuleNode(module.name)
+    new_module.functions = [replaced.get(id(m), m) for m in module.functions]
+    new_module.procedures = [
+        replaced.get(id(m), m) for m in module.procedures
+    ]
+    new_module.variables = module.variables
+    new_module.body = module.body
+    for nodes in (new_module.functions, new_module.procedures,
+                  new_module.variables, new_module.body):
+        for node in nodes:
+            shift_node(node)
+
+    new_module.errors = errors
+
+    if module.range is not None:
+        new_module.range = Range(
+            Position(1, 1), shifts[-1].position(module.range.end)
+        )
+    new_module.source = new_source
+    new_module.trivia = _splice_trivia(
+        module.trivia, text, spans, shift_for
+    )
+    return new_module
+
+
+# ----------------------------------------------------------------------
+# Вспомогательные функции
+# ----------------------------------------------------------------------
+
+def _single_method(parsed: ModuleNode,
+                   expected: Range) -> Optional[MethodNode]:
+    """
+    Метод, если часть текста разобралась ровно в один метод с ожидаемыми
+    границами (иначе правка изменила границы методов)
+    """
+    methods = parsed.procedures + parsed.functions
+    if len(methods) != 1 or parsed.variables or parsed.body:
+        return None
+    method = methods[0]
+    if method.range != expected:
+        return None
+    return method
+
+
+def _shift_tree(root: ASTNode, shift, errors: List[ErrorNode] = None):
+    """
+    Пересчитывает диапазоны узла и всех вложенных узлов.
+
+    errors - список ошибок модуля: ErrorNode из него сдвигаются по
+    списку, а не при обходе. Тела методов сдвигаются при первом
+    обращении к body (см. _shifted_loader).
+    """
+    position = shift.position
+    old_line, line_delta = shift.old_line, shift.line_delta
+    stack = [root]
+    pop, push = stack.pop, stack.append
+    while stack:
+        node = pop()
+        node_type = type(node)
+        if node_type is ErrorNode and errors is not None:
+            continue
+        node_range = node.range
+        if node_range is not None:
+            start, end = node_range.start, node_range.end
+            if start.line > old_line:
+                # Узел целиком ниже правки: меняются только строки
+                node.range = Range(
+                    Position(start.line + line_delta, start.column),
+                    Position(end.line + line_delta, end.column),
+                )
+            else:
+                node.range = Range(position(start), position(end))
+
+        if node_type is ErrorNode:
+            node.message = _ERROR_LOCATION.sub(
+                lambda m: _location(shift, m), node.message
+            )
+            continue
+        if isinstance(node, MethodNode):
+            stack.extend(node.parameters)
+            loader = node._body_loader
+            if loader is None:
+                loader = _loaded(node._body)
+            node.set_body_loader(_shifted_loader(loader, shift, errors))
+            continue
+
+        fields = _CHILD_FIELDS.get(node_type)
+        if fields is None:
+            fields = _CHILD_FIELDS[node_type] = tuple(
+                name for name in node_fields(node_type)
+                if name not in _SCALAR_FIELDS
+            )
+        for name in fields:
+            value = getattr(node, name)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ASTNode):
+                        push(item)
+                    elif isinstance(item, tuple):
+                        # ИначеЕсли: (условие, операторы)
+                        push(item[0])
+                        stack.extend(item[1])
+            elif isinstance(value, ASTNode):
+                push(value)
+
+
+def _location(shift, match) -> str:
+    pos = shift.position(Position(int(match[1]), int(match[2])))
+    return f"(строка {pos.line}, колонка {pos.column})"
+
+
+def _loaded(body: List[ASTNode]):
+    return lambda: body
+
+
+def _shifted_loader(loader, shift, errors: List[ErrorNode]):
+    """
+    Тело метода с отложенным сдвигом позиций. Ошибки, которые ленивое
+    тело добавит в список модуля при разборе, тоже сдвигаются.
+    """
+    def load() -> List[ASTNode]:
+        first = len(errors)
+        body = loader()
+        for statement in body:
+            _shift_tree(statement, shift, errors)
+        for error in errors[first:]:
+            _shift_tree(error, shift)
+        return body
+    return load
+
+
+def _offset(source: SourceText, pos: Position) -> int:
+    return source.offset(pos.line, pos.column)
+
+
+def _splice_trivia(old: TriviaTable, text: str, spans: list,
+                   shift_for) -> TriviaTable:
+    """
+    Таблица trivia нового текста: записи вне измененных методов
+    сдвигаются, записи методов берутся из их разбора
+    """
+    table = TriviaTable(text)
+    position = 0  # первая еще не перенесенная запись старой таблицы
+
+    def copy_old(until: int):
+        nonlocal position
+        end = bisect_left(old.starts, until, position)
+        if position < end:
+            shift = shift_for(old.starts[position])
+            _extend(table, old, position, end,
+                    shift.line_delta, shift.offset_delta)
+        position = end
+
+    for old_start, old_end, method_trivia in spans:
+        copy_old(old_start)
+        _extend(table, method_trivia, 0, len(method_trivia), 0, 0)
+        position = bisect_left(old.starts, old_end, position)
+    copy_old(len(old.text) + 1)
+    return table
+
+
+def _extend(table: TriviaTable, source: TriviaTable, first: int, last: int,
+            line_delta: int, offset_delta: int):
+    table.kinds.extend(source.kinds[first:last])
+    for target, values, delta in (
+        (table.lines, source.lines, line_delta),
+        (table.end_lines, source.end_lines, line_delta),
+        (table.starts, source.starts, offset_delta),
+        (table.ends, source.ends, offset_delta),
+    ):
+        chunk = values[first:last]
+        if delta:
+            chunk = array("l", [value + delta for value in chunk])
+        target.extend(chunk)
@@ -0,0 +1,597 @@
+import logging
+from collections import Counter
+from typing import IO, Iterable, List, Tuple
+from .json_stream import iter_json_items
+from .names import NAMES, NamePool
+from .ast_nodes import (
+    ModuleNode,
+    FunctionNode,
+    ProcedureNode,
+    VariableNode,
+    ParameterNode,
+    ReturnStatementNode,
+    IfStatementNode,
+    WhileLoopNode,
+    ForLoopNode,
+    ForEachLoopNode,
+    TryStatementNode,
+    AssignmentNode,
+    RaiseStatementNode,
+    BreakStatementNode,
+    ContinueStatementNode,
+    BinaryOperationNode,
+    UnaryOperationNode,
+    FunctionCallNode,
+    MemberAccessNode,
+    IndexAccessNode,
+    NewObjectNode,
+    LiteralNode,
+    ErrorNode,
+    ASTNode,
+    NodeType,
+)
+
+logger = logging.getLogger(__name__)
+
+# Разделы модуля в JSON от BSL LS
+_MODULE_SECTIONS = ("variables", "functions", "procedures")
+_MODULE_ARRAY_PATHS = {("module", section) for section in _MODULE_SECTIONS}
+
+
+class JsonAstConverter:
+    """
+    Преобразует JSON от BSL LS в наше AST.
+
+    Создается на каждый модуль. Ошибки преобразования не отменяют
+    разбор модуля: сломанный оператор или метод заменяется ErrorNode
+    (он же попадает в module.errors), остальное сохраняется.
+    """
+
+    def __init__(self, name: str, lazy_bodies: bool = False,
+                 signatures_only: bool = False, names: NamePool = None):
+        """
+        lazy_bodies - тела процедур и функций преобразуются только при
+        первом обращении к body; до этого хранится их JSON. Ошибки
+        разбора тела попадают в module.errors в момент обращения.
+        signatures_only - тела не преобразуются вовсе.
+        names - пул идентификаторов (по умолчанию общий пул NAMES).
+        """
+        self.name = name
+        self.names = names if names is not None else NAMES
+        self.lazy_bodies = lazy_bodies
+        self.signatures_only = signatures_only
+        self.errors: List[ErrorNode] = []
+        self.unknown_types = Counter()  # тип узла -> сколько пропущено
+
+    def convert(self, bsl_json: dict) -> ModuleNode:
+        if not bsl_json or "module" not in bsl_json:
+            logger.warning("Пустой JSON для модуля %s", self.name)
+            return ModuleNode(self.name)
+
+        module_data = bsl_json["module"]
+        return self._build_module(
+            (section, item)
+            for section in _MODULE_SECTIONS
+            for item in module_data.get(section, [])
+        )
+
+    def convert_stream(self, stream: IO[str]) -> ModuleNode:
+        """
+        Строит модуль, читая JSON из потока: каждая переменная, функция
+        и процедура преобразуется сразу после разбора, и ее JSON-фрагмент
+        освобождается до чтения следующей.
+        """
+        return self._build_module(
+            (path[-1], item)
+            for path, item in iter_json_items(stream, _MODULE_ARRAY_PATHS)
+        )
+
+    def _build_module(self, items: Iterable[Tuple[str, dict]]) -> ModuleNode:
+        """Собирает модуль из пар (раздел модуля, JSON элемента)"""
+        name = self.name
+        module = ModuleNode(name)
+
+        for section, item in items:
+            if section == "variables":
+                # 1. ПАРСИМ ПЕРЕМЕННЫЕ
+                try:
+                    var = VariableNode(
+                        name=self.names.intern(item.get("name", "")),
+                        is_export=item.get("export", False),
+                    )
+                    module.variables.append(var)
+                except Exception as e:
+                    module.body.append(self._error(
+                        f"Не удалось разобрать переменную модуля: {e}"
+                    ))
+            elif section == "functions":
+                # 2. ПАРСИМ ФУНКЦИИ
+                func = self._parse_method(item, FunctionNode,
+                                          self._parse_function)
+                module.functions.append(func)
+            elif section == "procedures":
+                # 3. ПАРСИМ ПРОЦЕДУРЫ
+                proc = self._parse_method(item, ProcedureNode,
+                                          self._parse_procedure)
+                module.procedures.append(proc)
+
+        module.errors = self.errors
+
+        logger.info(
+            "Распарсен модуль %s: переменных %d, функций %d, процедур %d",
+            name, len(module.variables), len(module.functions),
+            len(module.procedures),
+        )
+        if self.errors:
+            logger.info("Ошибок разбора в %s: %d", name, len(self.errors))
+        if self.unknown_types:
+            logger.info("Неизвестных узлов в %s: %d", name,
+                        sum(self.unknown_types.values()))
+
+        return module
+
+    def _parse_method(self, method_data: dict, node_class, parse):
+        """
+        Разбирает процедуру/функцию; если это не удалось, возвращает
+        узел с тем же именем и ErrorNode в теле
+        """
+        try:
+            return parse(method_data)
+        except Exception as e:
+            name = "unnamed"
+            if isinstance(method_data, dict):
+                name = method_data.get("name", name)
+            method = node_class(name)
+            method.body = [self._error(f"Не удалось разобрать {name}: {e}")]
+            return method
+
+    def _error(self, message: str) -> ErrorNode:
+        error = ErrorNode(message)
+        self.errors.append(error)
+        return error
+
+    def _parameters(self, parameters_data: list) -> list:
+        return [
+            ParameterNode(
+                name=self.names.intern(param_data.get("name", "")),
+                by_value=param_data.get("byValue", False),
+            )
+            for param_data in parameters_data
+        ]
+
+    def _parse_function(self, func_data: dict) -> FunctionNode:
+        """Парсит функцию из JSON"""
+        func = FunctionNode(
+            self.names.intern(func_data.get("name", "unnamed"))
+        )
+
+        # Парсим параметры
+        if "parameters" in func_data:
+            func.parameters = self._parameters(func_data["parameters"])
+
+        # Парсим тело функции
+        if "body" in func_data:
+            self._set_body(func, func_data["body"])
+
+        return func
+
+    def _parse_procedure(self, proc_data: dict) -> ProcedureNode:
+        """Парсит процедуру из JSON"""
+        proc = ProcedureNode(
+            self.names.intern(proc_data.get("name", "unnamed"))
+        )
+
+        # Парсим параметры
+        if "parameters" in proc_data:
+            proc.parameters = self._parameters(proc_data["parameters"])
+
+        # Парсим тело процедуры
+        if "body" in proc_data:
+            self._set_body(proc, proc_data["body"])
+
+        return proc
+
+    def _set_body(self, method, body_data: list):
+        """Тело метода: сразу или при первом обращении (lazy_bodies)"""
+        if self.signatures_only:
+            return
+        if not self.lazy_bodies:
+            method.body = self._parse_statements(body_data)
+            return
+
+        def load_body():
+            try:
+                return self._parse_statements(body_data)
+            except Exception as e:
+                return [self._error(
+                    f"Не удалось разобрать тело {method.name}: {e}"
+                )]
+
+        method.set_body_loader(load_body)
+
+    def _parse_statements(self, statements_data: list) -> list:
+        """
+        Парсит список операторов.
+
+        Вложенные блоки (тела циклов, ветки Если, Попытка) обрабатываются
+        через явный стек, а не рекурсией: обработчик оператора создает
+        узел, присваивает ему пустые списки блоков (_block) и добавляет
+        пары (данные блока, список узла), которые разбираются позже.
+        Глубина вложенности не ограничена стеком вызовов Python.
+        Блоки оператора, обработчик которого упал, не разбираются:
+        вместо оператора остается только ErrorNode.
+        """
+        statements = []
+        work = [(statements_data, statements)]
+
+        while work:
+            block_data, block = work.pop()
+            nested = []
+            if not isinstance(block_data, list):
+                block.append(self._error(
+                    f"Блок операторов - не список: "
+                    f"{type(block_data).__name__}"
+                ))
+                continue
+
+            for stmt_data in block_data:
+                # Ошибка в одном операторе не отменяет разбор остальных
+                stmt_type = ""
+                registered = len(nested)
+                try:
+                    stmt_type = stmt_data.get("type", "")
+                    handler = _STATEMENT_HANDLERS.get(stmt_type)
+                    if handler is not None:
+                        block.append(handler(self, stmt_data, nested))
+                    elif stmt_type in _EXPRESSION_HANDLERS:
+                        # Вызов процедуры или метода как отдельный оператор
+                        block.append(self._parse_expression(stmt_data))
+                    else:
+                        self._unknown_type(stmt_type)
+                except Exception as e:
+                    del nested[registered:]
+                    block.append(self._error(
+                        f"Не удалось разобрать оператор {stmt_type}: {e}"
+                    ))
+
+            # Блоки разбираются независимо, порядок не важен
+            work.extend(nested)
+
+        return statements
+
+    def _parse_optional_expression(self, data: dict, *keys: str):
+        """Выражение из первого найденного ключа или None"""
+        for key in keys:
+            if data.get(key) is not None:
+                return self._parse_expression(data[key])
+        return None
+
+    def _parse_arguments(self, data: dict) -> list:
+        return [
+            self._parse_expression(arg) for arg in data.get("arguments", [])
+        ]
+
+    def _unknown_type(self, node_type: str):
+        """Неизвестный тип узла: учитываем, но не засоряем вывод"""
+        if node_type not in self.unknown_types:
+            logger.debug("Неизвестный тип узла BSL LS: %s", node_type)
+        self.unknown_types[node_type] += 1
+
+    # ------------------------------------------------------------------
+    # Операторы
+    # Обработчик получает данные оператора и список nested, куда
+    # добавляет пары (данные вложенного блока, список для его узлов).
+    # ------------------------------------------------------------------
+
+    def _parse_return_statement(self, stmt_data: dict,
+                                nested: list) -> ReturnStatementNode:
+        """Парсит оператор Возврат"""
+        stmt = ReturnStatementNode()
+
+        # Парсим выражение, если оно есть
+        if "expression" in stmt_data:
+            stmt.expression = self._parse_expression(stmt_data["expression"])
+
+        return stmt
+
+    def _parse_if_statement(self, stmt_data: dict,
+                            nested: list) -> IfStatementNode:
+        """Парсит оператор Если"""
+        stmt = IfStatementNode()
+
+        # Парсим условие
+        if "condition" in stmt_data:
+            stmt.condition = self._parse_expression(stmt_data["condition"])
+
+        # Ветка Тогда
+        if "thenStatements" in stmt_data:
+            stmt.then_branch = _block(nested, stmt_data["thenStatements"])
+
+        # Ветки ИначеЕсли
+        if "elseIfClauses" in stmt_data:
+            stmt.elif_branches = [
+                (self._parse_expression(clause["condition"]),
+                 _block(nested, clause["statements"]))
+                for clause in stmt_data["elseIfClauses"]
+            ]
+
+        # Ветка Иначе
+        if "elseStatements" in stmt_data:
+            stmt.else_branch = _block(nested, stmt_data["elseStatements"])
+
+        return stmt
+
+    def _parse_while_statement(self, stmt_data: dict,
+                               nested: list) -> WhileLoopNode:
+        """Парсит цикл Пока"""
+        stmt = WhileLoopNode()
+
+        # Парсим условие
+        if "condition" in stmt_data:
+            stmt.condition = self._parse_expression(stmt_data["condition"])
+
+        # Тело цикла
+        if "statements" in stmt_data:
+            stmt.body = _block(nested, stmt_data["statements"])
+
+        return stmt
+
+    def _parse_for_statement(self, stmt_data: dict,
+                             nested: list) -> ForLoopNode:
+        """Парсит цикл Для Счетчик = Начало По Конец"""
+        stmt = ForLoopNode()
+
+        stmt.variable = self._parse_optional_expression(stmt_data, "variable")
+        stmt.start = self._parse_optional_expression(
+            stmt_data, "start", "from"
+        )
+        stmt.end = self._parse_optional_expression(stmt_data, "end", "to")
+
+        if "statements" in stmt_data:
+            stmt.body = _block(nested, stmt_data["statements"])
+
+        return stmt
+
+    def _parse_for_each_statement(self, stmt_data: dict,
+                                  nested: list) -> ForEachLoopNode:
+        """Парсит цикл Для Каждого Элемент Из Коллекция"""
+        stmt = ForEachLoopNode()
+
+        stmt.variable = self._parse_optional_expression(stmt_data, "variable")
+        stmt.collection = self._parse_optional_expression(
+            stmt_data, "collection"
+        )
+
+        if "statements" in stmt_data:
+            stmt.body = _block(nested, stmt_data["statements"])
+
+        return stmt
+
+    def _parse_try_statement(self, stmt_data: dict,
+                             nested: list) -> TryStatementNode:
+        """Парсит оператор Попытка ... Исключение"""
+        stmt = TryStatementNode()
+
+        if "tryStatements" in stmt_data:
+            stmt.try_body = _block(nested, stmt_data["tryStatements"])
+        if "exceptStatements" in stmt_data:
+            stmt.except_body = _block(nested, stmt_data["exceptStatements"])
+
+        return stmt
+
+    def _parse_assignment(self, stmt_data: dict,
+                          nested: list) -> AssignmentNode:
+        """Парсит присваивание Слева = Справа"""
+        return AssignmentNode(
+            self._parse_expression(stmt_data["left"]),
+            self._parse_expression(stmt_data["right"]),
+        )
+
+    def _parse_call_statement(self, stmt_data: dict, nested: list) -> ASTNode:
+        """Парсит вызов процедуры как оператор"""
+        if "expression" in stmt_data:
+            return self._parse_expression(stmt_data["expression"])
+        return self._parse_expression(dict(stmt_data, type="call"))
+
+    def _parse_raise_statement(self, stmt_data: dict,
+                               nested: list) -> RaiseStatementNode:
+        """Парсит оператор ВызватьИсключение"""
+        stmt = RaiseStatementNode()
+
+        stmt.expression = self._parse_optional_expression(
+            stmt_data, "expression"
+        )
+        stmt.arguments = self._parse_arguments(stmt_data)
+
+        return stmt
+
+    def _parse_break_statement(self, stmt_data: dict,
+                               nested: list) -> BreakStatementNode:
+        return BreakStatementNode()
+
+    def _parse_continue_statement(self, stmt_data: dict,
+                                  nested: list) -> ContinueStatementNode:
+        return ContinueStatementNode()
+
+    # ------------------------------------------------------------------
+    # Выражения
+    # ------------------------------------------------------------------
+
+    def _parse_expression(self, expr_data: dict) -> ASTNode:
+        """
+        Парсит выражение без рекурсии.
+
+        Обход в обратном порядке через явный стек: узел раскрывается
+        в список дочерних выражений, а собирается, когда все они
+        готовы. Цепочки из десятков тысяч операндов (А + Б + В + ...)
+        обрабатываются за линейное время.
+        """
+        stack = [(expr_data, -1)]  # (данные, число готовых детей или -1)
+        results = []
+
+        while stack:
+            data, child_count = stack.pop()
+            expr_type = data.get("type", "")
+            handler = _EXPRESSION_HANDLERS.get(expr_type)
+
+            if handler is None:
+                self._unknown_type(expr_type)
+                results.append(ASTNode(NodeType.EXPRESSION))
+                continue
+
+            children_of, build = handler
+
+            if child_count < 0:
+                children = children_of(data)
+                if children:
+                    # Сначала соберем детей, потом вернемся к узлу
+                    stack.append((data, len(children)))
+                    stack.extend((child, -1) for child in reversed(children))
+                    continue
+                results.append(build(self, data, []))
+            else:
+                children = results[len(results) - child_count:]
+                del results[len(results) - child_count:]
+                results.append(build(self, data, children))
+
+        return results[0]
+
+    def _build_literal(self, expr_data: dict, children: list) -> LiteralNode:
+        # Литерал (число, строка, булево)
+        return LiteralNode(
+            value=expr_data.get("value"),
+            literal_type=expr_data.get("literalType", "unknown"),
+        )
+
+    def _build_variable(self, expr_data: dict,
+                        children: list) -> VariableNode:
+        # Переменная
+        return VariableNode(
+            name=self.names.intern(expr_data.get("name", "")),
+            is_export=expr_data.get("export", False),
+        )
+
+    def _build_binary_operation(self, expr_data: dict,
+                                children: list) -> BinaryOperationNode:
+        # Бинарная операция (a + b, a > b, ...)
+        left, right = children
+        return BinaryOperationNode(expr_data.get("operator", ""), left, right)
+
+    def _build_unary_operation(self, expr_data: dict,
+                               children: list) -> UnaryOperationNode:
+        # Унарная операция (-a, Не a)
+        return UnaryOperationNode(expr_data.get("operator", ""), children[0])
+
+    def _build_call(self, expr_data: dict,
+                    children: list) -> FunctionCallNode:
+        # Вызов функции или метода объекта (target - первый из детей)
+        target = None
+        if _call_target(expr_data) is not None:
+            target, children = children[0], children[1:]
+        return FunctionCallNode(
+            self.names.intern(expr_data.get("name", "")), children,
+            target=target,
+        )
+
+    def _build_member_access(self, expr_data: dict,
+                             children: list) -> MemberAccessNode:
+        # Обращение к свойству (Объект.Свойство)
+        member = expr_data.get("member", expr_data.get("name", ""))
+        return MemberAccessNode(children[0], self.names.intern(member))
+
+    def _build_index_access(self, expr_data: dict,
+                            children: list) -> IndexAccessNode:
+        # Обращение по индексу (Массив[0])
+        target, index = children
+        return IndexAccessNode(target, index)
+
+    def _build_new_object(self, expr_data: dict,
+                          children: list) -> NewObjectNode:
+        # Конструктор Новый ТипОбъекта(Параметры)
+        return NewObjectNode(
+            self.names.intern(expr_data.get("typeName", "")), children
+        )
+
+
+# Дочерние выражения узла в порядке, в котором их ждет сборщик
+
+def _no_children(expr_data: dict) -> list:
+    return []
+
+
+def _binary_children(expr_data: dict) -> list:
+    return [expr_data["left"], expr_data["right"]]
+
+
+def _unary_children(expr_data: dict) -> list:
+    return [expr_data["operand"]]
+
+
+def _block(nested: list, statements_data: list) -> list:
+    """Новый список для вложенного блока; заполняется позже (см. nested)"""
+    block = []
+    nested.append((statements_data, block))
+    return block
+
+
+def _call_target(expr_data: dict):
+    if expr_data.get("target") is not None:
+        return expr_data["target"]
+    return expr_data.get("object")
+
+
+def _call_children(expr_data: dict) -> list:
+    target = _call_target(expr_data)
+    arguments = list(expr_data.get("arguments", []))
+    return arguments if target is None else [target] + arguments
+
+
+def _member_children(expr_data: dict) -> list:
+    return [expr_data.get("target") or expr_data["object"]]
+
+
+def _index_children(expr_data: dict) -> list:
+    return [expr_data.get("target") or expr_data["object"],
+            expr_data["index"]]
+
+
+def _arguments_children(expr_data: dict) -> list:
+    return list(expr_data.get("arguments", []))
+
+
+# Таблицы обработчиков: тип узла BSL LS -> метод преобразования.
+# Поиск обработчика - одно обращение к словарю вместо цепочки if/elif.
+_STATEMENT_HANDLERS = {
+    "returnStatement": JsonAstConverter._parse_return_statement,
+    "ifStatement": JsonAstConverter._parse_if_statement,
+    "whileStatement": JsonAstConverter._parse_while_statement,
+    "forStatement": JsonAstConverter._parse_for_statement,
+    "forEachStatement": JsonAstConverter._parse_for_each_statement,
+    "tryStatement": JsonAstConverter._parse_try_statement,
+    "assignment": JsonAstConverter._parse_assignment,
+    "assignmentStatement": JsonAstConverter._parse_assignment,
+    "callStatement": JsonAstConverter._parse_call_statement,
+    "raiseStatement": JsonAstConverter._parse_raise_statement,
+    "breakStatement": JsonAstConverter._parse_break_statement,
+    "continueStatement": JsonAstConverter._parse_continue_statement,
+}
+
+# Тип выражения -> (дочерние выражения, сборка узла из готовых детей)
+_EXPRESSION_HANDLERS = {
+    "literal": (_no_children, JsonAstConverter._build_literal),
+    "variable": (_no_children, JsonAstConverter._build_variable),
+    "binaryOperation": (
+        _binary_children, JsonAstConverter._build_binary_operation
+    ),
+    "unaryOperation": (
+        _unary_children, JsonAstConverter._build_unary_operation
+    ),
+    "call": (_call_children, JsonAstConverter._build_call),
+    "functionCall": (_call_children, JsonAstConverter._build_call),
+    "methodCall": (_call_children, JsonAstConverter._build_call),
+    "memberAccess": (_member_children, JsonAstConverter._build_member_access),
+    "indexAccess": (_index_children, JsonAstConverter._build_index_access),
+    "newExpression": (
+        _arguments_children, JsonAstConverter._build_new_object
+    ),
+}
@@ -0,0 +1,152 @@
+import json
+from typing import IO, Iterator, Set, Tuple
+
+# Путь к массиву внутри документа: ("module", "procedures").
+# Пустой путь - документ целиком является массивом.
+JsonPath = Tuple[str, ...]
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonDepthError(ValueError):
+    """
+    JSON вложен глубже, чем позволяет стек Python: декодер json
+    рекурсивный и на такой глубине поднимает RecursionError
+    """
+
+    def __init__(self):
+        super().__init__("JSON вложен слишком глубоко для разбора")
+
+
+def decode_json(text: str):
+    """json.loads; слишком глубокая вложенность - JsonDepthError"""
+    try:
+        return json.loads(text)
+    except RecursionError:
+        raise JsonDepthError() from None
+
+
+class _StreamReader:
+    """
+    Буфер над текстовым потоком с разбором значений через raw_decode.
+
+    В памяти держится только непрочитанная часть потока: прочитанные
+    фрагменты сразу отбрасываются.
+    """
+
+    def __init__(self, stream: IO[str], chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, min_size: int = 0) -> bool:
+        """Дочитывает поток; False - данных больше нет"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(max(self.chunk_size, min_size))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Следующий значащий символ ("" - конец потока)"""
+        while True:
+            buffer = self.buffer
+            pos = self.pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(
+                f"Ожидался символ '{char}' в JSON, найдено '{self.peek()}'"
+            )
+        self.pos += 1
+
+    def decode_value(self):
+        """Разбирает одно JSON-значение целиком"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Значение обрезано границей порции: дочитываем не меньше,
+                # чем уже накоплено, чтобы повторные попытки стоили O(n)
+                if not self._fill(len(self.buffer) - self.pos):
+                    raise
+                continue
+            except RecursionError:
+                raise JsonDepthError() from None
+
+            if end == len(self.buffer) and not self.eof:
+                # Число на границе порции могло быть прочитано не полностью
+                if self._fill(len(self.buffer) - self.pos):
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(stream: IO[str], array_paths: Set[JsonPath],
+                    chunk_size: int = 64 * 1024
+                    ) -> Iterator[Tuple[JsonPath, object]]:
+    """
+    Потоково читает JSON-документ и по одному отдает элементы массивов,
+    расположенных по путям array_paths: (путь, элемент).
+
+    Объекты на пути к этим массивам обходятся по ключам, остальные
+    значения разбираются и сразу отбрасываются. Одновременно в памяти
+    находится только один элемент и непрочитанный остаток буфера.
+    """
+    reader = _StreamReader(stream, chunk_size)
+    prefixes = {path[:i] for path in array_paths for i in range(len(path))}
+    if reader.peek() == "":
+        return
+    yield from _iter_value(reader, (), array_paths, prefixes)
+
+
+def _iter_value(reader: _StreamReader, path: JsonPath,
+                array_paths: Set[JsonPath], prefixes: Set[JsonPath]):
+    char = reader.peek()
+
+    if path in array_paths and char == "[":
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.pos += 1
+            return
+        while True:
+            yield path, reader.decode_value()
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("]")
+            return
+
+    if path in prefixes and char == "{":
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.pos += 1
+            return
+        while True:
+            key = reader.decode_value()
+            reader.expect(":")
+            yield from _iter_value(
+                reader, path + (key,), array_paths, prefixes
+            )
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("}")
+            return
+
+    reader.decode_value()  # значение вне интересующих путей
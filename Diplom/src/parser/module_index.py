@@ -0,0 +1,381 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .ast_nodes import (
+    ASTNode, ErrorNode, FunctionCallNode, MethodNode, ModuleNode, NodeType,
+    VariableNode, node_fields,
+)
+from .ast_schema import NODE_CHILDREN, NODE_TYPES
+from .names import NAMES, NamePool
+from .structural_hash import HashConsTable
+
+# Атрибуты без вложенных узлов дерева - для классов, которых нет
+# в схеме узлов (ast_schema)
+_SCALAR_FIELDS = {
+    "node_type", "range", "name", "is_export", "by_value",
+    "has_default_value", "operator", "value", "literal_type", "member",
+    "type_name", "message", "source", "errors", "_trivia", "_regions",
+    "_module_index",
+}
+# Атрибуты с вложенными узлами по виду узла, в порядке текста: вид,
+# а не класс, чтобы у представлений FlatAST порядок был тем же. Ошибки
+# модуля - отдельный список, часть из них есть и в дереве
+_CHILD_FIELDS: Dict[NodeType, Tuple[str, ...]] = {
+    NODE_TYPES[node_class]: tuple(
+        name for name in fields if name != "errors"
+    )
+    for node_class, fields in NODE_CHILDREN.items()
+}
+_CLASS_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+_NO_POSITION = (0, 0)
+_DEEPEST = 1 << 30  # глубина больше любой: ключ после всех узлов позиции
+_METHOD_KINDS = (NodeType.PROCEDURE, NodeType.FUNCTION)
+
+
+def child_nodes(node: ASTNode) -> List[ASTNode]:
+    """
+    Вложенные узлы в порядке текста (у модуля - переменные, функции,
+    процедуры, затем операторы). Ленивое тело метода строится.
+    """
+    fields = _CHILD_FIELDS.get(node.node_type)
+    if fields is None:
+        node_class = type(node)
+        fields = _CLASS_FIELDS.get(node_class)
+        if fields is None:
+            fields = _CLASS_FIELDS[node_class] = tuple(
+                name for name in node_fields(node_class)
+                if name not in _SCALAR_FIELDS
+            )
+    children = []
+    for name in fields:
+        value = getattr(node, name)
+        if isinstance(value, ASTNode):
+            children.append(value)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                if isinstance(item, ASTNode):
+                    children.append(item)
+                elif isinstance(item, tuple):
+                    # ИначеЕсли: (условие, операторы)
+                    children.append(item[0])
+                    children.extend(item[1])
+    return children
+
+
+def _error_key(error: ErrorNode) -> tuple:
+    if error.range is None:
+        return None, error.message
+    start, end = error.range.start, error.range.end
+    return start.line, start.column, end.line, end.column, error.message
+
+
+def _position(node: ASTNode) -> Tuple[int, int]:
+    if node.range is None:
+        return _NO_POSITION
+    return node.range.start.line, node.range.start.column
+
+
+class ModuleIndex:
+    """
+    Индекс узлов модуля, строится одним обходом дерева:
+
+    - вид узла -> узлы в порядке текста (выборка по диапазону строк -
+      двоичным поиском);
+    - номер имени в пуле -> объявления (переменные модуля и Перем
+      в методах, методы, параметры) и использования (остальные
+      переменные, вызовы без объекта);
+    - строка -> самый вложенный узел, который ее содержит (из узлов
+      одной глубины на строке - первый);
+    - родитель каждого узла и начала узлов по возрастанию: диапазоны
+      узлов вложены друг в друга, поэтому узел в позиции находится
+      двоичным поиском и подъемом по родителям, а охватывающий цикл
+      или метод - подъемом по родителям, без обхода дерева.
+
+    Родители хранятся в индексе, а не в узлах: в узлах ссылку
+    пришлось бы поддерживать парсеру, ast_codec и повторному разбору
+    методов, и она занимала бы место и там, где индекс не нужен. Так же
+    хранятся структурные хэши узлов (structural_hash).
+    """
+
+    def __init__(self, names: NamePool = NAMES):
+        self.names = names
+        self._generation = names.generation
+        self._by_kind: Dict[NodeType, List[ASTNode]] = {}
+        self._starts: Dict[NodeType, List[Tuple[int, int]]] = {}
+        self._definitions: Dict[int, List[ASTNode]] = {}
+        self._usages: Dict[int, List[ASTNode]] = {}
+        self._lines: List[Optional[ASTNode]] = [None]  # строка -> узел
+        self._depths = array("i", [-1])
+        # Узлы в порядке обхода, их номера и номера родителей
+        self._nodes: List[ASTNode] = []
+        self._numbers: Dict[ASTNode, int] = {}
+        self._parents = array("i")
+        self._node_depths = array("i")
+        # Номера узлов с диапазоном по возрастанию (начало, глубина)
+        self._by_start = array("i")
+        self._start_keys: List[Tuple[int, int, int]] = []
+        # normalize_names -> (таблица форм, номер формы по номеру узла)
+        self._shapes: Dict[bool, Tuple[HashConsTable, array]] = {}
+
+    def __len__(self) -> int:
+        """Число узлов в индексе"""
+        return len(self._nodes)
+
+    def __contains__(self, node: ASTNode) -> bool:
+        return node in self._numbers
+
+    def of_kind(self, kind: NodeType,
+                within: ASTNode = None) -> List[ASTNode]:
+        """
+        Узлы вида kind в порядке текста; within - только узлы, которые
+        начинаются внутри диапазона узла within
+        """
+        nodes = self._by_kind.get(kind, [])
+        if within is None:
+            return nodes
+        if within.range is None or not nodes:
+            return []
+        starts = self._starts[kind]
+        start, end = within.range.start, within.range.end
+        first = bisect_left(starts, (start.line, start.column))
+        last = bisect_right(starts, (end.line, end.column))
+        return nodes[first:last]
+
+    def of_kinds(self, kinds: Iterable[NodeType],
+                 within: ASTNode = None) -> List[ASTNode]:
+        """Узлы нескольких видов в порядке текста"""
+        nodes = [node for kind in kinds
+                 for node in self.of_kind(kind, within)]
+        nodes.sort(key=_position)
+        return nodes
+
+    def definitions(self, name: str) -> List[ASTNode]:
+        """Объявления имени name (без учета регистра)"""
+        self._check_generation()
+        name_id = self.names.find(name)
+        return self._definitions.get(name_id, [])
+
+    def usages(self, name: str) -> List[ASTNode]:
+        """Использования имени name (без учета регистра)"""
+        self._check_generation()
+        name_id = self.names.find(name)
+        return self._usages.get(name_id, [])
+
+    def at_line(self, line: int) -> Optional[ASTNode]:
+        """Самый вложенный узел, содержащий строку line"""
+        if 0 < line < len(self._lines):
+            return self._lines[line]
+        return None
+
+    def parent(self, node: ASTNode) -> Optional[ASTNode]:
+        """Родитель узла (None у модуля и у узлов не из индекса)"""
+        number = self._numbers.get(node)
+        if number is None or self._parents[number] < 0:
+            return None
+        return self._nodes[self._parents[number]]
+
+    def ancestors(self, node: ASTNode) -> Iterator[ASTNode]:
+        """Узлы, в которые вложен node, от ближайшего до модуля"""
+        number = self._numbers.get(node)
+        if number is None:
+            return
+        number = self._parents[number]
+        while number >= 0:
+            yield self._nodes[number]
+            number = self._parents[number]
+
+    def enclosing(self, node: ASTNode,
+                  kinds: Union[NodeType, Iterable[NodeType]]
+                  ) -> Optional[ASTNode]:
+        """Ближайший охватывающий узел вида kinds (цикл, метод...)"""
+        if isinstance(kinds, NodeType):
+            kinds = (kinds,)
+        for ancestor in self.ancestors(node):
+            if ancestor.node_type in kinds:
+                return ancestor
+        return None
+
+    def method_of(self, node: ASTNode) -> Optional[MethodNode]:
+        """Процедура или функция, в которой находится node"""
+        return self.enclosing(node, _METHOD_KINDS)
+
+    def node_at(self, line: int, column: int) -> Optional[ASTNode]:
+        """Самый вложенный узел, диапазон которого содержит позицию"""
+        found = bisect_right(self._start_keys, (line, column, _DEEPEST))
+        if not found:
+            return None
+        number = self._by_start[found - 1]
+        position = (line, column)
+        nodes, parents = self._nodes, self._parents
+        # Узлы, начатые до позиции и не содержащие ее, закончились
+        # раньше; содержащий узел - среди предков последнего начатого
+        while number >= 0:
+            node_range = nodes[number].range
+            if (node_range is not None and position
+                    < (node_range.end.line, node_range.end.column)):
+                return nodes[number]
+            number = parents[number]
+        return None
+
+    def structural_hash(self, node: ASTNode,
+                        normalize_names: bool = False) -> int:
+        """
+        Хэш поддерева node без учета позиций (см. HashConsTable). Формы
+        всех узлов модуля строятся одним обходом при первом вызове,
+        дальше хэш узла берется из индекса без обхода поддерева.
+        """
+        cached = self._shapes.get(normalize_names)
+        if cached is None:
+            table = HashConsTable(normalize_names)
+            shape_ids = array("i", [-1]) * len(self._nodes)
+            numbers = self._numbers
+
+            def visit(tree_node: ASTNode, shape_id: int):
+                number = numbers.get(tree_node)
+                if number is not None:
+                    shape_ids[number] = shape_id
+
+            table.add(self._nodes[0], visit)
+            cached = self._shapes[normalize_names] = table, shape_ids
+        table, shape_ids = cached
+
+        number = self._numbers.get(node)
+        if number is None or shape_ids[number] < 0:
+            # Узел не из дерева модуля (например, ошибка вне дерева)
+            return table.structural_hash(node)
+        return int.from_bytes(table.digest(shape_ids[number]), "big")
+
+    def _add(self, node: ASTNode, depth: int, definition: bool,
+             parent: int) -> int:
+        number = len(self._nodes)
+        self._nodes.append(node)
+        self._numbers[node] = number
+        self._parents.append(parent)
+        self._node_depths.append(depth)
+
+        kind = node.node_type
+        nodes = self._by_kind.get(kind)
+        if nodes is None:
+            nodes = self._by_kind[kind] = []
+            self._starts[kind] = []
+        nodes.append(node)
+        node_range = node.range
+        if node_range is None:
+            self._starts[kind].append(_NO_POSITION)
+        else:
+            start = node_range.start
+            self._starts[kind].append((start.line, start.column))
+            self._paint(node, depth)
+
+        node_class = type(node)
+        if definition:
+            self._name_list(self._definitions, node.name).append(node)
+        elif issubclass(node_class, VariableNode):
+            self._name_list(self._usages, node.name).append(node)
+        elif (issubclass(node_class, FunctionCallNode)
+              and node.target is None):
+            self._name_list(self._usages, node.name).append(node)
+        return number
+
+    def _name_list(self, table: Dict[int, List[ASTNode]],
+                   name: str) -> List[ASTNode]:
+        name_id = self.names.id(name)
+        nodes = table.get(name_id)
+        if nodes is None:
+            nodes = table[name_id] = []
+        return nodes
+
+    def _check_generation(self):
+        """После names.reset() таблицы имен переводятся на новые номера"""
+        if self._generation == self.names.generation:
+            return
+        self._generation = self.names.generation
+        for table in (self._definitions, self._usages):
+            nodes = [node for group in table.values() for node in group]
+            table.clear()
+            for node in nodes:
+                self._name_list(table, node.name).append(node)
+
+    def _paint(self, node: ASTNode, depth: int):
+        """Узел занимает свои строки, если там нет узла глубже"""
+        first, last = node.range.start.line, node.range.end.line
+        lines, depths = self._lines, self._depths
+        if last >= len(lines):
+            grow = last + 1 - len(lines)
+            lines.extend([None] * grow)
+            depths.extend([-1] * grow)
+        for line in range(first, last + 1):
+            if depths[line] < depth:
+                depths[line] = depth
+                lines[line] = node
+
+    def _sort(self):
+        """Узлы обходятся почти в порядке текста; досортировываются"""
+        depths = self._node_depths
+        keys = []
+        for number, node in enumerate(self._nodes):
+            if node.range is not None:
+                start = node.range.start
+                keys.append((start.line, start.column, depths[number],
+                             number))
+        keys.sort()
+        self._by_start = array("i", [key[3] for key in keys])
+        self._start_keys = [key[:3] for key in keys]
+
+        for kind, nodes in self._by_kind.items():
+            starts = self._starts[kind]
+            ordered = sorted(starts)
+            if ordered != starts:
+                order = sorted(range(len(nodes)), key=starts.__getitem__)
+                nodes[:] = [nodes[i] for i in order]
+                self._starts[kind] = ordered
+
+
+def build_module_index(module: ModuleNode,
+                       names: NamePool = NAMES) -> ModuleIndex:
+    """
+    Строит индекс модуля. Ленивые тела методов при этом строятся;
+    ошибки разбора берутся из module.errors (не все из них входят
+    в дерево).
+    """
+    index = ModuleIndex(names)
+    root = index._add(module, 0, False, -1)
+
+    # (узел, глубина, объявление ли, номер родителя)
+    stack = []
+    for variable in reversed(module.variables):
+        stack.append((variable, 1, True, root))
+    for node in reversed(module.body):
+        stack.append((node, 1, False, root))
+    for method in reversed(module.procedures):
+        stack.append((method, 1, True, root))
+    for method in reversed(module.functions):
+        stack.append((method, 1, True, root))
+
+    while stack:
+        node, depth, definition, parent = stack.pop()
+        number = index._add(node, depth, definition, parent)
+
+        if isinstance(node, MethodNode):
+            # Перем в начале тела - объявления локальных переменных
+            for child in reversed(node.body):
+                stack.append((child, depth + 1,
+                              isinstance(child, VariableNode), number))
+            for parameter in reversed(node.parameters):
+                stack.append((parameter, depth + 1, True, number))
+        else:
+            for child in reversed(child_nodes(node)):
+                stack.append((child, depth + 1, False, number))
+
+    # Ошибки, не вошедшие в дерево (например, метод без имени). Во
+    # FlatAST ошибки модуля - отдельные копии узлов дерева: совпадающие
+    # по месту и тексту уже проиндексированы
+    indexed = {_error_key(error)
+               for error in index.of_kind(NodeType.ERROR)}
+    for error in module.errors:
+        if error not in index and _error_key(error) not in indexed:
+            index._add(error, 1, False, root)
+    index._sort()
+    return index
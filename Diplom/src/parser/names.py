@@ -0,0 +1,78 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class NamePool:
+    """
+    Пул идентификаторов: одно имя - один объект str на весь запуск
+    и целочисленный номер без учета регистра (в языке 1С "Запрос"
+    и "ЗАПРОС" - одно имя).
+
+    Номер вычисляется один раз на написание имени, дальше - поиск
+    в словаре: правила сравнивают номера, а не результаты lower().
+
+    Пул растет вместе с числом разных имен, поэтому долгоживущий
+    процесс (сервер, REST API) вызывает reset() между запусками.
+    После сброса номера выдаются заново и увеличивается generation:
+    кэши по номерам имен сверяют его и очищаются.
+    """
+
+    def __init__(self):
+        self.generation = 0  # номер запуска: растет при каждом reset()
+        self._strings: Dict[str, str] = {}  # написание -> общий объект
+        self._ids: Dict[str, int] = {}  # написание -> номер
+        self._keys: Dict[str, int] = {}  # имя в нижнем регистре -> номер
+        self._spellings: List[str] = []  # номер -> первое написание
+
+    def reset(self):
+        """Забывает все имена: номера, выданные до сброса, недействительны"""
+        self._strings.clear()
+        self._ids.clear()
+        self._keys.clear()
+        self._spellings.clear()
+        self.generation += 1
+
+    def __len__(self) -> int:
+        """Сколько имен получили номер (без учета регистра)"""
+        return len(self._spellings)
+
+    def intern(self, name: str) -> str:
+        """Общий объект для имени name (такое же имя - тот же объект)"""
+        interned = self._strings.get(name)
+        if interned is None:
+            interned = self._strings[name] = name
+        return interned
+
+    def id(self, name: str) -> int:
+        """Номер имени без учета регистра; новое имя получает номер"""
+        name_id = self._ids.get(name)
+        if name_id is None:
+            key = name.lower()
+            name_id = self._keys.get(key)
+            if name_id is None:
+                name_id = self._keys[key] = len(self._spellings)
+                self._spellings.append(self.intern(name))
+            self._ids[self.intern(name)] = name_id
+        return name_id
+
+    def find(self, name: str) -> Optional[int]:
+        """Номер имени, если оно уже встречалось, иначе None"""
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = self._keys.get(name.lower())
+        return name_id
+
+    def ids(self, names: Iterable[str]) -> Set[int]:
+        """Номера набора имен (например, списка исключений правила)"""
+        return {self.id(name) for name in names}
+
+    def spelling(self, name_id: int) -> str:
+        """Имя с номером name_id в том написании, что встретилось первым"""
+        return self._spellings[name_id]
+
+    def same(self, first: str, second: str) -> bool:
+        """Одно ли это имя без учета регистра"""
+        return first is second or self.id(first) == self.id(second)
+
+
+# Пул запуска: общий для парсеров и правил, если пул не задан явно
+NAMES = NamePool()
@@ -0,0 +1,1035 @@
+import time
+from bisect import bisect_left
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .ast_nodes import (
+    ASTNode,
+    AssignmentNode,
+    BinaryOperationNode,
+    BreakStatementNode,
+    ContinueStatementNode,
+    ErrorNode,
+    ForEachLoopNode,
+    ForLoopNode,
+    FunctionCallNode,
+    FunctionNode,
+    IfStatementNode,
+    IndexAccessNode,
+    LiteralNode,
+    MemberAccessNode,
+    ModuleNode,
+    NewObjectNode,
+    ParameterNode,
+    Position,
+    ProcedureNode,
+    RaiseStatementNode,
+    Range,
+    ReturnStatementNode,
+    TryStatementNode,
+    UnaryOperationNode,
+    VariableNode,
+    WhileLoopNode,
+)
+from .backend import ParserBackend
+from .budget import ParseBudget, ParseTimeoutError, current_deadline
+from .incremental import TextEdit, apply_edits, reparse_methods
+from .names import NAMES, NamePool
+from .source import SourceText, normalize_newlines
+from .trivia import TriviaTable
+from .bsl_lexer import (
+    ANNOTATION,
+    DATE,
+    KEYWORD,
+    LABEL,
+    NAME,
+    NUMBER,
+    OPERATOR,
+    PUNCT,
+    STRING,
+    Token,
+    tokenize,
+)
+
+
+class BSLSyntaxError(Exception):
+    """Синтаксическая ошибка в исходном тексте модуля"""
+
+    def __init__(self, message: str, line: int = 0, column: int = 0):
+        super().__init__(f"{message} (строка {line}, колонка {column})")
+        self.line = line
+        self.column = column
+
+
+class NativeBSLParser(ParserBackend):
+    """
+    Встроенный парсер языка 1С: лексер + рекурсивный спуск.
+
+    Строит ModuleNode напрямую из токенов, без JVM, без промежуточного
+    JSON и без запуска процессов.
+
+    tolerant=True - при синтаксической ошибке разбор не прерывается:
+    на месте ошибочного оператора или метода остается ErrorNode
+    (он же попадает в module.errors), разбор продолжается со следующего
+    оператора или метода. При tolerant=False поднимается BSLSyntaxError.
+
+    lazy_bodies=True - при разборе модуля тела методов только
+    пропускаются до КонецПроцедуры/КонецФункции; операторы строятся
+    из сохраненных токенов при первом обращении к body. Ошибки в теле
+    попадают в module.errors (или поднимаются) в момент обращения.
+
+    budget.timeout проверяется при разбиении на токены и перед каждым
+    оператором: при превышении поднимается ParseTimeoutError, в ее
+    module - модуль с тем, что разобрано до этого (без метода, на
+    котором истекло время). Ленивые тела проверяют срок охватывающего
+    deadline_scope (см. ParserBackend.parse_outcome).
+
+    names - пул, через который проходят идентификаторы (имена
+    переменных, параметров, методов, свойств): одинаковые имена во всех
+    модулях - один объект str. По умолчанию общий пул запуска NAMES.
+    """
+
+    name = "native"
+
+    def __init__(self, tolerant: bool = True, lazy_bodies: bool = False,
+                 budget: ParseBudget = None, names: NamePool = None):
+        self.tolerant = tolerant
+        self.lazy_bodies = lazy_bodies
+        self.budget = budget or ParseBudget()
+        self.names = names if names is not None else NAMES
+
+    def parse_string(self, code: str, module_name: str = "module.bsl",
+                     signatures_only: bool = False) -> ModuleNode:
+        deadline = current_deadline()
+        if self.budget.timeout is not None:
+            own = time.monotonic() + self.budget.timeout
+            deadline = own if deadline is None else min(deadline, own)
+        # Позиции считаются по \n, как в тексте из load_source
+        code = normalize_newlines(code)
+        try:
+            module = _ModuleParser(
+                code, module_name, self.tolerant, self.lazy_bodies,
+                signatures_only, deadline, names=self.names,
+            ).parse_module()
+        except ParseTimeoutError as e:
+            if e.module is not None:
+                e.module.source = SourceText(code)
+            raise
+        module.source = SourceText(code)
+        return module
+
+    def reparse(self, module: ModuleNode,
+                edits: Sequence[TextEdit]) -> ModuleNode:
+        """
+        Инкрементальный разбор: если все правки лежат внутри тел методов,
+        заново токенизируются и разбираются только эти методы, а позиции
+        узлов после них сдвигаются. Иначе - полный разбор нового текста.
+
+        Позиции в телах методов ниже правки пересчитываются при первом
+        обращении к body. Узлы module переиспользуются: после вызова
+        работать нужно с возвращенным модулем.
+        """
+        if module.source is None:
+            raise ValueError(f"У модуля {module.name} нет исходного текста")
+        new_module = reparse_methods(
+            module, edits,
+            lambda code, start, end: self._parse_span(
+                code, module.name, start, end
+            ),
+        )
+        if new_module is not None:
+            return new_module
+        text, _ = apply_edits(module.source.text, edits, module.source)
+        return self._parse_edited(module, text)
+
+    def _parse_span(self, code: str, module_name: str, start: int,
+                    end: int) -> Optional[ModuleNode]:
+        """
+        Разбор части текста с одним методом. None, если часть не
+        заканчивается концом метода или содержит ошибку при
+        tolerant=False: тогда результат может зависеть от текста за
+        границей части, и нужен полный разбор.
+        """
+        parser = _ModuleParser(code, module_name, self.tolerant,
+                               span=(start, end), names=self.names)
+        if not parser.tokens:
+            return None
+        last = parser.tokens[-1]
+        if last[0] != KEYWORD or last[1] not in _END_KEYWORDS.values():
+            return None
+        try:
+            return parser.parse_module()
+        except BSLSyntaxError:
+            return None
+
+
+# Конец файла: вид 0 не совпадает ни с одним видом токена
+_EOF: Token = (0, "", 0, 0, 0, 0)
+
+_COMPARISON_OPERATORS = {"=", "<>", "<", ">", "<=", ">="}
+_ADDITIVE_OPERATORS = {"+", "-"}
+_MULTIPLICATIVE_OPERATORS = {"*", "/", "%"}
+
+_METHOD_KEYWORDS = {"procedure", "function", "async"}
+_END_KEYWORDS = {
+    "procedure": "endprocedure",
+    "function": "endfunction",
+}
+# Границы методов: восстановление после ошибки не переходит через них
+_METHOD_BOUNDARY_KEYWORDS = _METHOD_KEYWORDS | set(_END_KEYWORDS.values())
+
+
+# Срок проверяется при разбиении на токены через столько токенов
+_DEADLINE_STEP = 4096
+
+
+def _until_deadline(tokens: Iterator[Token], deadline: float,
+                    name: str) -> Iterator[Token]:
+    """Токены потока; каждые _DEADLINE_STEP токенов проверяется срок"""
+    count = 0
+    for tok in tokens:
+        yield tok
+        count += 1
+        if count == _DEADLINE_STEP:
+            count = 0
+            if time.monotonic() > deadline:
+                raise ParseTimeoutError(
+                    f"Разбор модуля {name} превысил бюджет времени "
+                    f"при разбиении на токены (строка {tok[4]})"
+                )
+
+
+class _ModuleParser:
+    """Состояние разбора одного модуля"""
+
+    def __init__(self, code: str, name: str, tolerant: bool = True,
+                 lazy_bodies: bool = False, signatures_only: bool = False,
+                 deadline: float = None, span: Tuple[int, int] = None,
+                 names: NamePool = NAMES):
+        """span - разобрать только часть текста (start, end)"""
+        self.code = code
+        self.name = name
+        self.names = names
+        self.tolerant = tolerant
+        self.lazy_bodies = lazy_bodies
+        self.signatures_only = signatures_only
+        self.deadline = deadline  # time.monotonic() окончания бюджета
+        self.errors: List[ErrorNode] = []
+        self.method: Optional[ASTNode] = None  # разбираемый метод
+        # Комментарии и инструкции препроцессора не влияют на структуру
+        # операторов: они уходят в таблицу trivia модуля
+        start, end = span or (0, None)
+        self.trivia = TriviaTable(code)
+        tokens = tokenize(code, start=start, end=end)
+        if deadline is not None:
+            tokens = _until_deadline(tokens, deadline, name)
+        self.tokens: List[Token] = self.trivia.split_tokens(tokens, start)
+        self.pos = 0
+        self.last: Token = _EOF  # последний прочитанный токен
+
+        # Позиции ключевых слов-границ методов для пропуска тел
+        self._boundaries: List[int] = []
+        if lazy_bodies or signatures_only:
+            self._boundaries = [
+                i for i, tok in enumerate(self.tokens)
+                if tok[0] == KEYWORD and tok[1] in _METHOD_BOUNDARY_KEYWORDS
+            ]
+
+        self._statement_handlers = {
+            "var": self._parse_local_variables,
+            "if": self._parse_if_statement,
+            "while": self._parse_while_statement,
+            "for": self._parse_for_statement,
+            "try": self._parse_try_statement,
+            "return": self._parse_return_statement,
+            "raise": self._parse_raise_statement,
+            "break": self._parse_break_statement,
+            "continue": self._parse_continue_statement,
+            "goto": self._parse_goto_statement,
+            "execute": self._parse_execute_statement,
+            "addhandler": self._parse_handler_statement,
+            "removehandler": self._parse_handler_statement,
+        }
+
+    # ------------------------------------------------------------------
+    # Работа с токенами
+    # ------------------------------------------------------------------
+
+    def _peek(self) -> Token:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return _EOF
+
+    def _advance(self) -> Token:
+        tok = self._peek()
+        if tok is not _EOF:
+            self.pos += 1
+            self.last = tok
+        return tok
+
+    def _at_keyword(self, *keywords: str) -> bool:
+        tok = self._peek()
+        return tok[0] == KEYWORD and tok[1] in keywords
+
+    def _at_punct(self, punct: str) -> bool:
+        tok = self._peek()
+        return tok[0] == PUNCT and tok[1] == punct
+
+    def _at_operator(self, operator: str) -> bool:
+        tok = self._peek()
+        return tok[0] == OPERATOR and tok[1] == operator
+
+    def _expect_keyword(self, keyword: str) -> Token:
+        if not self._at_keyword(keyword):
+            self._error(f"Ожидалось ключевое слово {keyword}")
+        return self._advance()
+
+    def _expect_punct(self, punct: str) -> Token:
+        if not self._at_punct(punct):
+            self._error(f"Ожидался символ '{punct}'")
+        return self._advance()
+
+    def _expect_name(self) -> Token:
+        if self._peek()[0] != NAME:
+            self._error("Ожидался идентификатор")
+        return self._advance()
+
+    def _skip_semicolons(self):
+        while self._at_punct(";"):
+            self._advance()
+
+    def _error(self, message: str):
+        tok = self._peek()
+        if tok is _EOF:
+            raise BSLSyntaxError(
+                f"{message}: неожиданный конец модуля",
+                self.last[4], self.last[5],
+            )
+        raise BSLSyntaxError(
+            f"{message}, найдено '{self._text(tok)}'", tok[4], tok[5]
+        )
+
+    def _text(self, tok: Token) -> str:
+        """Исходный текст токена (для ключевых слов - как в модуле)"""
+        return self.code[tok[2]:tok[3]]
+
+    def _name(self, tok: Token) -> str:
+        """Идентификатор из пула имен"""
+        return self.names.intern(self.code[tok[2]:tok[3]])
+
+    # ------------------------------------------------------------------
+    # Позиции
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _start(tok: Token) -> Position:
+        return Position(tok[4], tok[5])
+
+    def _end(self, tok: Token) -> Position:
+        """Позиция сразу за последним символом токена"""
+        if tok[0] == STRING:
+            text = self._text(tok)
+            breaks = text.count("\n")
+            if breaks:
+                return Position(
+                    tok[4] + breaks, len(text) - text.rfind("\n")
+                )
+        return Position(tok[4], tok[5] + tok[3] - tok[2])
+
+    def _range_from(self, start_tok: Token) -> Range:
+        """Диапазон от start_tok до последнего прочитанного токена"""
+        return Range(self._start(start_tok), self._end(self.last))
+
+    # ------------------------------------------------------------------
+    # Модуль
+    # ------------------------------------------------------------------
+
+    def parse_module(self) -> ModuleNode:
+        module = ModuleNode(self.name)
+        try:
+            self._parse_module_items(module)
+        except ParseTimeoutError as e:
+            # Частичный результат: модуль до последнего разобранного
+            # токена
+            module.errors = self.errors
+            module.trivia = self.trivia
+            if self.last is not _EOF:
+                module.range = Range(Position(1, 1), self._end(self.last))
+            e.module = module
+            raise
+
+        module.errors = self.errors
+        module.trivia = self.trivia
+        if self.tokens:
+            module.range = Range(
+                Position(1, 1), self._end(self.tokens[-1])
+            )
+        return module
+
+    def _parse_module_items(self, module: ModuleNode):
+        """Переменные, методы и операторы модуля до конца текста"""
+        while self._peek() is not _EOF:
+            self._check_deadline()
+            tok = self._peek()
+
+            if tok[0] == ANNOTATION:
+                self._skip_annotation()
+            elif tok[0] == KEYWORD and tok[1] == "var":
+                variables = self._parse_statement_tolerant()
+                if isinstance(variables, list):
+                    module.variables.extend(variables)
+                elif variables is not None:
+                    module.body.append(variables)  # ErrorNode
+            elif tok[0] == KEYWORD and tok[1] in _METHOD_KEYWORDS:
+                method = self._parse_method_tolerant()
+                if isinstance(method, FunctionNode):
+                    module.functions.append(method)
+                elif method is not None:
+                    module.procedures.append(method)
+            else:
+                statement = self._parse_statement_tolerant()
+                if isinstance(statement, list):
+                    module.body.extend(statement)
+                elif statement is not None:
+                    module.body.append(statement)
+
+    def _skip_annotation(self):
+        """&НаСервере, &Перед("Метод") - директивы перед методом"""
+        self._advance()
+        if self._at_punct("("):
+            self._parse_arguments()
+
+    def _parse_variables(self) -> List[VariableNode]:
+        """Перем А, Б Экспорт;"""
+        self._expect_keyword("var")
+        variables = []
+
+        while True:
+            name_tok = self._expect_name()
+            var = VariableNode(self._name(name_tok))
+            if self._at_keyword("export"):
+                self._advance()
+                var.is_export = True
+            var.range = self._range_from(name_tok)
+            variables.append(var)
+
+            if not self._at_punct(","):
+                break
+            self._advance()
+
+        self._skip_semicolons()
+        return variables
+
+    def _parse_method(self) -> ASTNode:
+        """Процедура/Функция Имя(Параметры) [Экспорт] ... Конец"""
+        start_tok = self._peek()
+        if self._at_keyword("async"):
+            self._advance()
+
+        kind_tok = self._advance()
+        if kind_tok[0] != KEYWORD or kind_tok[1] not in _END_KEYWORDS:
+            self._error("Ожидалось Процедура или Функция")
+
+        name = self._name(self._expect_name())
+        if kind_tok[1] == "function":
+            method = FunctionNode(name)
+        else:
+            method = ProcedureNode(name)
+        self.method = method
+
+        method.parameters = self._parse_parameters()
+
+        if self._at_keyword("export"):
+            self._advance()
+            method.is_export = True
+
+        end_keyword = _END_KEYWORDS[kind_tok[1]]
+        if self.lazy_bodies or self.signatures_only:
+            self._defer_body(method, end_keyword)
+        else:
+            method.body = self._parse_statements({end_keyword})
+        self._expect_keyword(end_keyword)
+        method.range = self._range_from(start_tok)
+        return method
+
+    def _defer_body(self, method: ASTNode, end_keyword: str):
+        """
+        Переходит к первой границе метода после заголовка; тело будет
+        разобрано с позиции start при первом обращении к method.body
+        (в режиме signatures_only тело остается пустым)
+        """
+        start = self.pos
+        index = bisect_left(self._boundaries, start)
+        if index < len(self._boundaries):
+            self.pos = self._boundaries[index]
+        else:
+            self.pos = len(self.tokens)
+        if self.pos > start:
+            self.last = self.tokens[self.pos - 1]
+
+        if self.signatures_only:
+            return
+        method.set_body_loader(
+            lambda: self._parse_deferred_body(start, end_keyword, method)
+        )
+
+    def _parse_deferred_body(self, start: int, end_keyword: str,
+                             method: ASTNode) -> List[ASTNode]:
+        # Бюджет разбора модуля к телу не относится: тело проверяет
+        # срок охватывающего deadline_scope, если он есть
+        saved = self.pos, self.last, self.method, self.deadline
+        self.pos = start
+        self.last = self.tokens[start - 1]
+        self.method = method
+        self.deadline = current_deadline()
+        errors = len(self.errors)
+        try:
+            return self._parse_statements({end_keyword})
+        except ParseTimeoutError:
+            # Тело будет разобрано заново: его ошибки не дублируются
+            del self.errors[errors:]
+            raise
+        finally:
+            self.pos, self.last, self.method, self.deadline = saved
+
+    def _parse_parameters(self) -> List[ParameterNode]:
+        """(Знач А, Б = 1)"""
+        self._expect_punct("(")
+        parameters = []
+
+        while not self._at_punct(")"):
+            start_tok = self._peek()
+            by_value = False
+            if self._at_keyword("val"):
+                self._advance()
+                by_value = True
+
+            param = ParameterNode(
+                self._name(self._expect_name()), by_value=by_value
+            )
+            if self._at_operator("="):
+                self._advance()
+                param.has_default_value = True
+                param.default_value = self._parse_unary()
+            param.range = self._range_from(start_tok)
+            parameters.append(param)
+
+            if not self._at_punct(","):
+                break
+            self._advance()
+
+        self._expect_punct(")")
+        return parameters
+
+    # ------------------------------------------------------------------
+    # Операторы
+    # ------------------------------------------------------------------
+
+    def _parse_statements(self, terminators: set) -> List[ASTNode]:
+        """Операторы до одного из ключевых слов terminators"""
+        statements = []
+
+        while True:
+            tok = self._peek()
+            if tok is _EOF or (tok[0] == KEYWORD and tok[1] in terminators):
+                return statements
+            if (self.tolerant and tok[0] == KEYWORD
+                    and tok[1] in _METHOD_BOUNDARY_KEYWORDS):
+                # Блок не закрыт до конца метода - ошибку зафиксирует
+                # внешний уровень, ожидающий свое ключевое слово
+                return statements
+
+            statement = self._parse_statement_tolerant()
+            if statement is None:
+                continue
+            if isinstance(statement, list):
+                statements.extend(statement)
+            else:
+                statements.append(statement)
+
+    # ------------------------------------------------------------------
+    # Восстановление после ошибок
+    # ------------------------------------------------------------------
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            tok = self._peek() if self._peek() is not _EOF else self.last
+            raise ParseTimeoutError(
+                f"Разбор модуля {self.name} превысил бюджет времени "
+                f"(строка {tok[4]})"
+            )
+
+    def _parse_statement_tolerant(self):
+        """Оператор; при ошибке - ErrorNode и переход к следующему"""
+        self._check_deadline()
+        start_pos = self.pos
+        try:
+            return self._parse_statement()
+        except BSLSyntaxError as e:
+            if not self.tolerant:
+                raise
+            return self._recover(e, start_pos, _STATEMENT_SYNC_KEYWORDS)
+
+    def _parse_method_tolerant(self) -> Optional[ASTNode]:
+        """
+        Метод; при ошибке в заголовке или незакрытом блоке метод
+        сохраняется (с тем, что удалось разобрать), а разбор продолжается
+        со следующего метода.
+        """
+        start_pos = self.pos
+        self.method = None
+        try:
+            return self._parse_method()
+        except BSLSyntaxError as e:
+            if not self.tolerant:
+                raise
+            error = self._recover(e, start_pos, _METHOD_KEYWORDS,
+                                  end_keywords=set(_END_KEYWORDS.values()))
+            method = self.method
+            if method is None:
+                return None
+            method.body.append(error)
+            method.range = error.range
+            return method
+
+    def _recover(self, error: BSLSyntaxError, start_pos: int,
+                 sync_keywords: set, end_keywords: set = None) -> ErrorNode:
+        """
+        Пропускает токены до точки синхронизации: после ";" или
+        ключевого слова из end_keywords, либо перед ключевым словом
+        из sync_keywords. Возвращает ErrorNode на пропущенный фрагмент.
+        """
+        if self.pos == start_pos:
+            self._advance()  # гарантируем продвижение
+
+        while True:
+            tok = self._peek()
+            if tok is _EOF:
+                break
+            if tok[0] == PUNCT and tok[1] == ";" and not end_keywords:
+                self._advance()
+                break
+            if tok[0] == KEYWORD:
+                if end_keywords and tok[1] in end_keywords:
+                    self._advance()
+                    break
+                if tok[1] in sync_keywords:
+                    break
+            self._advance()
+
+        start_tok = self.tokens[min(start_pos, len(self.tokens) - 1)]
+        node = ErrorNode(str(error), self._range_from(start_tok))
+        self.errors.append(node)
+        return node
+
+    def _parse_statement(self):
+        """Один оператор; None - для пустых операторов и меток"""
+        tok = self._peek()
+
+        if tok[0] == PUNCT and tok[1] == ";":
+            self._advance()
+            return None
+
+        if tok[0] == LABEL:
+            # ~Метка:
+            self._advance()
+            self._expect_punct(":")
+            return None
+
+        if tok[0] == KEYWORD:
+            handler = self._statement_handlers.get(tok[1])
+            if handler is not None:
+                statement = handler()
+                self._skip_semicolons()
+                return statement
+
+        statement = self._parse_expression_statement()
+        self._skip_semicolons()
+        return statement
+
+    def _parse_local_variables(self) -> List[VariableNode]:
+        return self._parse_variables()
+
+    def _parse_expression_statement(self) -> ASTNode:
+        """Присваивание или вызов процедуры/метода"""
+        start_tok = self._peek()
+
+        if self._at_keyword("await"):
+            return self._parse_unary()
+
+        target = self._parse_postfix()
+
+        if self._at_operator("="):
+            self._advance()
+            value = self._parse_expression()
+            return AssignmentNode(target, value, self._range_from(start_tok))
+
+        if not isinstance(target, FunctionCallNode):
+            self._error("Ожидалось присваивание или вызов процедуры")
+        return target
+
+    def _parse_if_statement(self) -> IfStatementNode:
+        start_tok = self._expect_keyword("if")
+        stmt = IfStatementNode()
+
+        stmt.condition = self._parse_expression()
+        self._expect_keyword("then")
+        stmt.then_branch = self._parse_statements(
+            {"elsif", "else", "endif"}
+        )
+
+        while self._at_keyword("elsif"):
+            self._advance()
+            condition = self._parse_expression()
+            self._expect_keyword("then")
+            statements = self._parse_statements({"elsif", "else", "endif"})
+            stmt.elif_branches.append((condition, statements))
+
+        if self._at_keyword("else"):
+            self._advance()
+            stmt.else_branch = self._parse_statements({"endif"})
+
+        self._expect_keyword("endif")
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_while_statement(self) -> WhileLoopNode:
+        start_tok = self._expect_keyword("while")
+        stmt = WhileLoopNode()
+
+        stmt.condition = self._parse_expression()
+        self._expect_keyword("do")
+        stmt.body = self._parse_statements({"enddo"})
+        self._expect_keyword("enddo")
+
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_for_statement(self) -> ASTNode:
+        """Для Счетчик = А По Б Цикл / Для Каждого Элемент Из Коллекция"""
+        start_tok = self._expect_keyword("for")
+
+        if self._at_keyword("each"):
+            self._advance()
+            stmt = ForEachLoopNode()
+            stmt.variable = self._parse_variable_reference()
+            self._expect_keyword("in")
+            stmt.collection = self._parse_expression()
+        else:
+            stmt = ForLoopNode()
+            stmt.variable = self._parse_variable_reference()
+            if not self._at_operator("="):
+                self._error("Ожидался символ '='")
+            self._advance()
+            stmt.start = self._parse_expression()
+            self._expect_keyword("to")
+            stmt.end = self._parse_expression()
+
+        self._expect_keyword("do")
+        stmt.body = self._parse_statements({"enddo"})
+        self._expect_keyword("enddo")
+
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_variable_reference(self) -> VariableNode:
+        name_tok = self._expect_name()
+        var = VariableNode(self._name(name_tok))
+        var.range = self._range_from(name_tok)
+        return var
+
+    def _parse_try_statement(self) -> TryStatementNode:
+        start_tok = self._expect_keyword("try")
+        stmt = TryStatementNode()
+
+        stmt.try_body = self._parse_statements({"except"})
+        self._expect_keyword("except")
+        stmt.except_body = self._parse_statements({"endtry"})
+        self._expect_keyword("endtry")
+
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_return_statement(self) -> ReturnStatementNode:
+        start_tok = self._expect_keyword("return")
+        stmt = ReturnStatementNode()
+
+        if not self._at_statement_end():
+            stmt.expression = self._parse_expression()
+
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_raise_statement(self) -> RaiseStatementNode:
+        start_tok = self._expect_keyword("raise")
+        stmt = RaiseStatementNode()
+
+        if self._at_punct("("):
+            # Расширенная форма: ВызватьИсключение(Текст, Категория, ...);
+            # текст - первый из arguments, expression не заполняется
+            stmt.arguments = self._parse_arguments()
+        elif not self._at_statement_end():
+            stmt.expression = self._parse_expression()
+
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_break_statement(self) -> BreakStatementNode:
+        start_tok = self._expect_keyword("break")
+        stmt = BreakStatementNode()
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_continue_statement(self) -> ContinueStatementNode:
+        start_tok = self._expect_keyword("continue")
+        stmt = ContinueStatementNode()
+        stmt.range = self._range_from(start_tok)
+        return stmt
+
+    def _parse_goto_statement(self) -> None:
+        """Перейти ~Метка; - переходы в AST не отражаются"""
+        self._advance()
+        if self._peek()[0] != LABEL:
+            self._error("Ожидалась метка")
+        self._advance()
+        return None
+
+    def _parse_execute_statement(self) -> FunctionCallNode:
+        """Выполнить(Текст) / Выполнить Текст"""
+        start_tok = self._advance()
+        call = FunctionCallNode(
+            self._text(start_tok), [self._parse_expression()]
+        )
+        call.range = self._range_from(start_tok)
+        return call
+
+    def _parse_handler_statement(self) -> FunctionCallNode:
+        """ДобавитьОбработчик Объект.Событие, Обработчик;"""
+        start_tok = self._advance()
+        event = self._parse_expression()
+        self._expect_punct(",")
+        handler = self._parse_expression()
+        call = FunctionCallNode(self._text(start_tok), [event, handler])
+        call.range = self._range_from(start_tok)
+        return call
+
+    def _at_statement_end(self) -> bool:
+        tok = self._peek()
+        return (
+            tok is _EOF
+            or (tok[0] == PUNCT and tok[1] == ";")
+            or tok[0] == KEYWORD and tok[1] in _BLOCK_END_KEYWORDS
+        )
+
+    # ------------------------------------------------------------------
+    # Выражения
+    # ------------------------------------------------------------------
+
+    def _parse_expression(self) -> ASTNode:
+        """Или (самый низкий приоритет)"""
+        left = self._parse_and()
+        while self._at_keyword("or"):
+            self._advance()
+            left = self._binary("or", left, self._parse_and())
+        return left
+
+    def _parse_and(self) -> ASTNode:
+        left = self._parse_not()
+        while self._at_keyword("and"):
+            self._advance()
+            left = self._binary("and", left, self._parse_not())
+        return left
+
+    def _parse_not(self) -> ASTNode:
+        if self._at_keyword("not"):
+            start_tok = self._advance()
+            return self._unary("not", self._parse_not(), start_tok)
+        return self._parse_comparison()
+
+    def _parse_comparison(self) -> ASTNode:
+        left = self._parse_additive()
+        while True:
+            tok = self._peek()
+            if tok[0] != OPERATOR or tok[1] not in _COMPARISON_OPERATORS:
+                return left
+            self._advance()
+            left = self._binary(tok[1], left, self._parse_additive())
+
+    def _parse_additive(self) -> ASTNode:
+        left = self._parse_multiplicative()
+        while True:
+            tok = self._peek()
+            if tok[0] != OPERATOR or tok[1] not in _ADDITIVE_OPERATORS:
+                return left
+            self._advance()
+            left = self._binary(tok[1], left, self._parse_multiplicative())
+
+    def _parse_multiplicative(self) -> ASTNode:
+        left = self._parse_unary()
+        while True:
+            tok = self._peek()
+            if tok[0] != OPERATOR or tok[1] not in _MULTIPLICATIVE_OPERATORS:
+                return left
+            self._advance()
+            left = self._binary(tok[1], left, self._parse_unary())
+
+    def _parse_unary(self) -> ASTNode:
+        tok = self._peek()
+        if tok[0] == OPERATOR and tok[1] in _ADDITIVE_OPERATORS:
+            self._advance()
+            return self._unary(tok[1], self._parse_unary(), tok)
+        if tok[0] == KEYWORD and tok[1] == "await":
+            self._advance()
+            return self._unary("await", self._parse_unary(), tok)
+        return self._parse_postfix()
+
+    def _parse_postfix(self) -> ASTNode:
+        """Первичное выражение и цепочка .Свойство, (Аргументы), [Индекс]"""
+        start_tok = self._peek()
+        node = self._parse_primary()
+
+        while True:
+            if self._at_punct("."):
+                self._advance()
+                member_tok = self._advance()
+                if member_tok[0] not in (NAME, KEYWORD):
+                    self._error("Ожидалось имя свойства или метода")
+                node = MemberAccessNode(node, self._name(member_tok))
+            elif self._at_punct("("):
+                arguments = self._parse_arguments()
+                if isinstance(node, MemberAccessNode):
+                    node = FunctionCallNode(
+                        node.member, arguments, target=node.target
+                    )
+                elif isinstance(node, VariableNode):
+                    node = FunctionCallNode(node.name, arguments)
+                else:
+                    self._error("Вызов возможен только по имени")
+            elif self._at_punct("["):
+                self._advance()
+                index = self._parse_expression()
+                self._expect_punct("]")
+                node = IndexAccessNode(node, index)
+            else:
+                return node
+            node.range = self._range_from(start_tok)
+
+    def _parse_arguments(self) -> List[ASTNode]:
+        """(А, , Б) - пропущенные аргументы не сохраняются"""
+        self._expect_punct("(")
+        arguments = []
+
+        while not self._at_punct(")"):
+            if self._at_punct(","):
+                self._advance()
+                continue
+            arguments.append(self._parse_expression())
+            if not self._at_punct(","):
+                break
+            self._advance()
+
+        self._expect_punct(")")
+        return arguments
+
+    def _parse_primary(self) -> ASTNode:
+        tok = self._peek()
+        kind = tok[0]
+
+        if kind == NAME:
+            self._advance()
+            node = VariableNode(self.names.intern(tok[1]))
+        elif kind == NUMBER:
+            self._advance()
+            value = float(tok[1]) if "." in tok[1] else int(tok[1])
+            node = LiteralNode(value, "number")
+        elif kind == STRING:
+            return self._parse_string_literal()
+        elif kind == DATE:
+            self._advance()
+            node = LiteralNode(tok[1][1:-1], "date")
+        elif kind == KEYWORD and tok[1] in _KEYWORD_LITERALS:
+            self._advance()
+            value, literal_type = _KEYWORD_LITERALS[tok[1]]
+            node = LiteralNode(value, literal_type)
+        elif kind == KEYWORD and tok[1] == "new":
+            return self._parse_new_object()
+        elif kind == PUNCT and tok[1] == "(":
+            self._advance()
+            node = self._parse_expression()
+            self._expect_punct(")")
+            return node
+        elif kind == PUNCT and tok[1] == "?":
+            # ?(Условие, Значение1, Значение2)
+            self._advance()
+            node = FunctionCallNode("?", self._parse_arguments())
+        else:
+            self._error("Ожидалось выражение")
+
+        node.range = self._range_from(tok)
+        return node
+
+    def _parse_string_literal(self) -> LiteralNode:
+        """Строка; соседние строковые литералы склеиваются"""
+        start_tok = self._peek()
+        parts = []
+        while self._peek()[0] == STRING:
+            parts.append(_string_value(self._advance()[1]))
+
+        node = LiteralNode("".join(parts), "string")
+        node.range = self._range_from(start_tok)
+        return node
+
+    def _parse_new_object(self) -> NewObjectNode:
+        """Новый Тип[(Аргументы)] / Новый(Тип, Аргументы)"""
+        start_tok = self._expect_keyword("new")
+
+        if self._at_punct("("):
+            node = NewObjectNode("", self._parse_arguments())
+        else:
+            node = NewObjectNode(self._name(self._expect_name()))
+            if self._at_punct("("):
+                node.arguments = self._parse_arguments()
+
+        node.range = self._range_from(start_tok)
+        return node
+
+    def _binary(self, operator: str, left: ASTNode,
+                right: ASTNode) -> BinaryOperationNode:
+        node = BinaryOperationNode(operator, left, right)
+        node.range = Range(left.range.start, right.range.end)
+        return node
+
+    def _unary(self, operator: str, operand: ASTNode,
+               start_tok: Token) -> UnaryOperationNode:
+        node = UnaryOperationNode(operator, operand)
+        node.range = Range(self._start(start_tok), operand.range.end)
+        return node
+
+
+_KEYWORD_LITERALS = {
+    "true": (True, "boolean"),
+    "false": (False, "boolean"),
+    "undefined": (None, "undefined"),
+    "null": (None, "null"),
+}
+
+# Ключевые слова, закрывающие блок: оператор перед ними может быть без ";"
+_BLOCK_END_KEYWORDS = {
+    "endprocedure", "endfunction", "endif", "elsif", "else",
+    "enddo", "except", "endtry",
+}
+_STATEMENT_SYNC_KEYWORDS = _BLOCK_END_KEYWORDS | _METHOD_KEYWORDS
+
+
+def _string_value(text: str) -> str:
+    """Значение строкового литерала: без кавычек, "" -> ", без |"""
+    value = text[1:-1]
+    if "\n" in value:
+        lines = value.split("\n")
+        parts = [lines[0].rstrip("\r")]
+        for line in lines[1:]:
+            line = line.lstrip(" \t").rstrip("\r")
+            if line.startswith("//"):
+                continue  # комментарий между строками продолжения
+            parts.append(line[1:] if line.startswith("|") else line)
+        value = "\n".join(parts)
+    return value.replace('""', '"')
@@ -0,0 +1,224 @@
+import gc
+import os
+import pickle
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterable, Iterator, List, Optional
+from .backend import BatchParseResult, ParserBackend
+from .ast_nodes import ModuleNode
+from .budget import ParseBudget
+from .native_parser import NativeBSLParser
+
+# Исключения pickle для объектов, которые нельзя сериализовать
+_PICKLE_ERRORS = (pickle.PicklingError, RecursionError, TypeError,
+                  AttributeError)
+
+
+@dataclass
+class ParsedFile:
+    """Результат разбора одного файла: модуль или текст ошибки"""
+    path: str
+    module: Optional[ModuleNode] = None
+    error: Optional[str] = None
+
+
+class ParallelParser(ParserBackend):
+    """
+    Разбор набора файлов в пуле процессов.
+
+    Файлы группируются в порции примерно по chunk_bytes байт исходного
+    текста, каждая порция разбирается в отдельном процессе бэкендом,
+    созданным backend_factory (класс бэкенда или functools.partial -
+    должен передаваться в другой процесс через pickle).
+
+    iter_parse отдает результаты по мере готовности, но строго в порядке
+    входных путей; в работе одновременно не больше 2 * workers порций,
+    так что готовые модули не накапливаются в памяти.
+
+    Порция разбирается, сериализуется одним блоком pickle и загружается
+    в основном процессе с отключенным сборщиком циклов: иначе на
+    деревьях из сотен тысяч объектов загрузка в несколько раз медленнее
+    самого разбора. Порцию, которую не удалось сериализовать (слишком
+    глубокое дерево), основной процесс разбирает сам; если рабочий
+    процесс упал, файлы порции получают ошибку, а пул создается заново.
+
+    budget - ограничения, с которыми разбирают бэкенды (и в рабочих
+    процессах, и в текущем); None - у бэкендов остаются свои.
+    """
+
+    name = "parallel"
+
+    def __init__(self, backend_factory: Callable[[], ParserBackend] = None,
+                 workers: int = None, chunk_bytes: int = 1024 * 1024,
+                 budget: ParseBudget = None):
+        self.backend_factory = backend_factory or NativeBSLParser
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.budget = budget or ParseBudget()
+        self._backend_budget = budget
+        self._local_backend: Optional[ParserBackend] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self._local_backend is not None:
+            self._local_backend.close()
+            self._local_backend = None
+
+    def parse_string(self, code: str, module_name: str = "module.bsl",
+                     signatures_only: bool = False) -> ModuleNode:
+        """Одиночный модуль разбирается в текущем процессе"""
+        if self._local_backend is None:
+            self._local_backend = _make_backend(self.backend_factory,
+                                                self._backend_budget)
+        return self._local_backend.parse_string(
+            code, module_name, signatures_only
+        )
+
+    def parse_many(self, file_paths: Iterable[str],
+                   chunk_size: int = 200) -> BatchParseResult:
+        result = BatchParseResult()
+        for parsed in self.iter_parse(file_paths):
+            if parsed.error is None:
+                result.modules[parsed.path] = parsed.module
+            else:
+                result.errors[parsed.path] = parsed.error
+        return result
+
+    def iter_parse(self, file_paths: Iterable[str]) -> Iterator[ParsedFile]:
+        """Разбирает файлы в пуле процессов, отдавая их по одному"""
+        chunks = self._split_chunks(file_paths)
+        # (порция, пул, Future) в порядке входа
+        pending: Deque[tuple] = deque()
+
+        for chunk in chunks:
+            pending.append(self._submit(chunk))
+            if len(pending) >= 2 * self.workers:
+                yield from self._take_result(*pending.popleft())
+
+        while pending:
+            yield from self._take_result(*pending.popleft())
+
+    def _submit(self, chunk: List[str]) -> tuple:
+        for attempt in range(2):
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            executor = self._executor
+            try:
+                return chunk, executor, executor.submit(
+                    _parse_chunk_pickled, self.backend_factory, chunk,
+                    self._backend_budget,
+                )
+            except BrokenProcessPool:
+                # Пул сломан упавшей ранее порцией - нужен новый
+                if attempt:
+                    raise
+                executor.shutdown(wait=False)
+                self._executor = None
+
+    def _take_result(self, chunk: List[str], executor: ProcessPoolExecutor,
+                     future: Future) -> Iterator[ParsedFile]:
+        try:
+            data = future.result()
+        except BrokenProcessPool as e:
+            # Рабочий процесс упал: повторять разбор здесь нельзя - упал
+            # бы и основной процесс. Пул больше не принимает задачи
+            if self._executor is executor:
+                executor.shutdown(wait=False)
+                self._executor = None
+            error = f"Рабочий процесс завершился аварийно: {e}"
+            yield from (ParsedFile(path, error=error) for path in chunk)
+            return
+
+        results = None
+        if data is not None:
+            try:
+                results = _load_results(data)
+            except RecursionError:
+                pass
+        if results is None:
+            # Порцию не удалось передать между процессами (например,
+            # слишком глубокое дерево для pickle) - разбираем ее здесь
+            results = _parse_chunk(self.backend_factory, chunk,
+                                   self._backend_budget)
+        yield from results
+
+    def _split_chunks(self, file_paths: Iterable[str]) -> Iterator[List[str]]:
+        """Порции подряд идущих файлов суммарным размером ~chunk_bytes"""
+        chunk: List[str] = []
+        chunk_size = 0
+
+        for path in file_paths:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0  # ошибку чтения сообщит бэкенд
+            chunk.append(path)
+            chunk_size += size
+            if chunk_size >= self.chunk_bytes:
+                yield chunk
+                chunk = []
+                chunk_size = 0
+
+        if chunk:
+            yield chunk
+
+
+@contextmanager
+def _gc_paused():
+    """Сборщик циклов не нужен деревьям без циклов и лишь тормозит их"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _parse_chunk_pickled(backend_factory: Callable[[], ParserBackend],
+                         chunk: List[str],
+                         budget: Optional[ParseBudget]) -> Optional[bytes]:
+    """Результаты порции одним блоком; None - они не сериализуются"""
+    results = _parse_chunk(backend_factory, chunk, budget)
+    with _gc_paused():
+        try:
+            return pickle.dumps(results, pickle.HIGHEST_PROTOCOL)
+        except _PICKLE_ERRORS:
+            return None
+
+
+def _load_results(data: bytes) -> List[ParsedFile]:
+    with _gc_paused():
+        return pickle.loads(data)
+
+
+def _make_backend(backend_factory: Callable[[], ParserBackend],
+                  budget: Optional[ParseBudget]) -> ParserBackend:
+    backend = backend_factory()
+    if budget is not None:
+        backend.budget = budget
+    return backend
+
+
+def _parse_chunk(backend_factory: Callable[[], ParserBackend],
+                 chunk: List[str],
+                 budget: Optional[ParseBudget]) -> List[ParsedFile]:
+    """Разбор одной порции в рабочем процессе"""
+    try:
+        with _make_backend(backend_factory, budget) as backend:
+            batch = backend.parse_many(chunk, len(chunk))
+    except Exception as e:
+        return [ParsedFile(path, error=str(e)) for path in chunk]
+
+    return [
+        ParsedFile(path, batch.modules.get(path), batch.errors.get(path))
+        if path in batch.modules or path in batch.errors
+        else ParsedFile(path, error="Бэкенд не вернул результат для файла")
+        for path in chunk
+    ]
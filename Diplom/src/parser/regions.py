@@ -0,0 +1,244 @@
+from typing import Callable, Iterator, List, Optional
+
+from .ast_nodes import ASTNode, ModuleNode, Position, Range
+from .trivia import PREPROCESSOR_LINE, REGION_END, REGION_START, TriviaTable
+
+# Виды узлов дерева
+MODULE = "module"  # корень: весь модуль
+REGION = "region"  # #Область Имя ... #КонецОбласти
+IF_BRANCH = "if"  # #Если Условие Тогда
+ELSIF_BRANCH = "elsif"  # #ИначеЕсли Условие Тогда
+ELSE_BRANCH = "else"  # #Иначе
+INSERT = "insert"  # #Вставка ... #КонецВставки (расширения)
+DELETE = "delete"  # #Удаление ... #КонецУдаления (расширения)
+
+_IF = {"#если", "#if"}
+_ELSIF = {"#иначеесли", "#elsif"}
+_ELSE = {"#иначе", "#else"}
+_END_IF = {"#конецесли", "#endif"}
+_BLOCK_STARTS = {
+    "#вставка": INSERT, "#insert": INSERT,
+    "#удаление": DELETE, "#delete": DELETE,
+}
+_BLOCK_ENDS = {
+    "#конецвставки": INSERT, "#endinsert": INSERT,
+    "#конецудаления": DELETE, "#enddelete": DELETE,
+}
+_BRANCH_KINDS = {IF_BRANCH, ELSIF_BRANCH, ELSE_BRANCH}
+
+
+class RegionNode:
+    """
+    Узел дерева областей и инструкций препроцессора.
+
+    name - имя области или условие ветки #Если ("Сервер Или
+    ТолстыйКлиентОбычноеПриложение"). range охватывает строки от
+    открывающей до закрывающей инструкции включительно.
+    """
+
+    def __init__(self, kind: str, name: str, range: Range,
+                 parent: "RegionNode" = None):
+        self.kind = kind
+        self.name = name
+        self.range = range
+        self.parent = parent
+        self.children: List["RegionNode"] = []
+
+    def __repr__(self):
+        return (f"RegionNode({self.kind}, {self.name!r}, "
+                f"{self.range.start.line}-{self.range.end.line})")
+
+    def walk(self) -> Iterator["RegionNode"]:
+        """Узел и все вложенные, в порядке текста"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def find(self, name: str, kind: str = REGION) -> Optional["RegionNode"]:
+        """Первая область с именем name (без учета регистра)"""
+        name = name.lower()
+        for node in self.walk():
+            if node.kind == kind and node.name.lower() == name:
+                return node
+        return None
+
+    def contains_line(self, line: int) -> bool:
+        return self.range.start.line <= line <= self.range.end.line
+
+    def contains(self, node) -> bool:
+        """Узел AST целиком лежит внутри области"""
+        return (node.range is not None
+                and self.contains_line(node.range.start.line)
+                and self.contains_line(node.range.end.line))
+
+    def innermost(self, line: int) -> "RegionNode":
+        """Самая вложенная область, содержащая строку line"""
+        node = self
+        while True:
+            for child in node.children:
+                if child.contains_line(line):
+                    node = child
+                    break
+            else:
+                return node
+
+    def path(self) -> List["RegionNode"]:
+        """Цепочка областей от корня до этого узла"""
+        chain = []
+        node = self
+        while node is not None:
+            chain.append(node)
+            node = node.parent
+        chain.reverse()
+        return chain
+
+
+def build_region_tree(trivia: TriviaTable) -> RegionNode:
+    """
+    Строит дерево по инструкциям из таблицы trivia. Незакрытые области
+    закрываются концом модуля, лишние закрывающие инструкции
+    пропускаются.
+    """
+    text = trivia.text
+    last_line = text.count("\n") + 1
+    root = RegionNode(MODULE, "", Range(
+        Position(1, 1),
+        Position(last_line, len(text) - text.rfind("\n")),
+    ))
+    current = root
+
+    for index in range(len(trivia)):
+        kind = trivia.kinds[index]
+        if kind not in (REGION_START, REGION_END, PREPROCESSOR_LINE):
+            continue
+
+        words = trivia.entry_text(index).split(None, 1)
+        directive = words[0].lower()
+        argument = words[1].strip() if len(words) > 1 else ""
+        line, offset = trivia.lines[index], trivia.starts[index]
+        start = Position(line, _column(text, offset))
+        end = Position(line, _column(text, trivia.ends[index]))
+
+        if kind == REGION_START:
+            current = _open(current, REGION, argument, start)
+        elif kind == REGION_END:
+            current = _close(current, {REGION}, end)
+        elif directive in _IF:
+            current = _open(current, IF_BRANCH, _condition(argument), start)
+        elif directive in _ELSIF or directive in _ELSE:
+            branch = current
+            current = _close(current, _BRANCH_KINDS,
+                             _line_end_before(text, line, offset))
+            if current is not branch:  # была открыта ветка #Если
+                if directive in _ELSE:
+                    current = _open(current, ELSE_BRANCH, "", start)
+                else:
+                    current = _open(current, ELSIF_BRANCH,
+                                    _condition(argument), start)
+        elif directive in _END_IF:
+            current = _close(current, _BRANCH_KINDS, end)
+        elif directive in _BLOCK_STARTS:
+            current = _open(current, _BLOCK_STARTS[directive], "", start)
+        elif directive in _BLOCK_ENDS:
+            current = _close(current, {_BLOCK_ENDS[directive]}, end)
+
+    # Незакрытые узлы заканчиваются вместе с модулем
+    while current is not root:
+        _end_at(current, root.range.end)
+        current = current.parent
+
+    return root
+
+
+def region_view(module: ModuleNode, region: RegionNode) -> ModuleNode:
+    """
+    Модуль, ограниченный областью: переменные, процедуры, функции
+    и операторы, целиком лежащие внутри region. Узлы не копируются,
+    поэтому любое правило можно запустить только для области.
+    """
+    return _filtered_view(module, region.range, region.contains)
+
+
+def _filtered_view(module: ModuleNode, view_range: Range,
+                   keep: Callable[[ASTNode], bool]) -> ModuleNode:
+    """Модуль из узлов верхнего уровня, для которых keep истинно"""
+    view = ModuleNode(module.name)
+    view.range = view_range
+    view.source = module.source
+    view.trivia = module.trivia
+    view.variables = [n for n in module.variables if keep(n)]
+    view.functions = [n for n in module.functions if keep(n)]
+    view.procedures = [n for n in module.procedures if keep(n)]
+    view.body = [n for n in module.body if keep(n)]
+    view.errors = [n for n in module.errors if keep(n)]
+    return view
+
+
+def split_by_regions(module: ModuleNode) -> List[ModuleNode]:
+    """
+    Делит модуль на части по областям верхнего уровня (например, для
+    параллельного запуска правил); код вне областей - первая часть.
+    Без дерева областей (нет trivia: модуль из ast_codec без текста,
+    представление FlatAST) модуль - одна часть без имени. Узлы без
+    диапазона (модуль из BSLParser) не отнести к области: они тоже
+    в первой части.
+    """
+    root = module.regions
+    if root is None:
+        return [module]
+    top = [child for child in root.children if child.kind == REGION]
+    outside = _filtered_view(
+        module, root.range,
+        lambda n: (n.range is None
+                   or not any(region.contains(n) for region in top)),
+    )
+    return [outside] + [region_view(module, region) for region in top]
+
+
+def _open(parent: RegionNode, kind: str, name: str,
+          start: Position) -> RegionNode:
+    node = RegionNode(kind, name, Range(start, start), parent)
+    parent.children.append(node)
+    return node
+
+
+def _close(current: RegionNode, kinds: set, end: Position) -> RegionNode:
+    """Закрывает ближайший открытый узел одного из видов kinds"""
+    node = current
+    while node.parent is not None and node.kind not in kinds:
+        node = node.parent
+    if node.parent is None:
+        return current  # закрывать нечего - инструкция лишняя
+
+    # Вложенные незакрытые узлы заканчиваются вместе с этим
+    while current is not node:
+        _end_at(current, end)
+        current = current.parent
+    _end_at(node, end)
+    return node.parent
+
+
+def _end_at(node: RegionNode, end: Position):
+    node.range = Range(node.range.start, end)
+
+
+def _condition(argument: str) -> str:
+    """Условие #Если без завершающего Тогда/Then"""
+    words = argument.split()
+    if words and words[-1].lower() in ("тогда", "then"):
+        words.pop()
+    return " ".join(words)
+
+
+def _column(text: str, offset: int) -> int:
+    return offset - text.rfind("\n", 0, offset)
+
+
+def _line_end_before(text: str, line: int, offset: int) -> Position:
+    """Конец строки, предшествующей строке line (offset - смещение в ней)"""
+    newline = text.rfind("\n", 0, offset)
+    if newline < 0:
+        return Position(line, 1)
+    return Position(line - 1, _column(text, newline))
@@ -0,0 +1,160 @@
+import codecs
+import mmap
+import os
+import re
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+# Метки порядка байтов: (метка, кодировка)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# Сколько первых байтов смотреть при поиске UTF-16 без метки
+_SNIFF_SIZE = 4096
+
+_NEWLINE = re.compile("\n")
+
+
+class SourceText:
+    """
+    Исходный текст модуля, декодированный один раз.
+
+    Переводы строк приведены к "\\n" (как при чтении файла в текстовом
+    режиме). line_starts[i] - смещение начала строки i + 1, поэтому
+    доступ к строке по номеру и переход от (строка, колонка)
+    к смещению не требуют повторного просмотра текста. Индекс строится
+    один раз, при первом обращении.
+
+    Один объект разделяют парсер, все построчные правила и отчет.
+    """
+
+    def __init__(self, text: str, path: str = None, encoding: str = "utf-8"):
+        self.text = text
+        self.path = path
+        self.encoding = encoding  # кодировка, в которой был файл
+        self._line_starts: Optional[List[int]] = None
+
+    @property
+    def line_starts(self) -> List[int]:
+        if self._line_starts is None:
+            self._line_starts = _line_starts(self.text)
+        return self._line_starts
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts)
+
+    def line(self, number: int) -> str:
+        """Текст строки number (с 1) без перевода строки"""
+        if number < 1:
+            raise IndexError(f"Номер строки начинается с 1: {number}")
+        starts = self.line_starts
+        start = starts[number - 1]
+        if number < len(starts):
+            return self.text[start:starts[number] - 1]
+        return self.text[start:]
+
+    def snippet(self, start_line: int, end_line: int = None) -> str:
+        """Строки с start_line по end_line включительно"""
+        if start_line < 1:
+            raise IndexError(f"Номер строки начинается с 1: {start_line}")
+        starts = self.line_starts
+        end_line = min(end_line or start_line, len(starts))
+        start = starts[start_line - 1]
+        if end_line < len(starts):
+            return self.text[start:starts[end_line] - 1]
+        return self.text[start:]
+
+    def range_text(self, node_range) -> str:
+        """Исходный текст диапазона Range узла"""
+        return self.text[
+            self.offset(node_range.start.line, node_range.start.column):
+            self.offset(node_range.end.line, node_range.end.column)
+        ]
+
+    def offset(self, line: int, column: int = 1) -> int:
+        """Смещение в тексте для позиции (строки и колонки с 1)"""
+        return self.line_starts[line - 1] + column - 1
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """(строка, колонка) для смещения в тексте"""
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+
+def load_source(path: str) -> SourceText:
+    """
+    Читает файл модуля через mmap и декодирует его за один проход.
+
+    Кодировка определяется по метке порядка байтов (UTF-8, UTF-16),
+    по нулевым байтам в начале файла (UTF-16 без метки, старые выгрузки
+    Конфигуратора) и, если текст не является корректным UTF-8, считается
+    cp1251.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return SourceText("", str(path))
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data) as view:
+                text, encoding = decode_source(view)
+    return SourceText(text, str(path), encoding)
+
+
+def decode_source(data) -> Tuple[str, str]:
+    """Декодирует байты модуля: (текст, кодировка)"""
+    text, encoding = _decode(data)
+    return normalize_newlines(text), encoding
+
+
+def normalize_newlines(text: str) -> str:
+    """Переводы строк \r\n и \r заменяются на \n"""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _decode(data) -> Tuple[str, str]:
+    for bom, encoding in _BOMS:
+        if data[:len(bom)] == bom:
+            return str(data[len(bom):], encoding), encoding
+
+    encoding = _sniff_utf16(data[:_SNIFF_SIZE])
+    if encoding:
+        try:
+            return str(data, encoding), encoding
+        except UnicodeDecodeError:
+            # Нулевой байт в однобайтовом тексте (нечетная длина,
+            # одиночный NUL) - это не UTF-16
+            pass
+
+    try:
+        # Для cp1251 ошибка обычно возникает на первой же русской букве,
+        # поэтому неудачная попытка почти ничего не стоит
+        return str(data, "utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return str(data, "cp1251"), "cp1251"
+
+
+def _sniff_utf16(head) -> str:
+    """
+    UTF-16 без метки. В UTF-8 и cp1251 нулевых байтов в тексте нет,
+    а в UTF-16 их дает каждый ASCII-символ (пробелы, переводы строк,
+    знаки), причем в одной и той же половине пары байтов.
+    """
+    head = bytes(head)
+    end = len(head) - len(head) % 2
+    even_zeros = head[0:end:2].count(0)
+    odd_zeros = head[1:end:2].count(0)
+    if even_zeros == odd_zeros == 0:
+        return ""
+    return "utf-16-le" if odd_zeros >= even_zeros else "utf-16-be"
+
+
+def _line_starts(text: str) -> List[int]:
+    """Смещения начал строк; переводы строк уже приведены к "\\n" """
+    starts = [0]
+    starts.extend(m.end() for m in _NEWLINE.finditer(text))
+    return starts
@@ -0,0 +1,271 @@
+from hashlib import blake2b
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .ast_nodes import ASTNode, ModuleNode, NodeType
+from .ast_schema import (
+    FLAGS, KIND_IDS, KINDS, LIST_FIELDS, NODE_CHILDREN, NODE_TYPES,
+    TEXT_FIELDS,
+)
+
+# Форма поддерева - узел без позиций: (вид, текст, флаги, значение
+# литерала, дочерние поля), где вместо дочерних узлов стоят номера их
+# форм. Одинаковые поддеревья в любом месте конфигурации имеют одну
+# форму и один номер в таблице.
+
+# Узлы, чьи имена при normalize_names не входят в форму
+_NAMED_KINDS = {
+    NodeType.MODULE, NodeType.FUNCTION, NodeType.PROCEDURE,
+    NodeType.PARAMETER, NodeType.VARIABLE,
+}
+# Узлы, повторы которых ищет find_duplicates
+_DUPLICATE_KINDS = {
+    NodeType.FUNCTION, NodeType.PROCEDURE, NodeType.ASSIGNMENT,
+    NodeType.IF_STATEMENT, NodeType.WHILE_LOOP, NodeType.FOR_LOOP,
+    NodeType.FOR_EACH_LOOP, NodeType.TRY_STATEMENT,
+    NodeType.RETURN_STATEMENT, NodeType.RAISE_STATEMENT,
+    NodeType.FUNCTION_CALL,
+}
+_NO_SHAPE = -1
+
+
+def _layout(node_class: type) -> tuple:
+    """(поле текста, флаги, литерал ли, дочерние поля) класса узлов"""
+    flags = tuple((field, bit) for field, bit in FLAGS
+                  if hasattr(node_class, field))
+    # Ошибки модуля уже есть в дереве или не относятся к коду
+    children = tuple(
+        (field, field == "elif_branches", field in LIST_FIELDS)
+        for field in NODE_CHILDREN[node_class] if field != "errors"
+    )
+    return (TEXT_FIELDS.get(node_class), flags,
+            NODE_TYPES[node_class] is NodeType.LITERAL, children)
+
+
+# Раскладка по виду узла (а не по классу: у представлений FlatAST
+# свои классы)
+_LAYOUTS = {
+    KIND_IDS[node_type]: _layout(node_class)
+    for node_class, node_type in NODE_TYPES.items()
+}
+
+
+class HashConsTable:
+    """
+    Таблица форм поддеревьев (hash-consing): каждая различная форма
+    хранится один раз и получает номер, повторы кода - только номер.
+
+    Форма не содержит позиций, поэтому одинаковый код в разных местах
+    и модулях дает один номер; normalize_names - имена переменных,
+    параметров и методов тоже не входят в форму (находятся копии
+    с переименованными переменными). Вызовы, свойства и типы объектов
+    остаются в форме: это разный код.
+
+    Сами узлы намеренно не заменяются общими и хэш в узлах не
+    хранится: у каждого узла свой диапазон, а место под хэш занимало
+    бы каждый узел. Поэтому память дерева повторяющийся код не
+    сокращает; общими становятся формы - по ним повторы ищутся
+    и сравниваются без обхода деревьев. Хэши всех узлов модуля
+    кэширует ModuleIndex.structural_hash: поддерево обходится один раз.
+    """
+
+    def __init__(self, normalize_names: bool = False):
+        self.normalize_names = normalize_names
+        self._ids: Dict[tuple, int] = {}
+        self._shapes: List[tuple] = []
+        self._sizes: List[int] = []  # число узлов поддерева
+        self._digests: List[bytes] = []
+
+    def __len__(self) -> int:
+        """Число различных форм"""
+        return len(self._shapes)
+
+
+    def shape(self, shape_id: int) -> tuple:
+        return self._shapes[shape_id]
+
+    def size(self, shape_id: int) -> int:
+        """Число узлов в поддереве формы"""
+        return self._sizes[shape_id]
+
+    def digest(self, shape_id: int) -> bytes:
+        """
+        Устойчивый 8-байтный хэш формы: не зависит от номеров
+        в таблице и от запуска, годится в ключ кэша на диске
+        """
+        digests = self._digests
+        # Номера дочерних форм меньше номера родителя: хэши
+        # считаются по возрастанию номеров, без рекурсии
+        for next_id in range(len(digests), shape_id + 1):
+            kind, text, flags, value, children = self._shapes[next_id]
+            canonical = (
+                KINDS[kind].value, text, flags, value,
+                tuple(_child_digests(child, digests)
+                      for child in children),
+            )
+            digests.append(
+                blake2b(repr(canonical).encode("utf-8"),
+                        digest_size=8).digest()
+            )
+        return digests[shape_id]
+
+    def structural_hash(self, node: ASTNode) -> int:
+        """Хэш поддерева без учета позиций (см. digest)"""
+        return int.from_bytes(self.digest(self.add(node)), "big")
+
+    def _intern(self, shape: tuple, size: int) -> int:
+        shape_id = self._ids.get(shape)
+        if shape_id is None:
+            shape_id = self._ids[shape] = len(self._shapes)
+            self._shapes.append(shape)
+            self._sizes.append(size)
+        return shape_id
+
+    def add(self, root: ASTNode,
+            visit: Callable[[ASTNode, int], None] = None) -> int:
+        """
+        Номер формы поддерева root (новые формы заносятся в таблицу).
+
+        Обход в обратном порядке без рекурсии: форма узла строится,
+        когда известны формы детей. visit(node, номер формы)
+        вызывается для каждого узла после его детей.
+        """
+        shapes: Dict[ASTNode, int] = {}
+        sizes: Dict[ASTNode, int] = {}
+        normalize = self.normalize_names
+        # (узел, дети уже обойдены)
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            layout = _LAYOUTS[KIND_IDS[node.node_type]]
+            children_fields = layout[3]
+            if not expanded:
+                stack.append((node, True))
+                for field, is_elif, is_list in reversed(children_fields):
+                    value = getattr(node, field)
+                    if is_elif:
+                        for condition, statements in reversed(value):
+                            stack.extend((statement, False) for statement
+                                         in reversed(statements))
+                            stack.append((condition, False))
+                    elif is_list:
+                        stack.extend((child, False)
+                                     for child in reversed(value))
+                    elif value is not None:
+                        stack.append((value, False))
+                continue
+
+            text_field, flag_fields, is_literal, _ = layout
+            text = None
+            if text_field is not None and not (
+                    normalize and node.node_type in _NAMED_KINDS):
+                # Имена и ключевые слова - без учета регистра
+                text = getattr(node, text_field)
+                if node.node_type is not NodeType.ERROR:
+                    text = text.lower()
+            flags = 0
+            for field, bit in flag_fields:
+                if getattr(node, field):
+                    flags |= bit
+            value = node.value if is_literal else None
+
+            size = 1
+            children = []
+            for field, is_elif, is_list in children_fields:
+                child = getattr(node, field)
+                if is_elif:
+                    branches = []
+                    for condition, statements in child:
+                        size += sizes.pop(condition)
+                        for statement in statements:
+                            size += sizes.pop(statement)
+                        branches.append((
+                            shapes.pop(condition),
+                            tuple(shapes.pop(s) for s in statements),
+                        ))
+                    children.append(tuple(branches))
+                elif is_list:
+                    for item in child:
+                        size += sizes.pop(item)
+                    children.append(tuple(shapes.pop(item)
+                                          for item in child))
+                elif child is None:
+                    children.append(_NO_SHAPE)
+                else:
+                    size += sizes.pop(child)
+                    children.append(shapes.pop(child))
+
+            shape = (KIND_IDS[node.node_type], text, flags,
+                     _literal_key(value), tuple(children))
+            shape_id = self._intern(shape, size)
+            shapes[node] = shape_id
+            sizes[node] = size
+            if visit is not None:
+                visit(node, shape_id)
+
+        return shapes[root]
+
+
+def _literal_key(value):
+    """Значение литерала в форме: 1 и 1.0, True и 1 - разные литералы"""
+    if value is None:
+        return None
+    return type(value).__name__, value
+
+
+def _child_digests(child, digests: List[bytes]):
+    if isinstance(child, int):
+        return digests[child] if child >= 0 else None
+    return tuple(_child_digests(item, digests) for item in child)
+
+
+def find_duplicates(modules: Iterable[ModuleNode], min_nodes: int = 25,
+                    normalize_names: bool = True,
+                    table: Optional[HashConsTable] = None
+                    ) -> List[List[Tuple[str, ASTNode]]]:
+    """
+    Повторяющийся код в модулях: группы одинаковых по форме методов
+    и операторов (не меньше min_nodes узлов), в каждой группе пары
+    (имя модуля, узел). Вложенные повторы не выдаются, если повторяется
+    и охватывающий их код. Группы - от самых крупных.
+    """
+    table = table or HashConsTable(normalize_names)
+    # (номер узла в обратном порядке обхода, форма, модуль, узел);
+    # поддерево узла - номера от order - size + 1 до order
+    found: List[Tuple[int, int, str, ASTNode]] = []
+    order = 0
+
+    def visit(node: ASTNode, shape_id: int):
+        nonlocal order
+        order += 1
+        if (node.node_type in _DUPLICATE_KINDS
+                and table.size(shape_id) >= min_nodes):
+            found.append((order, shape_id, module.name, node))
+
+    for module in modules:
+        table.add(module, visit)
+
+    counts: Dict[int, int] = {}
+    for _, shape_id, _, _ in found:
+        counts[shape_id] = counts.get(shape_id, 0) + 1
+    found = [entry for entry in found if counts[entry[1]] > 1]
+
+    # Повтор внутри другого повтора покрыт им; группа выдается, если
+    # покрыты не все ее узлы
+    events = []
+    for node_order, shape_id, _, _ in found:
+        events.append((node_order - table.size(shape_id) + 1, 1))
+        events.append((node_order, -1))
+    events.sort()
+    groups: Dict[int, List[Tuple[str, ASTNode]]] = {}
+    uncovered = set()
+    depth = event = 0
+    for node_order, shape_id, module_name, node in found:
+        while event < len(events) and events[event][0] <= node_order:
+            depth += events[event][1]
+            event += 1
+        groups.setdefault(shape_id, []).append((module_name, node))
+        if depth == 0:
+            uncovered.add(shape_id)
+
+    shape_ids = sorted(uncovered, key=lambda shape_id: -table.size(shape_id))
+    return [groups[shape_id] for shape_id in shape_ids]
@@ -0,0 +1,195 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional
+
+from .bsl_lexer import (
+    ANNOTATION, COMMENT, PREPROCESSOR, STRING, Token, tokenize,
+)
+
+# Виды записей таблицы
+COMMENT_LINE = 1  # комментарий на отдельной строке
+TRAILING_COMMENT = 2  # комментарий после кода в той же строке
+BLANK_LINES = 3  # подряд идущие пустые строки
+REGION_START = 4  # #Область / #Region
+REGION_END = 5  # #КонецОбласти / #EndRegion
+PREPROCESSOR_LINE = 6  # прочие инструкции (#Если, #Иначе, ...)
+ANNOTATION_MARK = 7  # директива компиляции (&НаСервере)
+
+_REGION_STARTS = {"#область", "#region"}
+_REGION_ENDS = {"#конецобласти", "#endregion"}
+
+
+class TriviaTable:
+    """
+    Все, что не попадает в AST: комментарии, пустые строки, области,
+    инструкции препроцессора и директивы компиляции.
+
+    Записи идут в порядке текста и хранятся в параллельных массивах
+    (вид, первая и последняя строка, смещения в тексте) - без объекта
+    на запись. Текст записи вырезается из исходника по запросу.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.kinds = array("B")
+        self.lines = array("l")
+        self.end_lines = array("l")
+        self.starts = array("l")
+        self.ends = array("l")
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(self, kind: int, line: int, end_line: int,
+            start: int, end: int):
+        self.kinds.append(kind)
+        self.lines.append(line)
+        self.end_lines.append(end_line)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def entry_text(self, index: int) -> str:
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def entries(self, kind: int = None) -> Iterator[int]:
+        """Номера записей (всех или одного вида)"""
+        kinds = self.kinds
+        for index in range(len(kinds)):
+            if kind is None or kinds[index] == kind:
+                yield index
+
+    def comment_text(self, index: int) -> str:
+        """Текст комментария без "//" """
+        return self.entry_text(index)[2:].strip()
+
+    # ------------------------------------------------------------------
+    # Запросы
+    # ------------------------------------------------------------------
+
+    def leading_comment_entries(self, line: int,
+                                max_blank_lines: int = 0) -> List[int]:
+        """
+        Записи комментариев, стоящих непосредственно над строкой line:
+        подряд идущие строки-комментарии, между которыми и line могут
+        быть только директивы компиляции и не более max_blank_lines
+        пустых строк. Порядок - сверху вниз.
+        """
+        kinds, lines, end_lines = self.kinds, self.lines, self.end_lines
+        index = bisect_left(lines, line) - 1
+        expected = line - 1  # строка, которая должна оказаться выше
+        blank_budget = max_blank_lines
+        found = []
+
+        while index >= 0:
+            kind = kinds[index]
+            if kind == ANNOTATION_MARK and end_lines[index] >= expected:
+                expected = min(expected, lines[index] - 1)
+            elif kind == COMMENT_LINE and lines[index] == expected:
+                found.append(index)
+                expected -= 1
+            elif (kind == BLANK_LINES and end_lines[index] == expected
+                  and not found):
+                # Пустые строки допустимы только между описанием и узлом
+                count = end_lines[index] - lines[index] + 1
+                if count > blank_budget:
+                    break
+                blank_budget -= count
+                expected = lines[index] - 1
+            else:
+                break
+            index -= 1
+
+        found.reverse()
+        return found
+
+    def leading_comment(self, node, max_blank_lines: int = 0
+                        ) -> Optional[str]:
+        """
+        Блок комментариев над узлом (например, описание процедуры) -
+        строки без "//", через перевод строки; None, если его нет.
+        """
+        if node.range is None:
+            return None
+        entries = self.leading_comment_entries(
+            node.range.start.line, max_blank_lines
+        )
+        if not entries:
+            return None
+        return "\n".join(self.comment_text(index) for index in entries)
+
+    def in_lines(self, first_line: int, last_line: int) -> List[int]:
+        """Записи, начинающиеся в строках first_line..last_line"""
+        lines = self.lines
+        index = bisect_left(lines, first_line)
+        found = []
+        while index < len(lines) and lines[index] <= last_line:
+            found.append(index)
+            index += 1
+        return found
+
+    # ------------------------------------------------------------------
+    # Построение
+    # ------------------------------------------------------------------
+
+    def split_tokens(self, tokens: Iterable[Token],
+                     start: int = 0) -> List[Token]:
+        """
+        Записывает trivia из потока токенов (с комментариями) и
+        возвращает список остальных токенов для парсера. Директивы
+        компиляции и записываются, и возвращаются: парсеру они тоже нужны.
+
+        start - смещение, с которого разбит текст (см. tokenize).
+        """
+        code_tokens = []
+        keep = code_tokens.append
+        # последняя строка, занятая токеном, и конец последнего токена
+        last_line = self.text.count("\n", 0, start) + 1 if start else 0
+        last_end = start
+        add = self.add
+
+        for tok in tokens:
+            kind = tok[0]
+            line = tok[4]
+
+            if line == last_line and kind < COMMENT and kind != STRING:
+                # Обычный токен в уже начатой строке - самый частый случай
+                last_end = tok[3]
+                keep(tok)
+                continue
+
+            if line > last_line + 1:
+                add(BLANK_LINES, last_line + 1, line - 1, last_end, tok[2])
+            own_line = line > last_line
+
+            last_line = line
+            if kind == STRING:
+                last_line += tok[1].count("\n")
+            last_end = tok[3]
+
+            if kind == COMMENT:
+                add(COMMENT_LINE if own_line else TRAILING_COMMENT,
+                    line, line, tok[2], tok[3])
+                continue
+            if kind == PREPROCESSOR:
+                directive = tok[1].split(None, 1)[0].lower()
+                if directive in _REGION_STARTS:
+                    kind = REGION_START
+                elif directive in _REGION_ENDS:
+                    kind = REGION_END
+                else:
+                    kind = PREPROCESSOR_LINE
+                add(kind, line, line, tok[2], tok[3])
+                continue
+            if kind == ANNOTATION:
+                add(ANNOTATION_MARK, line, line, tok[2], tok[3])
+
+            keep(tok)
+
+        return code_tokens
+
+
+def build_trivia(text: str) -> TriviaTable:
+    """Таблица trivia для текста, разобранного другим бэкендом"""
+    table = TriviaTable(text)
+    table.split_tokens(tokenize(text))
+    return table
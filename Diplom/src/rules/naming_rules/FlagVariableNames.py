@@ -1,5 +1,6 @@
-from typing import List
+from typing import Dict, List
 from Diplom.src.parser.ast_nodes import ModuleNode
+from Diplom.src.parser.names import NAMES
 from Diplom.src.rules.basic_rule import BaseRule
 from Diplom.src.rules.violation import Violation
 
@@ -48,6 +49,9 @@ class FlagVariableNames(BaseRule):
             "mode",
             "type",
         ]
+        # "Похоже на флаг" по номеру имени в пуле (без учета регистра)
+        self._flag_like: Dict[int, bool] = {}
+        self._generation = NAMES.generation
 
     def check(self, module: ModuleNode) -> List[Violation]:
         violations = []
@@ -74,6 +78,17 @@ class FlagVariableNames(BaseRule):
 
     def _looks_like_flag(self, name: str) -> bool:
         """Определяет, похоже ли имя на флаг"""
+        if self._generation != NAMES.generation:
+            # Пул сброшен (новый запуск): номера имен выданы заново
+            self._generation = NAMES.generation
+            self._flag_like.clear()
+        name_id = NAMES.id(name)
+        flag_like = self._flag_like.get(name_id)
+        if flag_like is None:
+            flag_like = self._flag_like[name_id] = self._has_flag_word(name)
+        return flag_like
+
+    def _has_flag_word(self, name: str) -> bool:
         name_lower = name.lower()
 
         # Проверяем по плохим именам
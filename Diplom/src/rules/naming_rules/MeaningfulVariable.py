@@ -1,5 +1,6 @@
-from typing import List
+from typing import Dict, List
 from Diplom.src.parser.ast_nodes import ModuleNode, VariableNode
+from Diplom.src.parser.names import NAMES
 from Diplom.src.rules.basic_rule import BaseRule
 from Diplom.src.rules.violation import Violation
 
@@ -59,6 +60,12 @@ class MeaningfulVariable(BaseRule):
             "Период",
             "Статус",
         ]
+        self._good_markers_lower = [m.lower() for m in self.good_markers]
+
+        # Результат проверки по номеру имени в пуле: имя (без учета
+        # регистра) проверяется один раз за запуск
+        self._verdicts: Dict[int, bool] = {}
+        self._generation = NAMES.generation
 
     def check(self, module: ModuleNode) -> List[Violation]:
         violations = []
@@ -92,6 +99,17 @@ class MeaningfulVariable(BaseRule):
 
     def _is_bad_variable_name(self, name: str) -> bool:
         """Проверка, плохое ли имя переменной"""
+        if self._generation != NAMES.generation:
+            # Пул сброшен (новый запуск): номера имен выданы заново
+            self._generation = NAMES.generation
+            self._verdicts.clear()
+        name_id = NAMES.id(name)
+        verdict = self._verdicts.get(name_id)
+        if verdict is None:
+            verdict = self._verdicts[name_id] = self._check_name(name)
+        return verdict
+
+    def _check_name(self, name: str) -> bool:
         name_lower = name.lower()
 
         # Проверка на плохие сокращения
@@ -105,8 +123,8 @@ class MeaningfulVariable(BaseRule):
 
         # Проверка на наличие хороших маркеров
         has_good_marker = False
-        for marker in self.good_markers:
-            if marker.lower() in name_lower:
+        for marker in self._good_markers_lower:
+            if marker in name_lower:
                 has_good_marker = True
                 break
 
@@ -1,9 +1,17 @@
 from typing import List
-from Diplom.src.parser.ast_nodes import ModuleNode, ProcedureNode, VariableNode
+from Diplom.src.parser.ast_nodes import (
+    ModuleNode, NodeType, ProcedureNode, VariableNode,
+)
+from Diplom.src.parser.module_index import ModuleIndex
+from Diplom.src.parser.names import NAMES
 from Diplom.src.rules.basic_rule import BaseRule
 from Diplom.src.rules.violation import Violation
 
 
+_LOOP_KINDS = (NodeType.FOR_LOOP, NodeType.FOR_EACH_LOOP, NodeType.WHILE_LOOP)
+_COUNTER_LOOP_KINDS = (NodeType.FOR_LOOP, NodeType.FOR_EACH_LOOP)
+
+
 class VariableMinLength(BaseRule):
     """
     Правило 4: Имена переменных не должны состоять из одного символа
@@ -19,13 +27,30 @@ class VariableMinLength(BaseRule):
 
         # Допустимые односимвольные имена для счетчиков
         self.loop_counters = ["i", "j", "k", "n", "m"]
+        self.counter_names = ["i", "j", "k", "n", "m", "idx", "index",
+                              "счетчик"]
+        self._generation = None
+        self._refresh_ids()
+
+    def _refresh_ids(self):
+        """
+        Номера имен в пуле (сравнение без учета регистра, без lower());
+        после сброса пула (новый запуск) вычисляются заново
+        """
+        if self._generation == NAMES.generation:
+            return
+        self._loop_counter_ids = NAMES.ids(self.loop_counters)
+        self._counter_name_ids = NAMES.ids(self.counter_names)
+        self._generation = NAMES.generation
 
     def check(self, module: ModuleNode) -> List[Violation]:
         violations = []
+        self._refresh_ids()
 
         # Проверяем переменные модуля
         for var in module.variables:
-            if len(var.name) == 1 and var.name not in self.loop_counters:
+            if (len(var.name) == 1
+                    and NAMES.id(var.name) not in self._loop_counter_ids):
                 violations.append(
                     Violation(
                         rule_code=self.code,
@@ -39,31 +64,65 @@ class VariableMinLength(BaseRule):
                     )
                 )
 
-        # Проверяем локальные переменные в циклах
+        # Проверяем переменные процедур: узлы берутся из индекса
+        # модуля по диапазону процедуры, без обхода тела
+        index = module.index
+        module_ids = {NAMES.id(var.name) for var in module.variables}
         for proc in module.procedures:
-            for node in proc.body:
-                if isinstance(node, VariableNode) and len(node.name) == 1:
-                    # Проверяем, не является ли это счетчиком цикла
-                    if not self._is_in_loop(node, proc):
-                        violations.append(Violation(...))
+            # Параметры задает вызывающий код, это не переменные процедуры
+            reported = module_ids | {
+                NAMES.id(parameter.name) for parameter in proc.parameters
+            }
+            for node in self._introduced_variables(proc, index):
+                if len(node.name) != 1:
+                    continue
+                name_id = NAMES.id(node.name)
+                if name_id in reported:
+                    continue
+                # Проверяем, не является ли это счетчиком цикла
+                if not self._is_in_loop(node, index):
+                    reported.add(name_id)
+                    violations.append(
+                        Violation(
+                            rule_code=self.code,
+                            rule_name=self.name,
+                            severity=self.severity,
+                            module_name=module.name,
+                            line=node.range.start.line if node.range else 0,
+                            column=(node.range.start.column
+                                    if node.range else 0),
+                            message=f"Переменная '{node.name}' состоит"
+                            f"из одного символа. Дайте ей осмысленное имя.",
+                        )
+                    )
 
         return violations
 
-    def _is_in_loop(self, var_node: VariableNode, proc: ProcedureNode) -> bool:
+    def _introduced_variables(self, proc: ProcedureNode,
+                              index: ModuleIndex) -> List[VariableNode]:
+        """
+        Переменные, которые вводит процедура: объявления Перем в теле,
+        левые части присваиваний и переменные циклов, в порядке текста.
+        Использования переменных в выражениях не проверяются.
+        """
+        nodes = [node for node in proc.body if isinstance(node, VariableNode)]
+        for assignment in index.of_kind(NodeType.ASSIGNMENT, within=proc):
+            nodes.append(assignment.left)
+        for loop in index.of_kinds(_COUNTER_LOOP_KINDS, within=proc):
+            nodes.append(loop.variable)
+        nodes = [node for node in nodes
+                 if isinstance(node, VariableNode) and node.range]
+        nodes.sort(key=lambda node: (node.range.start.line,
+                                     node.range.start.column))
+        return nodes
+
+    def _is_in_loop(self, var_node: VariableNode,
+                    index: ModuleIndex) -> bool:
         if not var_node.range:
             return False
 
-        counter_names = ["i", "j", "k", "n", "m", "idx", "index", "счетчик"]
-
-        if var_node.name.lower() not in counter_names:
+        if NAMES.id(var_node.name) not in self._counter_name_ids:
             return False
 
-        for node in proc.body:
-            if self._is_loop_node(node):
-                # Проверяем, находится ли переменная в области цикла
-                if node.range and self._is_within_range(
-                    var_node.range.start.line, node.range
-                ):
-                    return True
-
-        return False
+        # Охватывающий цикл - подъемом по родителям в индексе модуля
+        return index.enclosing(var_node, _LOOP_KINDS) is not None
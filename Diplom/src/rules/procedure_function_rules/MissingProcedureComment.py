@@ -15,27 +15,32 @@ class MissingProcedureCommentRule(BaseRule):
 
     def check(self, module: ModuleNode) -> List[Violation]:
         violations = []
-
-        with open(module.source_file, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        # Комментарии берутся из таблицы trivia модуля, без чтения файла
+        trivia = module.trivia
+        if trivia is None:
+            return violations
 
         for proc in module.procedures:
-            line_before = proc.range.start.line - 2 if proc.range else 0
-            if line_before >= 0:
-                prev_line = lines[line_before].strip()
-                if not prev_line.startswith("//"):
-                    violations.append(
-                        Violation(
-                            rule_code=self.code,
-                            rule_name=self.name,
-                            severity=self.severity,
-                            module_name=module.name,
-                            line=proc.range.start.line if proc.range else 0,
-                            column=1,
-                            message=f"Процедура '{proc.name}'"
-                            f"не имеет описания."
-                            f"Добавьте комментарий над  процедурой",
-                        )
+            if proc.range is None:
+                continue
+            # Описание может быть многострочным и отделяться
+            # от процедуры директивами компиляции (&НаСервере)
+            if trivia.leading_comment(proc) is None:
+                line = proc.range.start.line
+                violations.append(
+                    Violation(
+                        rule_code=self.code,
+                        rule_name=self.name,
+                        severity=self.severity,
+                        module_name=module.name,
+                        line=line,
+                        column=1,
+                        message=f"Процедура '{proc.name}'"
+                        f"не имеет описания."
+                        f"Добавьте комментарий над  процедурой",
+                        code_snippet=module.source.line(line)
+                        if module.source is not None else "",
                     )
+                )
 
         return violations
@@ -15,13 +15,13 @@ class OneStatementPerLine(BaseRule):
 
     def check(self, module: ModuleNode) -> List[Violation]:
         violations = []
+        source = module.source
+        if source is None:
+            return violations
 
         # Анализируем исходный код по строкам
-        with open(module.source_file, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        for i, line in enumerate(lines, 1):
-            line = line.strip()
+        for i in range(1, source.line_count + 1):
+            line = source.line(i).strip()
             if line.count(";") > 1:
                 violations.append(
                     Violation(
@@ -33,6 +33,7 @@ class OneStatementPerLine(BaseRule):
                         column=1,
                         message="Строка содержит"
                         "несколько операторов (разделите на отдельные строки)",
+                        code_snippet=line,
                     )
                 )
 
@@ -1,11 +1,25 @@
 from Diplom.src.parser.ast_nodes import (
+    AssignmentNode,
     BinaryOperationNode,
+    BreakStatementNode,
+    ContinueStatementNode,
+    ErrorNode,
+    ForEachLoopNode,
+    ForLoopNode,
+    FunctionCallNode,
     FunctionNode,
     IfStatementNode,
+    IndexAccessNode,
     LiteralNode,
+    MemberAccessNode,
     ModuleNode,
+    NewObjectNode,
+    ParameterNode,
     ProcedureNode,
+    RaiseStatementNode,
     ReturnStatementNode,
+    TryStatementNode,
+    UnaryOperationNode,
     VariableNode,
     WhileLoopNode,
 )
@@ -26,17 +40,59 @@ class ASTVisitor:
     def visit_variable(self, node: VariableNode):
         pass
 
+    def visit_parameter(self, node: ParameterNode):
+        pass
+
+    def visit_assignment(self, node: AssignmentNode):
+        pass
+
     def visit_if_statement(self, node: IfStatementNode):
         pass
 
     def visit_while_loop(self, node: WhileLoopNode):
         pass
 
+    def visit_for_loop(self, node: ForLoopNode):
+        pass
+
+    def visit_for_each_loop(self, node: ForEachLoopNode):
+        pass
+
+    def visit_try_statement(self, node: TryStatementNode):
+        pass
+
     def visit_return_statement(self, node: ReturnStatementNode):
         pass
 
+    def visit_raise_statement(self, node: RaiseStatementNode):
+        pass
+
+    def visit_break_statement(self, node: BreakStatementNode):
+        pass
+
+    def visit_continue_statement(self, node: ContinueStatementNode):
+        pass
+
     def visit_binary_operation(self, node: BinaryOperationNode):
         pass
 
+    def visit_unary_operation(self, node: UnaryOperationNode):
+        pass
+
+    def visit_function_call(self, node: FunctionCallNode):
+        pass
+
+    def visit_member_access(self, node: MemberAccessNode):
+        pass
+
+    def visit_index_access(self, node: IndexAccessNode):
+        pass
+
+    def visit_new_object(self, node: NewObjectNode):
+        pass
+
     def visit_literal(self, node: LiteralNode):
         pass
+
+    def visit_error(self, node: ErrorNode):
+        pass
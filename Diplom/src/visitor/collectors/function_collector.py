@@ -1,5 +1,6 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set
 from src.visitor.base_visitor import ASTVisitor
+from src.parser.names import NAMES
 from src.parser.ast_nodes import (
     ModuleNode,
     FunctionNode,
@@ -20,12 +21,15 @@ class FunctionCollector(ASTVisitor):
         self.current_function = None
         self.current_procedure = None
         self.call_graph: Dict[str, List[str]] = {}  # граф вызовов
+        # Номера имен вызываемых методов (в языке 1С регистр не важен)
+        self._call_ids: Dict[str, Set[int]] = {}
 
     def visit_module(self, node: ModuleNode):
         """Начинаем сбор с модуля"""
         self.functions = []
         self.procedures = []
         self.call_graph = {}
+        self._call_ids = {}
         super().visit_module(node)
 
     def visit_function(self, node: FunctionNode):
@@ -128,7 +132,10 @@ class FunctionCollector(ASTVisitor):
         if caller and hasattr(node, "name"):
             if caller not in self.call_graph:
                 self.call_graph[caller] = []
-            if node.name not in self.call_graph[caller]:
+                self._call_ids[caller] = set()
+            name_id = NAMES.id(node.name)
+            if name_id not in self._call_ids[caller]:
+                self._call_ids[caller].add(name_id)
                 self.call_graph[caller].append(node.name)
 
     def _calculate_length(self, node) -> int:
@@ -178,16 +185,17 @@ class FunctionCollector(ASTVisitor):
         ]
         called_functions = set()
 
-        for callees in self.call_graph.values():
-            called_functions.update(callees)
+        for callee_ids in self._call_ids.values():
+            called_functions.update(callee_ids)
 
-        unused = [f for f in all_functions if f not in called_functions]
+        unused = [f for f in all_functions
+                  if NAMES.id(f) not in called_functions]
         return unused
 
     def get_recursive_functions(self) -> List[str]:
         """Находит рекурсивные функции (вызывающие сами себя)"""
         recursive = []
-        for caller, callees in self.call_graph.items():
-            if caller in callees:
+        for caller, callee_ids in self._call_ids.items():
+            if NAMES.id(caller) in callee_ids:
                 recursive.append(caller)
         return recursive
@@ -1,4 +1,7 @@
-from Diplom.src.parser.ast_nodes import FunctionNode, WhileLoopNode
+from Diplom.src.parser.ast_nodes import (ForEachLoopNode,
+                                         ForLoopNode,
+                                         FunctionNode,
+                                         WhileLoopNode)
 from Diplom.src.visitor.base_visitor import ASTVisitor
 
 
@@ -49,3 +52,15 @@ class ContextAwareVisitor(ASTVisitor):
         self.context.in_loop = True
         super().visit_while_loop(node)
         self.context.in_loop = old_in_loop
+
+    def visit_for_loop(self, node: ForLoopNode):
+        old_in_loop = self.context.in_loop
+        self.context.in_loop = True
+        super().visit_for_loop(node)
+        self.context.in_loop = old_in_loop
+
+    def visit_for_each_loop(self, node: ForEachLoopNode):
+        old_in_loop = self.context.in_loop
+        self.context.in_loop = True
+        super().visit_for_each_loop(node)
+        self.context.in_loop = old_in_loop
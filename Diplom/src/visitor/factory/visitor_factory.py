@@ -7,10 +7,21 @@ from src.parser.ast_nodes import (
     VariableNode,
     IfStatementNode,
     WhileLoopNode,
+    ForLoopNode,
+    ForEachLoopNode,
+    TryStatementNode,
     ReturnStatementNode,
+    RaiseStatementNode,
+    AssignmentNode,
     BinaryOperationNode,
+    UnaryOperationNode,
+    FunctionCallNode,
+    MemberAccessNode,
+    IndexAccessNode,
+    NewObjectNode,
     LiteralNode,
     ParameterNode,
+    ErrorNode,
 )
 from src.rules.base_rule import BaseRule
 
@@ -91,6 +102,11 @@ class CompositeVisitor(ASTVisitor):
             if hasattr(visitor, "visit_parameter"):
                 visitor.visit_parameter(node)
 
+    def visit_assignment(self, node: AssignmentNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_assignment"):
+                visitor.visit_assignment(node)
+
     def visit_if_statement(self, node: IfStatementNode):
         for visitor in self.visitors:
             if hasattr(visitor, "visit_if_statement"):
@@ -101,17 +117,67 @@ class CompositeVisitor(ASTVisitor):
             if hasattr(visitor, "visit_while_loop"):
                 visitor.visit_while_loop(node)
 
+    def visit_for_loop(self, node: ForLoopNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_for_loop"):
+                visitor.visit_for_loop(node)
+
+    def visit_for_each_loop(self, node: ForEachLoopNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_for_each_loop"):
+                visitor.visit_for_each_loop(node)
+
+    def visit_try_statement(self, node: TryStatementNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_try_statement"):
+                visitor.visit_try_statement(node)
+
     def visit_return_statement(self, node: ReturnStatementNode):
         for visitor in self.visitors:
             if hasattr(visitor, "visit_return_statement"):
                 visitor.visit_return_statement(node)
 
+    def visit_raise_statement(self, node: RaiseStatementNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_raise_statement"):
+                visitor.visit_raise_statement(node)
+
     def visit_binary_operation(self, node: BinaryOperationNode):
         for visitor in self.visitors:
             if hasattr(visitor, "visit_binary_operation"):
                 visitor.visit_binary_operation(node)
 
+    def visit_unary_operation(self, node: UnaryOperationNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_unary_operation"):
+                visitor.visit_unary_operation(node)
+
+    def visit_function_call(self, node: FunctionCallNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_function_call"):
+                visitor.visit_function_call(node)
+
+    def visit_member_access(self, node: MemberAccessNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_member_access"):
+                visitor.visit_member_access(node)
+
+    def visit_index_access(self, node: IndexAccessNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_index_access"):
+                visitor.visit_index_access(node)
+
+    def visit_new_object(self, node: NewObjectNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_new_object"):
+                visitor.visit_new_object(node)
+
     def visit_literal(self, node: LiteralNode):
         for visitor in self.visitors:
             if hasattr(visitor, "visit_literal"):
                 visitor.visit_literal(node)
+
+    def visit_error(self, node: ErrorNode):
+        for visitor in self.visitors:
+            if hasattr(visitor, "visit_error"):
+                visitor.visit_error(node)
@@ -1,10 +1,21 @@
 from Diplom.src.parser.ast_nodes import (
+    AssignmentNode,
     BinaryOperationNode,
+    ForEachLoopNode,
+    ForLoopNode,
+    FunctionCallNode,
     FunctionNode,
     IfStatementNode,
+    IndexAccessNode,
+    MemberAccessNode,
     ModuleNode,
+    NewObjectNode,
     ProcedureNode,
-    ReturnStatementNode, WhileLoopNode)
+    RaiseStatementNode,
+    ReturnStatementNode,
+    TryStatementNode,
+    UnaryOperationNode,
+    WhileLoopNode)
 from Diplom.src.visitor.base_visitor import ASTVisitor
 
 
@@ -24,6 +35,10 @@ class TraversalVisitor(ASTVisitor):
         for proc in node.procedures:
             proc.accept(self)
 
+        # Обходим операторы основной программы модуля
+        for stmt in node.body:
+            stmt.accept(self)
+
     def visit_function(self, node: FunctionNode):
         # Обходим параметры
         for param in node.parameters:
@@ -80,4 +95,76 @@ class TraversalVisitor(ASTVisitor):
     def visit_return_statement(self, node: ReturnStatementNode):
         """Обрабатывает оператор Возврат"""
         if node.expression:
-            node.expression.accept(self)
\ No newline at end of file
+            node.expression.accept(self)
+
+    def visit_assignment(self, node: AssignmentNode):
+        """Обрабатывает присваивание"""
+        if node.left:
+            node.left.accept(self)
+        if node.right:
+            node.right.accept(self)
+
+    def visit_for_loop(self, node: ForLoopNode):
+        # Обходим счетчик и границы
+        for part in (node.variable, node.start, node.end):
+            if part:
+                part.accept(self)
+
+        # Обходим тело цикла
+        for stmt in node.body:
+            stmt.accept(self)
+
+    def visit_for_each_loop(self, node: ForEachLoopNode):
+        # Обходим элемент и коллекцию
+        for part in (node.variable, node.collection):
+            if part:
+                part.accept(self)
+
+        # Обходим тело цикла
+        for stmt in node.body:
+            stmt.accept(self)
+
+    def visit_try_statement(self, node: TryStatementNode):
+        # Обходим ветку Попытка
+        for stmt in node.try_body:
+            stmt.accept(self)
+
+        # Обходим ветку Исключение
+        for stmt in node.except_body:
+            stmt.accept(self)
+
+    def visit_raise_statement(self, node: RaiseStatementNode):
+        """Обрабатывает оператор ВызватьИсключение"""
+        if node.expression:
+            node.expression.accept(self)
+        for arg in node.arguments:
+            arg.accept(self)
+
+    def visit_unary_operation(self, node: UnaryOperationNode):
+        """Обрабатывает унарную операцию (-a, Не a)"""
+        if node.operand:
+            node.operand.accept(self)
+
+    def visit_function_call(self, node: FunctionCallNode):
+        """Обрабатывает вызов процедуры, функции или метода"""
+        if node.target:
+            node.target.accept(self)
+        for arg in node.arguments:
+            arg.accept(self)
+
+    def visit_member_access(self, node: MemberAccessNode):
+        """Обрабатывает обращение к свойству объекта"""
+        if node.target:
+            node.target.accept(self)
+
+    def visit_index_access(self, node: IndexAccessNode):
+        """Обрабатывает обращение по индексу"""
+        if node.target:
+            node.target.accept(self)
+        if node.index:
+            node.index.accept(self)
+
+    def visit_new_object(self, node: NewObjectNode):
+        """Обрабатывает конструктор Новый"""
+        for arg in node.arguments:
+            arg.accept(self)
@@ -0,0 +1,40 @@
+from Diplom.src.parser.ast_nodes import ASTNode, Position, Range, node_fields
+
+
+def tree_dump(node):
+    """
+    Структура узла для сравнения деревьев: вид и открытые поля
+    (включая ленивое body). Представления FlatAST дают то же, что
+    исходные узлы.
+    """
+    if isinstance(node, (list, tuple)):
+        return [tree_dump(item) for item in node]
+    if isinstance(node, (Position, Range)):
+        return repr(node)
+    if not isinstance(node, ASTNode):
+        return repr(node)
+    fields = set(node_fields(type(node)))
+    if isinstance(getattr(type(node), "body", None), property):
+        fields.add("body")
+    dumped = {
+        name: tree_dump(getattr(node, name))
+        for name in sorted(fields)
+        if not name.startswith("_") and name != "source"
+    }
+    return type(node).__name__.removesuffix("View"), dumped
+
+
+def module_dump(module):
+    """tree_dump модуля без имени и исходника"""
+    return {
+        name: tree_dump(getattr(module, name))
+        for name in ("variables", "functions", "procedures", "body",
+                     "errors", "range")
+    }
+
+
+def trivia_dump(trivia):
+    return [list(column) for column in (
+        trivia.kinds, trivia.lines, trivia.end_lines,
+        trivia.starts, trivia.ends,
+    )]
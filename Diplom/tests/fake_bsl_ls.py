@@ -0,0 +1,80 @@
+"""
+Заменитель BSL LS для тестов BSLServerDaemon: отвечает по построчному
+JSON-протоколу демона (см. bsl_daemon.py).
+
+Поведение задается переменными окружения:
+FAKE_BSL_DELAY - задержка ответа на parse в секундах;
+FAKE_BSL_CRASH_ONCE - путь к файлу-флагу: если файла нет, процесс
+создает его и завершается на первом parse (имитация падения);
+FAKE_BSL_NO_PING - не отвечать на ping (сервер не поднялся).
+
+С аргументами analyze <файл> - разовый запуск, как у analyze BSL LS:
+в выводе одна переменная с именем "stdin" или "file" (откуда прочитан
+текст). FAKE_BSL_NO_STDIN - сборка, которая не читает stdin ("-").
+Несколько файлов - пакетный вывод {"modules": [...]}, файлы не
+читаются; для файла broken.bsl запись модуля испорчена.
+"""
+import json
+import os
+import sys
+import time
+
+
+def analyze(target):
+    if target == "-":
+        if os.environ.get("FAKE_BSL_NO_STDIN"):
+            sys.stderr.write("stdin не поддерживается\n")
+            sys.exit(1)
+        sys.stdin.read()
+        source = "stdin"
+    else:
+        with open(target, encoding="utf-8") as f:
+            f.read()
+        source = "file"
+    json.dump({"module": {"variables": [{"name": source}]}}, sys.stdout)
+
+
+def analyze_batch(targets):
+    modules = []
+    for target in targets:
+        module = {"variables": [{"name": "file"}]}
+        if os.path.basename(target) == "broken.bsl":
+            module = "не модуль"
+        modules.append({"file": target, "module": module})
+    json.dump({"modules": modules}, sys.stdout, ensure_ascii=False)
+
+
+def main():
+    if sys.argv[1:2] == ["analyze"]:
+        if len(sys.argv) > 3:
+            analyze_batch(sys.argv[2:])
+        else:
+            analyze(sys.argv[2])
+        return
+    delay = float(os.environ.get("FAKE_BSL_DELAY", "0"))
+    crash_flag = os.environ.get("FAKE_BSL_CRASH_ONCE")
+    no_ping = bool(os.environ.get("FAKE_BSL_NO_PING"))
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request["method"] == "ping":
+            if no_ping:
+                continue
+            response = {"id": request["id"], "result": "pong"}
+        else:
+            if crash_flag and not os.path.exists(crash_flag):
+                open(crash_flag, "w").close()
+                sys.exit(3)
+            time.sleep(delay)
+            params = request["params"]
+            response = {"id": request["id"], "result": {"module": {
+                "variables": [{"name": params["name"]}],
+                "procedures": [{"name": "Тест", "body": []}],
+                "pid": os.getpid(),
+            }}}
+        sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import pytest
+
+from ast_dump import module_dump, trivia_dump
+from Diplom.src.parser import ast_codec
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+CODE = (
+    "Перем Глобальная Экспорт;\n"
+    "// Описание\n"
+    "Функция Тест(Знач А, Б = \"умолч\", В = -1.5) Экспорт\n"
+    "    Дата = '20240101';\n"
+    "    Если А = Неопределено Тогда\n"
+    "        Возврат Новый Массив;\n"
+    "    ИначеЕсли Не Б Тогда\n"
+    "        Х = ;\n"
+    "    КонецЕсли;\n"
+    "    Для И = 1 По 10 Цикл\n"
+    "        Попытка\n"
+    "            ВызватьИсключение \"Ошибка\";\n"
+    "        Исключение\n"
+    "            Прервать;\n"
+    "        КонецПопытки;\n"
+    "    КонецЦикла;\n"
+    "    Возврат А.Поле[0](Истина, Null);\n"
+    "КонецФункции\n"
+    "Глобальная = Тест(1);\n"
+)
+
+
+def parse(**kwargs):
+    return NativeBSLParser(**kwargs).parse_string(CODE, "module.bsl")
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_round_trip(lazy):
+    module = parse(lazy_bodies=lazy)
+    loaded = ast_codec.load(ast_codec.dump(module))
+
+    assert loaded.name == module.name
+    assert module_dump(loaded) == module_dump(module)
+    assert loaded.errors
+    assert loaded.source.text == CODE
+    assert trivia_dump(loaded.trivia) == trivia_dump(module.trivia)
+
+
+def test_dump_without_source():
+    loaded = ast_codec.load(ast_codec.dump(parse(), include_source=False))
+    assert loaded.source is None
+    assert module_dump(loaded) == module_dump(parse())
+
+
+def test_foreign_buffer_is_rejected():
+    with pytest.raises(ValueError):
+        ast_codec.load(b"not an ast buffer")
+    with pytest.raises(ValueError):
+        ast_codec.load(ast_codec.dump(parse())[:-10])
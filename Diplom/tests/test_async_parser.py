@@ -0,0 +1,47 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from Diplom.src.parser import async_parser
+from Diplom.src.parser.async_parser import AsyncBSLParser
+
+FAKE_SERVER = str(Path(__file__).with_name("fake_bsl_ls.py"))
+
+
+@pytest.fixture
+def parser(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        async_parser, "analyze_command",
+        lambda jar_path, targets: [sys.executable, FAKE_SERVER,
+                                   "analyze", *targets],
+    )
+    jar = tmp_path / "bsl-ls.jar"
+    jar.touch()
+    return AsyncBSLParser(str(jar), timeout=10)
+
+
+def source_of(module):
+    return module.variables[0].name
+
+
+def test_temp_file_by_default(parser):
+    module = asyncio.run(parser.parse_string("Перем А;"))
+    assert source_of(module) == "file"
+    assert module.source.text == "Перем А;"
+
+
+def test_stdin_when_enabled(parser):
+    parser.stdin_input = True
+    module = asyncio.run(parser.parse_string("Перем А;"))
+    assert source_of(module) == "stdin"
+    assert parser.stdin_input
+
+
+def test_stdin_falls_back_to_temp_file(parser, monkeypatch):
+    monkeypatch.setenv("FAKE_BSL_NO_STDIN", "1")
+    parser.stdin_input = True
+    module = asyncio.run(parser.parse_string("Перем А;"))
+    assert source_of(module) == "file"
+    assert not parser.stdin_input
@@ -0,0 +1,95 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from Diplom.src.parser.bsl_daemon import (
+    BSLServerBusyError, BSLServerDaemon, BSLServerError,
+)
+from Diplom.src.parser.bsl_parser import BSLParser
+
+FAKE_SERVER = [sys.executable, str(Path(__file__).with_name(
+    "fake_bsl_ls.py"))]
+
+
+@pytest.fixture
+def daemon():
+    server = BSLServerDaemon(FAKE_SERVER, request_timeout=5,
+                             startup_timeout=5)
+    yield server
+    server.stop()
+
+
+def test_start_waits_for_ping(daemon):
+    daemon.start()
+    assert daemon.is_alive()
+    assert daemon.ping()
+
+
+def test_start_fails_without_ping(monkeypatch):
+    monkeypatch.setenv("FAKE_BSL_NO_PING", "1")
+    server = BSLServerDaemon(FAKE_SERVER, startup_timeout=0.5)
+    with pytest.raises(BSLServerError):
+        server.start()
+    assert not server.is_alive()
+
+
+def test_parse_returns_module(daemon):
+    result = daemon.parse("Перем А;", "module.bsl")
+    assert result["module"]["variables"] == [{"name": "module.bsl"}]
+
+
+def test_queue_is_bounded(monkeypatch):
+    monkeypatch.setenv("FAKE_BSL_DELAY", "1")
+    server = BSLServerDaemon(FAKE_SERVER, request_timeout=5, max_queue=1)
+    server.start()
+    try:
+        slow = threading.Thread(
+            target=server.parse, args=("", "slow.bsl"), daemon=True
+        )
+        slow.start()
+        time.sleep(0.2)  # медленный запрос занял единственное место
+        with pytest.raises(BSLServerBusyError):
+            server.request("parse", {"name": "fast.bsl", "source": ""},
+                           timeout=0.2)
+        slow.join()
+        # Место освободилось
+        assert server.parse("", "next.bsl")["module"]
+    finally:
+        server.stop()
+
+
+def test_restart_after_crash(monkeypatch, tmp_path, daemon):
+    monkeypatch.setenv("FAKE_BSL_CRASH_ONCE", str(tmp_path / "crashed"))
+    daemon.start()
+    first_pid = daemon._process.pid
+
+    result = daemon.parse("", "module.bsl")
+
+    assert (tmp_path / "crashed").exists()
+    assert result["module"]["pid"] != first_pid
+    assert daemon.is_alive()
+
+
+def test_gives_up_after_max_restarts(monkeypatch, tmp_path):
+    # Флаг в несуществующем каталоге: процесс падает при каждом parse
+    monkeypatch.setenv("FAKE_BSL_CRASH_ONCE",
+                       str(tmp_path / "missing" / "crashed"))
+    server = BSLServerDaemon(FAKE_SERVER, request_timeout=5, max_restarts=2)
+    try:
+        with pytest.raises(BSLServerError):
+            server.parse("", "module.bsl")
+    finally:
+        server.stop()
+
+
+def test_parser_requires_daemon_command(tmp_path):
+    jar = tmp_path / "bsl-ls.jar"
+    jar.touch()
+    with pytest.raises(ValueError):
+        BSLParser(str(jar), use_daemon=True)
+    with BSLParser(str(jar), use_daemon=True,
+                   daemon_command=FAKE_SERVER) as parser:
+        assert parser.parse_string("Перем А;").name == "module.bsl"
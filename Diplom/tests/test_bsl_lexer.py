@@ -0,0 +1,48 @@
+from Diplom.src.parser.bsl_lexer import (
+    COMMENT, KEYWORD, NAME, NUMBER, OPERATOR, PREPROCESSOR, PUNCT, STRING,
+    tokenize,
+)
+
+
+def kinds_and_values(text, **kwargs):
+    return [(tok[0], tok[1]) for tok in tokenize(text, **kwargs)]
+
+
+def test_keywords_are_canonical_in_both_languages():
+    assert kinds_and_values("Если ЕСЛИ if КонецЕсли EndIf") == [
+        (KEYWORD, "if"), (KEYWORD, "if"), (KEYWORD, "if"),
+        (KEYWORD, "endif"), (KEYWORD, "endif"),
+    ]
+
+
+def test_token_kinds_and_positions():
+    tokens = list(tokenize("А = 1.5; // к\n  Б<>Ф(\"с\")"))
+    assert [(tok[0], tok[1]) for tok in tokens] == [
+        (NAME, "А"), (OPERATOR, "="), (NUMBER, "1.5"), (PUNCT, ";"),
+        (COMMENT, "// к"), (NAME, "Б"), (OPERATOR, "<>"), (NAME, "Ф"),
+        (PUNCT, "("), (STRING, "\"с\""), (PUNCT, ")"),
+    ]
+    # (начало, конец, строка, колонка)
+    assert tokens[5][2:] == (16, 17, 2, 3)
+
+
+def test_multiline_string_advances_lines():
+    tokens = list(tokenize("А = \"а\n|б\";\nБ"))
+    assert tokens[2][1] == "\"а\n|б\""
+    assert tokens[3][4:] == (2, 4)
+    assert tokens[4][4:] == (3, 1)
+
+
+def test_comments_can_be_skipped():
+    text = "// к\n#Область О\nА"
+    assert kinds_and_values(text, comments=False) == [
+        (PREPROCESSOR, "#Область О"), (NAME, "А"),
+    ]
+
+
+def test_span_keeps_positions_of_whole_text():
+    text = "А = 1;\nБ = 2;\nВ = 3;\n"
+    start = text.index("Б")
+    end = text.index("В")
+    assert (list(tokenize(text, start=start, end=end))
+            == [tok for tok in tokenize(text) if start <= tok[2] < end])
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from Diplom.src.parser import bsl_parser
+from Diplom.src.parser.bsl_parser import BSLParser
+
+FAKE_SERVER = str(Path(__file__).with_name("fake_bsl_ls.py"))
+
+
+@pytest.fixture
+def parser(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        bsl_parser, "analyze_command",
+        lambda jar_path, targets: [sys.executable, FAKE_SERVER,
+                                   "analyze", *targets],
+    )
+    jar = tmp_path / "bsl-ls.jar"
+    jar.touch()
+    return BSLParser(str(jar))
+
+
+@pytest.mark.parametrize("stream_json", [True, False])
+def test_batch_errors_stay_with_their_file(parser, tmp_path, stream_json):
+    parser.stream_json = stream_json
+    paths = []
+    for name in ("a.bsl", "missing.bsl", "broken.bsl", "b.bsl"):
+        path = tmp_path / name
+        if name != "missing.bsl":
+            path.write_text("Перем А;\n", encoding="utf-8")
+        paths.append(str(path))
+
+    result = parser.parse_many(paths)
+
+    assert set(result.modules) == {paths[0], paths[3]}
+    assert set(result.errors) == {paths[1], paths[2]}
@@ -0,0 +1,67 @@
+import pickle
+
+from ast_dump import module_dump
+from Diplom.src.parser.ast_nodes import MethodNode, ModuleNode, NodeType
+from Diplom.src.parser.flat_ast import FlatAST
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+FIRST = (
+    "Перем Глобальная;\n"
+    "Процедура Тест(Знач А, Б = 1) Экспорт\n"
+    "    Если А Тогда\n"
+    "        Б = \"строка\";\n"
+    "    ИначеЕсли Б > 2 Тогда\n"
+    "        Х = ;\n"
+    "    Иначе\n"
+    "        Для Каждого Эл Из А Цикл\n"
+    "            Эл.Метод(1, , Истина);\n"
+    "        КонецЦикла;\n"
+    "    КонецЕсли;\n"
+    "КонецПроцедуры\n"
+)
+
+SECOND = (
+    "Функция Тест(А)\n"
+    "    Возврат Новый Структура(\"Тест\", А);\n"
+    "КонецФункции\n"
+)
+
+
+def parse_all():
+    parser = NativeBSLParser()
+    return [parser.parse_string(FIRST, "first.bsl"),
+            parser.parse_string(SECOND, "second.bsl")]
+
+
+def test_views_match_object_tree():
+    modules = parse_all()
+    views = FlatAST.from_modules(modules).modules()
+
+    assert [view.name for view in views] == ["first.bsl", "second.bsl"]
+    for view, module in zip(views, modules):
+        assert isinstance(view, ModuleNode)
+        assert module_dump(view) == module_dump(module)
+    assert isinstance(views[0].procedures[0], MethodNode)
+
+
+def test_strings_are_shared_between_modules():
+    flat = FlatAST.from_modules(parse_all())
+    assert flat.strings.count("Тест") == 1
+
+
+def test_subtree_is_contiguous():
+    flat = FlatAST.from_modules(parse_all())
+    root = flat.roots[0]
+    assert flat.subtree_end(root) == flat.roots[1]
+    method = next(iter(flat.of_kind(NodeType.PROCEDURE)))
+    assert all(flat.is_ancestor(method, index)
+               for index in flat.walk(method)
+               if index != method)
+
+
+def test_bytes_and_pickle_round_trip():
+    flat = FlatAST.from_modules(parse_all())
+    expected = [module_dump(view) for view in flat.modules()]
+    for copy in (FlatAST.from_bytes(flat.to_bytes()),
+                 pickle.loads(pickle.dumps(flat))):
+        assert [module_dump(view) for view in copy.modules()] == expected
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from ast_dump import module_dump, trivia_dump
+from Diplom.src.parser.ast_nodes import Position, Range
+from Diplom.src.parser.incremental import TextEdit, apply_edits
+from Diplom.src.parser.native_parser import NativeBSLParser
+from Diplom.src.parser.source import SourceText
+
+METHOD = (
+    "// Описание метода {n}\n"
+    "#Область Область{n}\n"
+    "&НаСервере\n"
+    "Процедура Метод{n}(Знач Параметр, Второй = 1) Экспорт\n"
+    "    Перем Локальная;\n"
+    "    Если Параметр > {n} Тогда\n"
+    "        Локальная = \"строка\n"
+    "        |продолжение\"; // хвост\n"
+    "    ИначеЕсли Второй = 0 Тогда\n"
+    "        Локальная = Новый Структура(\"Поле\", Параметр);\n"
+    "    Иначе\n"
+    "        Для Каждого Элемент Из Параметр Цикл\n"
+    "            Продолжить;\n"
+    "        КонецЦикла;\n"
+    "    КонецЕсли;\n"
+    "\n"
+    "    Попытка\n"
+    "        Пока Локальная < 10 Цикл\n"
+    "            Локальная = Локальная + 1;\n"
+    "        КонецЦикла;\n"
+    "    Исключение\n"
+    "        ВызватьИсключение \"Ошибка\";\n"
+    "    КонецПопытки;\n"
+    "КонецПроцедуры\n"
+    "#КонецОбласти\n"
+    "\n"
+    "Функция Функция{n}(А)\n"
+    "    Возврат А.Поле[{n}] * 2;\n"
+    "КонецФункции\n"
+)
+
+TEXT = "Перем Глобальная;\n\n" + "".join(
+    METHOD.format(n=n) for n in range(12)
+) + "Глобальная = Функция0(1);\n"
+
+INSERTS = [
+    "", "  ", "\n\n", "А = 1;", "\nБ = Б + 1;\n", "// комм\n",
+    "Если Х Тогда\nКонецЕсли;", "Пока Истина Цикл", "\"стр",
+    "КонецПроцедуры", "#Область Р\n", ")", "Процедура Ж()\n",
+]
+
+
+def random_edits(rnd, text):
+    """Одна-две непересекающиеся правки в случайных местах текста"""
+    source = SourceText(text)
+    spans = []
+    for _ in range(rnd.randint(1, 2)):
+        start = rnd.randrange(len(text))
+        end = min(len(text), start + rnd.choice([0, 0, 1, 3, 10]))
+        if all(end < other_start or start > other_end
+               for other_start, other_end in spans):
+            spans.append((start, end))
+    return [
+        TextEdit(Range(Position(*source.position(start)),
+                       Position(*source.position(end))),
+                 rnd.choice(INSERTS))
+        for start, end in spans
+    ]
+
+
+def comparable(module, lazy):
+    dumped = module_dump(module)
+    dumped["trivia"] = trivia_dump(module.trivia)
+    if lazy:
+        # Ленивые тела добавляют свои ошибки при обращении к body
+        dumped["errors"] = sorted(map(repr, dumped["errors"]))
+    return dumped
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_reparse_matches_full_parse(lazy, seed):
+    rnd = random.Random(seed)
+    parser = NativeBSLParser(lazy_bodies=lazy)
+    full = NativeBSLParser()
+    module = parser.parse_string(TEXT, "module.bsl")
+    text = TEXT
+
+    for step in range(40):
+        edits = random_edits(rnd, text)
+        module = parser.reparse(module, edits)
+        text, _ = apply_edits(text, edits)
+        assert module.source.text == text
+        if step % 4 == 3:
+            reference = full.parse_string(text, "module.bsl")
+            assert (comparable(module, lazy)
+                    == comparable(reference, lazy)), step
+
+
+def test_reparse_inside_body_keeps_other_methods():
+    parser = NativeBSLParser()
+    module = parser.parse_string(TEXT, "module.bsl")
+    untouched = module.functions[5]
+    line = module.procedures[0].body[0].range.start.line
+    edit = TextEdit(Range(Position(line, 1), Position(line, 1)),
+                    "А = 1;\n")
+
+    new = parser.reparse(module, [edit])
+
+    assert new.functions[5] is untouched
+    assert untouched.range.start.line > line
@@ -0,0 +1,36 @@
+import pytest
+
+from Diplom.src.parser.ast_nodes import (
+    BreakStatementNode, ErrorNode, WhileLoopNode,
+)
+from Diplom.src.parser.json_converter import JsonAstConverter
+
+
+def convert(body, lazy_bodies=False):
+    module = JsonAstConverter("module.bsl", lazy_bodies).convert({
+        "module": {"procedures": [{"name": "Тест", "body": body}]},
+    })
+    return module, module.procedures[0].body
+
+
+@pytest.mark.parametrize("lazy_bodies", [False, True])
+def test_bad_statement_becomes_one_error(lazy_bodies):
+    module, body = convert(
+        [{"type": "breakStatement"}, 5, {"type": "continueStatement"}],
+        lazy_bodies,
+    )
+    assert [type(node).__name__ for node in body] == [
+        "BreakStatementNode", "ErrorNode", "ContinueStatementNode",
+    ]
+    assert module.errors == [body[1]]
+
+
+def test_bad_nested_block_keeps_statement():
+    module, body = convert([
+        {"type": "whileStatement", "statements": "не список"},
+        {"type": "breakStatement"},
+    ])
+    loop = body[0]
+    assert isinstance(loop, WhileLoopNode)
+    assert isinstance(loop.body[0], ErrorNode)
+    assert isinstance(body[1], BreakStatementNode)
@@ -0,0 +1,39 @@
+import io
+
+import pytest
+
+from Diplom.src.parser.json_stream import (
+    JsonDepthError, decode_json, iter_json_items,
+)
+
+DEEP = "[" * 100000 + "]" * 100000
+
+
+def test_decode_json():
+    assert decode_json('{"а": [1, 2]}') == {"а": [1, 2]}
+
+
+def test_too_deep_json_is_value_error():
+    with pytest.raises(JsonDepthError):
+        decode_json(DEEP)
+    with pytest.raises(ValueError):
+        decode_json(DEEP)
+
+
+def test_stream_items_by_path():
+    text = '{"skip": {"x": [1]}, "module": {"items": [{"a": 1}, 22, []]}}'
+    items = list(iter_json_items(io.StringIO(text), {("module", "items")},
+                                 chunk_size=4))
+    assert items == [
+        (("module", "items"), {"a": 1}),
+        (("module", "items"), 22),
+        (("module", "items"), []),
+    ]
+
+
+def test_too_deep_stream_item():
+    text = '{"items": [1, ' + DEEP + ']}'
+    items = iter_json_items(io.StringIO(text), {("items",)})
+    assert next(items) == (("items",), 1)
+    with pytest.raises(JsonDepthError):
+        next(items)
@@ -0,0 +1,40 @@
+from Diplom.src.parser.ast_nodes import NodeType
+from Diplom.src.parser.flat_ast import FlatAST
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+CODE = (
+    "Процедура Тест()\n"
+    "    Эл.Метод(1, , 2);\n"
+    "    Х = ;\n"
+    "КонецПроцедуры\n"
+)
+
+
+def describe(node):
+    if node is None:
+        return None
+    start, end = node.range.start, node.range.end
+    return (node.node_type, start.line, start.column, end.line, end.column)
+
+
+def parse_with_view():
+    module = NativeBSLParser().parse_string(CODE, "module.bsl")
+    return module, FlatAST.from_module(module).modules()[0]
+
+
+def test_view_index_matches_tree():
+    module, view = parse_with_view()
+    for line in range(1, 5):
+        assert (describe(view.index.at_line(line))
+                == describe(module.index.at_line(line)))
+        for column in range(25):
+            assert (describe(view.index.node_at(line, column))
+                    == describe(module.index.node_at(line, column)))
+
+
+def test_module_errors_indexed_once():
+    module, view = parse_with_view()
+    assert module.errors
+    assert len(view.index) == len(module.index)
+    assert (len(view.index.of_kind(NodeType.ERROR))
+            == len(module.index.of_kind(NodeType.ERROR)))
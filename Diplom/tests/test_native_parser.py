@@ -0,0 +1,105 @@
+import pytest
+
+from ast_dump import module_dump
+from Diplom.src.parser.ast_nodes import (
+    AssignmentNode, ErrorNode, IfStatementNode, RaiseStatementNode,
+    ReturnStatementNode,
+)
+from Diplom.src.parser.native_parser import BSLSyntaxError, NativeBSLParser
+
+CODE = (
+    "Перем Глобальная Экспорт;\n"
+    "\n"
+    "Процедура Первая(Знач А, Б = 5) Экспорт\n"
+    "    Если А Тогда\n"
+    "        Б = 1;\n"
+    "    ИначеЕсли Б Тогда\n"
+    "        Б = 2;\n"
+    "    Иначе\n"
+    "        ВызватьИсключение(\"Текст\", \"Категория\");\n"
+    "    КонецЕсли;\n"
+    "КонецПроцедуры\n"
+    "\n"
+    "Функция Вторая()\n"
+    "    Возврат 1;\n"
+    "КонецФункции\n"
+)
+
+BROKEN = (
+    "Процедура Первая()\n"
+    "    Х = ;\n"
+    "    У = 2;\n"
+    "КонецПроцедуры\n"
+    "Процедура Вторая()\n"
+    "    Если Тогда\n"
+    "КонецПроцедуры\n"
+    "Процедура Третья()\n"
+    "КонецПроцедуры\n"
+)
+
+
+def parse(code, **kwargs):
+    return NativeBSLParser(**kwargs).parse_string(code, "module.bsl")
+
+
+def test_module_structure():
+    module = parse(CODE)
+    assert [v.name for v in module.variables] == ["Глобальная"]
+    procedure, = module.procedures
+    assert procedure.name == "Первая" and procedure.is_export
+    assert [(p.name, p.by_value, p.has_default_value)
+            for p in procedure.parameters] == [
+        ("А", True, False), ("Б", False, True),
+    ]
+    statement, = procedure.body
+    assert isinstance(statement, IfStatementNode)
+    assert len(statement.elif_branches) == 1
+    assert isinstance(statement.else_branch[0], RaiseStatementNode)
+    function, = module.functions
+    assert isinstance(function.body[0], ReturnStatementNode)
+    assert function.range.start.line == 13
+    assert not module.errors
+
+
+def test_raise_with_arguments():
+    raise_node = parse(CODE).procedures[0].body[0].else_branch[0]
+    assert raise_node.expression is None
+    assert len(raise_node.arguments) == 2
+
+
+def test_carriage_returns_are_line_breaks():
+    module = parse(CODE.replace("\n", "\r"))
+    assert module.functions[0].range.start.line == 13
+    assert module.source.text == CODE
+
+
+def test_recovery_at_statement_and_method_boundaries():
+    module = parse(BROKEN)
+    first, second, third = module.procedures
+    error, assignment = first.body
+    assert isinstance(error, ErrorNode)
+    assert isinstance(assignment, AssignmentNode)
+    assert second.name == "Вторая"
+    assert isinstance(second.body[0], ErrorNode)
+    assert third.name == "Третья"
+    assert len(module.errors) == 2
+    assert "строка 2" in module.errors[0].message
+
+
+def test_strict_mode_raises():
+    with pytest.raises(BSLSyntaxError) as info:
+        parse(BROKEN, tolerant=False)
+    assert (info.value.line, info.value.column) == (2, 9)
+
+
+def test_lazy_bodies_match_eager():
+    for code in (CODE, BROKEN):
+        lazy = parse(code, lazy_bodies=True)
+        eager = parse(code)
+        assert module_dump(lazy) == module_dump(eager)
+
+
+def test_signatures_only_skips_bodies():
+    module = NativeBSLParser().parse_string(CODE, signatures_only=True)
+    assert [m.name for m in module.procedures] == ["Первая"]
+    assert module.procedures[0].body == []
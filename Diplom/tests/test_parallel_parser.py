@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from Diplom.src.parser.budget import ParseBudget
+from Diplom.src.parser.native_parser import NativeBSLParser
+from Diplom.src.parser.parallel_parser import ParallelParser
+
+
+class CrashingParser(NativeBSLParser):
+    """Рабочий процесс падает на файле crash.bsl"""
+
+    def parse_file(self, file_path, signatures_only=False):
+        if os.path.basename(file_path) == "crash.bsl":
+            os._exit(1)
+        return super().parse_file(file_path, signatures_only)
+
+
+class UnpicklableParser(NativeBSLParser):
+    """Модуль не передается через pickle (как слишком глубокое дерево)"""
+
+    def parse_string(self, code, module_name="module.bsl",
+                     signatures_only=False):
+        module = super().parse_string(code, module_name, signatures_only)
+        module.body.append(lambda: None)
+        return module
+
+
+class BudgetProbe(NativeBSLParser):
+    """Имя модуля - таймаут бюджета, с которым он разобран"""
+
+    def parse_string(self, code, module_name="module.bsl",
+                     signatures_only=False):
+        module = super().parse_string(code, module_name, signatures_only)
+        module.name = str(self.budget.timeout)
+        return module
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name in ("a.bsl", "crash.bsl", "b.bsl", "c.bsl", "d.bsl"):
+        path = tmp_path / name
+        path.write_text("Перем А;\n", encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_worker_crash_is_reported_per_file(files):
+    # Порция - один файл; пул после падения создается заново
+    with ParallelParser(CrashingParser, workers=1, chunk_bytes=1) as parser:
+        result = parser.parse_many(files)
+
+    assert "аварийно" in result.errors[files[1]]
+    assert files[-1] in result.modules
+    assert set(result.modules) | set(result.errors) == set(files)
+
+
+def test_unpicklable_chunk_is_parsed_locally(files):
+    with ParallelParser(UnpicklableParser, workers=1) as parser:
+        result = parser.parse_many(files)
+
+    assert result.errors == {}
+    assert len(result.modules) == len(files)
+
+
+def test_budget_is_passed_to_workers(files):
+    with ParallelParser(BudgetProbe, workers=1,
+                        budget=ParseBudget(timeout=5)) as parser:
+        result = parser.parse_many(files[:1])
+        local = parser.parse_string("Перем А;")
+
+    assert result.modules[files[0]].name == "5"
+    assert local.name == "5"
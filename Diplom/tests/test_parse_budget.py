@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from Diplom.src.parser.budget import (
+    ParseBudget, ParseStatus, ParseTimeoutError,
+)
+from Diplom.src.parser.native_parser import NativeBSLParser
+
+METHOD = (
+    "Процедура Метод{i}()\n"
+    "    Итог = 0;\n"
+    "    Для Инд = 1 По 10 Цикл\n"
+    "        Итог = Итог + Инд;\n"
+    "    КонецЦикла;\n"
+    "КонецПроцедуры\n"
+)
+
+
+class SlowParser(NativeBSLParser):
+    """Модуль разобран в срок, но срок истекает до разбора тел"""
+
+    def parse_file(self, file_path, signatures_only=False):
+        module = super().parse_file(file_path, signatures_only)
+        time.sleep(0.3)
+        return module
+
+
+def test_lazy_bodies_are_parsed_within_outcome_budget(tmp_path):
+    path = tmp_path / "module.bsl"
+    path.write_text("".join(METHOD.format(i=i) for i in range(3)),
+                    encoding="utf-8")
+    parser = SlowParser(lazy_bodies=True, budget=ParseBudget(timeout=0.2))
+
+    outcome = parser.parse_outcome(str(path))
+
+    assert outcome.status is ParseStatus.TIMED_OUT
+    method = outcome.module.procedures[0]
+    assert not method.body_loaded
+    # Вне parse_outcome срока нет: тело строится при обращении
+    assert len(method.body) == 2
+    assert outcome.module.errors == []
+
+
+def test_deadline_is_checked_while_tokenizing():
+    code = "Итог = 1;\n" * 20000
+    parser = NativeBSLParser(budget=ParseBudget(timeout=0))
+
+    with pytest.raises(ParseTimeoutError) as info:
+        parser.parse_string(code)
+
+    assert "разбиении на токены" in str(info.value)
+    assert info.value.module is None
@@ -0,0 +1,38 @@
+from Diplom.src.parser.native_parser import NativeBSLParser
+from Diplom.src.parser.regions import split_by_regions
+
+CODE = (
+    "Перем Глобальная;\n"
+    "#Область Основная\n"
+    "Процедура Внутри()\n"
+    "КонецПроцедуры\n"
+    "#КонецОбласти\n"
+    "Процедура Снаружи()\n"
+    "КонецПроцедуры\n"
+)
+
+
+def parse():
+    return NativeBSLParser().parse_string(CODE, "module.bsl")
+
+
+def names(part):
+    return [method.name for method in part.procedures]
+
+
+def test_split_by_top_level_regions():
+    outside, main = split_by_regions(parse())
+    assert names(outside) == ["Снаружи"]
+    assert [v.name for v in outside.variables] == ["Глобальная"]
+    assert names(main) == ["Внутри"]
+
+
+def test_rangeless_nodes_go_outside():
+    # Так выглядят модули BSLParser: текст есть, диапазонов у узлов нет
+    module = parse()
+    for method in module.procedures:
+        method.range = None
+
+    outside, main = split_by_regions(module)
+    assert names(outside) == ["Внутри", "Снаружи"]
+    assert names(main) == []
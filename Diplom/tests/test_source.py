@@ -0,0 +1,50 @@
+import codecs
+
+import pytest
+
+from Diplom.src.parser.source import SourceText, decode_source, load_source
+
+TEXT = "Перем Итог;\r\nИтог = 1;\n"
+EXPECTED = "Перем Итог;\nИтог = 1;\n"
+
+
+@pytest.mark.parametrize("data, encoding", [
+    (TEXT.encode("utf-8"), "utf-8"),
+    (codecs.BOM_UTF8 + TEXT.encode("utf-8"), "utf-8"),
+    (TEXT.encode("cp1251"), "cp1251"),
+    (codecs.BOM_UTF16_LE + TEXT.encode("utf-16-le"), "utf-16-le"),
+    (TEXT.encode("utf-16-le"), "utf-16-le"),
+    (TEXT.encode("utf-16-be"), "utf-16-be"),
+])
+def test_decode_sniffs_encoding(data, encoding):
+    assert decode_source(data) == (EXPECTED, encoding)
+
+
+def test_stray_nul_in_cp1251_is_not_utf16():
+    # Нечетная длина: как UTF-16 такой текст не декодируется
+    data = "Итог = 1;\x00\n".encode("cp1251")
+    assert len(data) % 2 == 1
+    assert decode_source(data) == ("Итог = 1;\x00\n", "cp1251")
+
+
+def test_load_source(tmp_path):
+    path = tmp_path / "module.bsl"
+    path.write_bytes(TEXT.encode("cp1251"))
+    source = load_source(str(path))
+    assert (source.text, source.encoding) == (EXPECTED, "cp1251")
+    empty = tmp_path / "empty.bsl"
+    empty.touch()
+    assert load_source(str(empty)).text == ""
+
+
+def test_lines_are_numbered_from_one():
+    source = SourceText("первая\nвторая\nтретья")
+    assert source.line_count == 3
+    assert source.line(1) == "первая"
+    assert source.line(3) == "третья"
+    assert source.snippet(1, 2) == "первая\nвторая"
+    assert source.position(source.offset(2, 3)) == (2, 3)
+    with pytest.raises(IndexError):
+        source.line(0)
+    with pytest.raises(IndexError):
+        source.line(4)
@@ -0,0 +1,76 @@
+from Diplom.src.parser.flat_ast import FlatAST
+from Diplom.src.parser.native_parser import NativeBSLParser
+from Diplom.src.parser.structural_hash import (
+    HashConsTable, find_duplicates,
+)
+
+TEMPLATE = (
+    "Процедура {name}(Список)\n"
+    "    {total} = 0;\n"
+    "    Для Каждого Элемент Из Список Цикл\n"
+    "        Если Элемент.Количество > 0 Тогда\n"
+    "            {total} = {total} + Элемент.Количество * 2;\n"
+    "        КонецЕсли;\n"
+    "    КонецЦикла;\n"
+    "    Сообщить({total});\n"
+    "КонецПроцедуры\n"
+)
+
+
+def parse(code, name="module.bsl"):
+    return NativeBSLParser().parse_string(code, name)
+
+
+def test_hash_ignores_positions_and_case():
+    first = parse(TEMPLATE.format(name="А", total="Итог")).procedures[0]
+    second = parse("\n\n" + TEMPLATE.format(name="А", total="ИТОГ")
+                   ).procedures[0]
+    table = HashConsTable()
+    assert table.add(first) == table.add(second)
+    assert table.structural_hash(first) == table.structural_hash(second)
+    # Хэш не зависит от таблицы и порядка добавления
+    assert HashConsTable().structural_hash(second) == \
+        table.structural_hash(first)
+
+
+def test_normalize_names():
+    first = parse(TEMPLATE.format(name="А", total="Итог")).procedures[0]
+    second = parse(TEMPLATE.format(name="Б", total="Сумма")).procedures[0]
+    table = HashConsTable()
+    assert table.add(first) != table.add(second)
+    table = HashConsTable(normalize_names=True)
+    assert table.add(first) == table.add(second)
+
+
+def test_shapes_are_shared():
+    module = parse(TEMPLATE.format(name="А", total="Итог")
+                   + TEMPLATE.format(name="Б", total="Итог"))
+    table = HashConsTable(normalize_names=True)
+    method = table.add(module.procedures[0])
+    shapes = len(table)
+    root = table.add(module)
+    assert table.size(root) == 2 * table.size(method) + 1
+    # Второй метод не добавил ни одной формы, кроме формы модуля
+    assert len(table) == shapes + 1
+
+
+def test_find_duplicates_across_modules():
+    first = parse(TEMPLATE.format(name="А", total="Итог"), "a.bsl")
+    second = parse(TEMPLATE.format(name="Б", total="Сумма"), "b.bsl")
+    groups = find_duplicates([first, second], min_nodes=10)
+    # Повторы внутри методов покрыты повтором самих методов
+    assert len(groups) == 1
+    assert [(name, node.name) for name, node in groups[0]] == [
+        ("a.bsl", "А"), ("b.bsl", "Б"),
+    ]
+    assert find_duplicates([first], min_nodes=10) == []
+
+
+def test_index_caches_hashes():
+    module = parse(TEMPLATE.format(name="А", total="Итог"))
+    method = module.procedures[0]
+    expected = HashConsTable().structural_hash(method)
+    assert module.index.structural_hash(method) == expected
+    assert module.index.structural_hash(method) == expected
+    view = FlatAST.from_module(module).modules()[0]
+    assert view.index.structural_hash(view.procedures[0]) == expected
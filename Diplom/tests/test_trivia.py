@@ -0,0 +1,53 @@
+from Diplom.src.parser.native_parser import NativeBSLParser
+from Diplom.src.parser.trivia import (
+    ANNOTATION_MARK, BLANK_LINES, COMMENT_LINE, PREPROCESSOR_LINE,
+    REGION_END, REGION_START, TRAILING_COMMENT, build_trivia,
+)
+
+CODE = (
+    "#Область Основная\n"
+    "// Описание\n"
+    "// процедуры\n"
+    "&НаСервере\n"
+    "Процедура Тест()\n"
+    "    А = 1; // хвост\n"
+    "\n"
+    "\n"
+    "#Если Сервер Тогда\n"
+    "    Б = \"много\n"
+    "    |строк\";\n"
+    "#КонецЕсли\n"
+    "КонецПроцедуры\n"
+    "#КонецОбласти\n"
+)
+
+
+def entries(table):
+    return [(table.kinds[i], table.lines[i], table.end_lines[i],
+             table.entry_text(i)) for i in table.entries()]
+
+
+def test_trivia_entries():
+    assert entries(build_trivia(CODE)) == [
+        (REGION_START, 1, 1, "#Область Основная"),
+        (COMMENT_LINE, 2, 2, "// Описание"),
+        (COMMENT_LINE, 3, 3, "// процедуры"),
+        (ANNOTATION_MARK, 4, 4, "&НаСервере"),
+        (TRAILING_COMMENT, 6, 6, "// хвост"),
+        (BLANK_LINES, 7, 8, "\n\n\n"),
+        (PREPROCESSOR_LINE, 9, 9, "#Если Сервер Тогда"),
+        (PREPROCESSOR_LINE, 12, 12, "#КонецЕсли"),
+        (REGION_END, 14, 14, "#КонецОбласти"),
+    ]
+
+
+def test_parser_trivia_matches_build_trivia():
+    module = NativeBSLParser().parse_string(CODE, "module.bsl")
+    assert entries(module.trivia) == entries(build_trivia(CODE))
+
+
+def test_leading_comment_skips_annotations():
+    module = NativeBSLParser().parse_string(CODE, "module.bsl")
+    method = module.procedures[0]
+    assert module.trivia.leading_comment(method) == "Описание\nпроцедуры"
+    assert module.trivia.in_lines(5, 8) == [4, 5]
@@ -0,0 +1,44 @@
+from Diplom.src.parser.native_parser import NativeBSLParser
+from Diplom.src.rules.naming_rules.VariableMinLength import (
+    VariableMinLength,
+)
+
+
+def check(code):
+    module = NativeBSLParser().parse_string(code, "module.bsl")
+    return [(v.line, v.message.split("'")[1])
+            for v in VariableMinLength().check(module)]
+
+
+def test_parameters_are_not_reported():
+    code = (
+        "Процедура Тест(Знач А, Б = 1)\n"
+        "    Сумма = А + Б;\n"
+        "    А = Б;\n"
+        "КонецПроцедуры\n"
+    )
+    assert check(code) == []
+
+
+def test_usages_are_not_reported():
+    code = (
+        "Процедура Тест()\n"
+        "    Сообщить(Х);\n"
+        "    Т = Х + 1;\n"
+        "    Сообщить(Т);\n"
+        "КонецПроцедуры\n"
+    )
+    assert check(code) == [(3, "Т")]
+
+
+def test_declarations_and_loop_variables():
+    code = (
+        "Процедура Тест(Список)\n"
+        "    Перем Ы;\n"
+        "    Для i = 1 По 10 Цикл\n"
+        "    КонецЦикла;\n"
+        "    Для Каждого Э Из Список Цикл\n"
+        "    КонецЦикла;\n"
+        "КонецПроцедуры\n"
+    )
+    assert check(code) == [(2, "Ы"), (5, "Э")]